@@ -27,9 +27,10 @@ def run(config_path: str, **kwargs) -> Dict[str, Any]:
     try:
         # モード引数を直接渡す
         mode = kwargs.get('mode')
+        keep_artifacts = kwargs.get('keep_artifacts')
         
         # アナライザー実行
-        analyzer = ToorPIAAnalyzer(config_path, mode=mode)
+        analyzer = ToorPIAAnalyzer(config_path, mode=mode, keep_artifacts=keep_artifacts)
         result = analyzer.execute()
         
         return result
@@ -85,14 +86,19 @@ def main():
     parser = argparse.ArgumentParser(description='toorPIA Backend Analyzer')
     parser.add_argument('config_path', help='設備設定ファイルパス')
     parser.add_argument('--mode', choices=['basemap_update', 'addplot_update'], 
-                       required=True, help='処理モード（必須）: basemap_update（基盤マップ更新）またはaddplot_update（追加プロット・異常検知）')
+                       help='処理モード（通常実行時は必須）: basemap_update（基盤マップ更新）またはaddplot_update（追加プロット・異常検知）')
     parser.add_argument('--validate-only', action='store_true', 
                        help='設定ファイルバリデーションのみ実行')
     parser.add_argument('--status', action='store_true', 
                        help='ステータス取得のみ実行')
+    parser.add_argument('--keep-artifacts', nargs='?', const='npz', choices=ToorPIAAnalyzer.ARTIFACT_FORMATS,
+                       help='デバッグ用に取得データを一時ディレクトリへ保存（形式: npz（既定）またはcsv）')
     
     args = parser.parse_args()
     
+    if not args.mode and not (args.validate_only or args.status):
+        parser.error("--mode is required unless --validate-only or --status is given")
+    
     if args.validate_only:
         # バリデーションのみ
         is_valid = validate_config(args.config_path)
@@ -108,13 +114,13 @@ def main():
     
     else:
         # 通常実行
-        result = run(args.config_path, mode=args.mode)
+        result = run(args.config_path, mode=args.mode, keep_artifacts=args.keep_artifacts)
         
         import json
         print(json.dumps(result, indent=2, ensure_ascii=False))
         
         # 終了コード設定
-        sys.exit(0 if result.get('status') == 'success' else 1)
+        sys.exit(0 if result.get('status') in ('success', 'skipped') else 1)
 
 if __name__ == '__main__':
     main()
@@ -5,11 +5,18 @@ toorPIA連携プラグインのスケジュール管理
 """
 
 import os
+import sys
+import json
+import time
+import heapq
+import signal
+import threading
 import yaml
 import subprocess
 import tempfile
 import shutil
-from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 import re
 
@@ -25,6 +32,9 @@ class ToorpiaBackendScheduler:
         current_dir = os.path.dirname(__file__)
         self.project_root = os.path.abspath(os.path.join(current_dir, "..", "..", ".."))
         
+        # cronから起動するPython実行ファイル（_get_python_executable で1回だけ解決）
+        self._python_exe: Optional[str] = None
+        
     def setup_schedules(self, config_files: List[str]) -> bool:
         """スケジュール初期セットアップ"""
         try:
@@ -244,8 +254,193 @@ class ToorpiaBackendScheduler:
             print(f"❌ Disable schedules failed: {e}")
             return False
     
-    def _generate_cron_entries(self, config_path: str) -> List[str]:
-        """設定ファイルからcronエントリを生成（新しい設定構造に対応）"""
+    def run_daemon(self, config_provider: Callable[[], List[str]], max_workers: int = 4) -> bool:
+        """常駐実行モード
+        
+        cronと同じスケジュール設定（basemap.update.schedule・basemap.addplot.interval）に従い、
+        ジョブをプロセス内で実行します。アナライザー（解析済み設定・APIクライアントの
+        接続プール・セッションキー）は設備・モードごとに保持して実行間で再利用します。
+        
+        ジョブはcronと同じくプラグインの仮想環境で実行するため、仮想環境外のPythonで
+        起動された場合は仮想環境のPythonで起動し直します（プロセスは置き換わります）。
+        
+        SIGHUP で設定ファイルを再検索してスケジュールを再構築し、SIGTERM・SIGINT で
+        実行中のジョブの完了を待って終了します。
+        
+        Args:
+            config_provider: 対象設定ファイル一覧を返す関数（起動時・SIGHUP時に呼び出し）
+            max_workers: 同時実行ジョブ数の上限
+        """
+        self._reexec_in_venv()
+        
+        from plugins.run_plugin import validate_plugin_requirements
+        if not validate_plugin_requirements(self.plugin_type, self.plugin_name):
+            print(f"❌ Plugin requirements not satisfied for {self.plugin_type}/{self.plugin_name}")
+            return False
+        
+        # cronと同じくプロジェクトルートを基準に logs/ 等を解決する
+        os.chdir(self.project_root)
+        
+        if self._has_cron_entries():
+            print("⚠️  toorPIA cron entries are installed; jobs may run twice. "
+                  "Disable them with: schedule_plugin.py --disable --type analyzer --name toorpia_backend")
+        
+        self._daemon_wake = threading.Event()
+        self._daemon_stop = False
+        self._daemon_reload = False
+        self._analyzers: Dict[Tuple[str, str], Any] = {}
+        self._running_jobs: set = set()
+        self._running_lock = threading.Lock()
+        
+        def request_stop(signum, frame):
+            self._daemon_stop = True
+            self._daemon_wake.set()
+        
+        def request_reload(signum, frame):
+            self._daemon_reload = True
+            self._daemon_wake.set()
+        
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_reload)
+        
+        timers = self._build_timers(config_provider(), datetime.now())
+        if not timers:
+            print("⚠️  No valid schedules found")
+            return False
+        
+        print(f"🕒 toorPIA scheduler daemon started (pid {os.getpid()}, "
+              f"{len(timers)} job(s), max_workers={max_workers})", flush=True)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="toorpia-job") as executor:
+            while not self._daemon_stop:
+                if self._daemon_reload:
+                    self._daemon_reload = False
+                    timers = self._build_timers(config_provider(), datetime.now())
+                    self._analyzers.clear()
+                    print(f"🔄 Schedules reloaded ({len(timers)} job(s))", flush=True)
+                    if not timers:
+                        self._daemon_wake.wait()
+                        self._daemon_wake.clear()
+                        continue
+                
+                next_run, seq, job = timers[0]
+                wait_seconds = (next_run - datetime.now()).total_seconds()
+                if wait_seconds > 0:
+                    # 時刻変更に追従するため最大60秒ごとに再評価
+                    self._daemon_wake.wait(min(wait_seconds, 60))
+                    self._daemon_wake.clear()
+                    continue
+                
+                heapq.heappop(timers)
+                self._dispatch_job(executor, job)
+                
+                job_next = self._next_cron_time(job['cron'], max(next_run, datetime.now()))
+                heapq.heappush(timers, (job_next, seq, job))
+            
+            print("🛑 Stopping scheduler daemon, waiting for running jobs...", flush=True)
+        
+        print("✅ Scheduler daemon stopped", flush=True)
+        return True
+    
+    def _reexec_in_venv(self) -> None:
+        """仮想環境外のPythonで起動された場合は仮想環境のPythonで同じコマンドを実行し直す"""
+        python_exe = self._get_python_executable()
+        if python_exe is None:
+            return
+        
+        python_exe = os.path.join(self.project_root, python_exe)
+        venv_path = os.path.dirname(os.path.dirname(python_exe))
+        try:
+            if os.path.samefile(sys.prefix, venv_path):
+                return
+        except OSError:
+            pass
+        
+        # 仮想環境のPythonでも sys.prefix が一致しない場合に起動を繰り返さない
+        if os.environ.get("TOORPIA_SCHEDULER_REEXEC"):
+            print(f"⚠️  Could not switch to {python_exe}; running daemon with {sys.executable}")
+            return
+        
+        print(f"🔁 Restarting scheduler daemon with {os.path.relpath(python_exe, self.project_root)}", flush=True)
+        os.environ["TOORPIA_SCHEDULER_REEXEC"] = "1"
+        os.execv(python_exe, [python_exe, os.path.abspath(sys.argv[0])] + sys.argv[1:])
+    
+    def _build_timers(self, config_files: List[str], now: datetime) -> List[tuple]:
+        """設定ファイルからジョブの実行予定キュー（次回実行時刻順のヒープ）を構築"""
+        timers = []
+        for config_path in config_files:
+            for job in self._generate_jobs(config_path):
+                heapq.heappush(timers, (self._next_cron_time(job['cron'], now), len(timers), job))
+                print(f"  - {job['equipment']} {job['mode']}: {job['cron']}")
+        return timers
+    
+    def _dispatch_job(self, executor: ThreadPoolExecutor, job: Dict[str, Any]) -> None:
+        """ジョブ投入（同じ設備・モードのジョブが実行中の場合は今回分をスキップ）"""
+        key = (job['config_path'], job['mode'])
+        
+        with self._running_lock:
+            if key in self._running_jobs:
+                print(f"⏭️  {job['equipment']} {job['mode']} is still running, skipping this run", flush=True)
+                return
+            self._running_jobs.add(key)
+        
+        executor.submit(self._run_job, job)
+    
+    def _run_job(self, job: Dict[str, Any]) -> None:
+        """ジョブ実行（ワーカースレッド）"""
+        key = (job['config_path'], job['mode'])
+        start = time.time()
+        
+        try:
+            analyzer = self._get_analyzer(job['config_path'], job['mode'])
+            result = analyzer.execute()
+        except Exception as e:
+            result = {
+                "status": "error",
+                "equipment": job['equipment'],
+                "error": {"code": "PLUGIN_EXECUTION_FAILED", "message": str(e)}
+            }
+        finally:
+            with self._running_lock:
+                self._running_jobs.discard(key)
+        
+        elapsed = time.time() - start
+        mark = {"success": "✅", "skipped": "⏭️ "}.get(result.get('status'), "❌")
+        print(f"{mark} {job['equipment']} {job['mode']} finished in {elapsed:.1f}s: "
+              f"{json.dumps(result, ensure_ascii=False, default=str)}", flush=True)
+    
+    def _get_analyzer(self, config_path: str, mode: str):
+        """設備・モード別アナライザー取得（設定ファイル更新時は作り直す）"""
+        key = (config_path, mode)
+        mtime = os.path.getmtime(config_path)
+        
+        cached = self._analyzers.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        # pandas等の重い依存は常駐実行時のみ読み込む
+        if self.project_root not in sys.path:
+            sys.path.insert(0, self.project_root)
+        from plugins.analyzers.toorpia_backend.toorpia_analyzer import ToorPIAAnalyzer
+        
+        analyzer = ToorPIAAnalyzer(config_path, mode=mode)
+        self._analyzers[key] = (mtime, analyzer)
+        return analyzer
+    
+    def _has_cron_entries(self) -> bool:
+        """有効なtoorPIA cronエントリの有無"""
+        try:
+            result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
+        except OSError:
+            return False
+        if result.returncode != 0:
+            return False
+        return any('TOORPIA_MODE=' in line and not line.strip().startswith('#')
+                   for line in result.stdout.split('\n'))
+    
+    def _generate_jobs(self, config_path: str) -> List[Dict[str, Any]]:
+        """設定ファイルからジョブ（モードとcron式）を生成（新しい設定構造に対応）"""
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = yaml.safe_load(f)
@@ -257,7 +452,7 @@ class ToorpiaBackendScheduler:
             basemap_config = config.get('basemap', {})
             equipment_name = self._extract_equipment_name(config_path)
             
-            entries = []
+            jobs = []
             
             # basemap更新スケジュール
             update_config = basemap_config.get('update', {})
@@ -267,25 +462,87 @@ class ToorpiaBackendScheduler:
                 schedule_config = update_config.get('schedule', {})
                 cron_expr = self._schedule_to_cron(schedule_config)
                 if cron_expr:
-                    comment = f"{self.cron_comment_prefix} basemap update ({equipment_name})"
-                    command = self._build_command('basemap_update', config_path)
-                    entries.extend([comment, f"{cron_expr} {command}"])
+                    jobs.append({"equipment": equipment_name, "config_path": config_path,
+                                 "mode": "basemap_update", "cron": cron_expr})
             
             # addplot更新スケジュール
             addplot_config = basemap_config.get('addplot', {})
             addplot_interval = addplot_config.get('interval', '10m')
             addplot_cron = self._interval_to_cron(addplot_interval, 'addplot')
             if addplot_cron:
-                comment = f"{self.cron_comment_prefix} addplot update ({equipment_name})"
-                command = self._build_command('addplot_update', config_path)
-                entries.extend([comment, f"{addplot_cron} {command}"])
+                jobs.append({"equipment": equipment_name, "config_path": config_path,
+                             "mode": "addplot_update", "cron": addplot_cron})
             
-            return entries
+            return jobs
             
         except Exception as e:
-            print(f"❌ Failed to generate cron entries for {config_path}: {e}")
+            print(f"❌ Failed to generate schedules for {config_path}: {e}")
             return []
     
+    def _generate_cron_entries(self, config_path: str) -> List[str]:
+        """設定ファイルからcronエントリを生成"""
+        entries = []
+        for job in self._generate_jobs(config_path):
+            label = "basemap update" if job['mode'] == 'basemap_update' else "addplot update"
+            comment = f"{self.cron_comment_prefix} {label} ({job['equipment']})"
+            command = self._build_command(job['mode'], config_path)
+            entries.extend([comment, f"{job['cron']} {command}"])
+        return entries
+    
+    @staticmethod
+    def _parse_cron_field(field: str, low: int, high: int) -> set:
+        """cron式のフィールド（*, N, */N, N-M, カンマ区切り）を値の集合に変換"""
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = map(int, part.split('-', 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def _next_cron_time(self, cron_expr: str, after: datetime) -> datetime:
+        """cron式で次に実行される時刻（after より後の最初の分）"""
+        minute_f, hour_f, day_f, month_f, weekday_f = cron_expr.split()[:5]
+        minutes = self._parse_cron_field(minute_f, 0, 59)
+        hours = self._parse_cron_field(hour_f, 0, 23)
+        days = self._parse_cron_field(day_f, 1, 31)
+        months = self._parse_cron_field(month_f, 1, 12)
+        weekdays = {w % 7 for w in self._parse_cron_field(weekday_f, 0, 7)}  # 0・7 = 日曜
+        
+        # cronの仕様：日と曜日の両方が指定された場合はいずれかに一致すれば実行
+        day_any, weekday_any = day_f == '*', weekday_f == '*'
+        
+        def day_matches(t: datetime) -> bool:
+            day_ok = t.day in days
+            weekday_ok = (t.isoweekday() % 7) in weekdays
+            if day_any or weekday_any:
+                return day_ok and weekday_ok
+            return day_ok or weekday_ok
+        
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        
+        raise ValueError(f"Cron expression never matches: {cron_expr}")
+    
     def _schedule_to_cron(self, schedule_config: Dict[str, Any]) -> Optional[str]:
         """新しいschedule設定をcron式に変換"""
         try:
@@ -418,16 +675,47 @@ class ToorpiaBackendScheduler:
             return None
     
     def _build_command(self, mode: str, config_path: str) -> str:
-        """プラグイン実行コマンドを構築"""
+        """プラグイン実行コマンドを構築
+        
+        仮想環境がある場合は仮想環境のPythonでプラグインの run.py を直接実行し、
+        run_plugin.py 経由の2段階のインタープリター起動を避けます。
+        """
+        python_exe = self._get_python_executable()
+        if python_exe is None:
+            return (f"cd {self.project_root} && "
+                    f"TOORPIA_MODE={mode} "
+                    f"python3 plugins/run_plugin.py run "
+                    f"--type {self.plugin_type} "
+                    f"--name {self.plugin_name} "
+                    f"--config {config_path} "
+                    f"--mode {mode} "
+                    f">> logs/toorpia_scheduler.log 2>&1")
+        
         return (f"cd {self.project_root} && "
                 f"TOORPIA_MODE={mode} "
-                f"python3 plugins/run_plugin.py run "
-                f"--type {self.plugin_type} "
-                f"--name {self.plugin_name} "
-                f"--config {config_path} "
+                f"{python_exe} plugins/analyzers/{self.plugin_name}/run.py "
+                f"{config_path} "
                 f"--mode {mode} "
                 f">> logs/toorpia_scheduler.log 2>&1")
     
+    def _get_python_executable(self) -> Optional[str]:
+        """プラグインの仮想環境のPython（プロジェクトルートからの相対パス。仮想環境がない場合はNone）"""
+        if self._python_exe is None:
+            if self.project_root not in sys.path:
+                sys.path.insert(0, self.project_root)
+            from plugins.run_plugin import get_python_executable
+            
+            python_exe = get_python_executable(self.plugin_type, self.plugin_name)
+            if os.path.isabs(python_exe):
+                self._python_exe = os.path.relpath(python_exe, self.project_root)
+            else:
+                # 仮想環境がない場合は run_plugin.py 経由で実行し、要件エラーを記録させる
+                print(f"⚠️  Virtual environment for {self.plugin_name} not found; "
+                      f"scheduling via plugins/run_plugin.py")
+                self._python_exe = ""
+        
+        return self._python_exe or None
+    
     def _extract_equipment_name(self, config_path: str) -> str:
         """設定ファイルパスから設備名を抽出"""
         return os.path.basename(os.path.dirname(config_path))
@@ -1,23 +1,39 @@
-import requests
-import pandas as pd
 import os
+import json
 import subprocess
+import tempfile
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Set
 from ...base.base_analyzer import BaseAnalyzer
 from ...base.lock_manager import EquipmentLockManager
 from ...base.temp_file_manager import TempFileManager
 from ...base.errors import (
     ConfigurationError, APIConnectionError, DataFetchError, 
     ValidationError, AuthenticationError, ProcessingModeError,
-    TempFileError, LockError, PluginError, get_error_severity
+    TempFileError, LockError, PluginError, RequestQueueTimeoutError, get_error_severity
 )
-from ...base.api_client import create_toorpia_client, create_ifhub_client
+from ...base.session_cache import SessionKeyCache
+
+# pandas・numpy・requests に依存するモジュールはデータ取得・API呼び出し時に読み込み、
+# 設定バリデーション・ステータス取得・スケジューラーの起動時間に影響させない
+if TYPE_CHECKING:
+    import pandas as pd
+    from ...base.timeseries import TagSeries
+    from ...base.rolling_cache import RollingWindowCache
+    from ...base.chunk_cache import ChunkCache
 
 class ToorPIAAnalyzer(BaseAnalyzer):
     """toorPIA Backend API連携アナライザー"""
     
-    def __init__(self, config_path: str, mode: Optional[str] = None):
+    # --keep-artifacts で指定可能な中間データ保存形式
+    ARTIFACT_FORMATS = ('npz', 'csv')
+    
+    # キャッシュしたbasemapがaddplotで拒否されたとみなすHTTPステータス
+    BASEMAP_REJECTED_STATUS = (400, 404, 410, 422)
+    
+    def __init__(self, config_path: str, mode: Optional[str] = None,
+                 keep_artifacts: Optional[str] = None):
         super().__init__(config_path)
         
         # 並列処理対応コンポーネント
@@ -33,9 +49,93 @@ class ToorPIAAnalyzer(BaseAnalyzer):
         })
         self.timeout = toorpia_config.get('timeout', 300)
         
+        # 処理モード別の実行時間上限（リトライを含むAPI呼び出しの期限。null: 上限なし）
+        # addplotは次回の実行と重ならないよう、既定で実行間隔（basemap.addplot.interval）を上限とする
+        self.run_budget = {
+            'addplot_update': self.config.get('basemap', {}).get('addplot', {}).get('interval', '10m'),
+            'basemap_update': None
+        }
+        self.run_budget.update(toorpia_config.get('run_budget') or {})
+        self.run_deadline: Optional[float] = None
+        
+        # 認証設定
+        auth_config = toorpia_config.get('auth', {})
+        self.api_key = auth_config.get('api_key', '')
+        self.auth_auto_refresh = auth_config.get('auto_refresh', True)
+        session_cache_config = auth_config.get('session_cache', {})
+        self.session_cache_enabled = session_cache_config.get('enabled', True)
+        self.session_cache_ttl = session_cache_config.get('ttl', '30m')
+        
+        # ホスト単位のリクエスト制限（logs/rate_limits/、全設備・全プロセス共通）
+        rate_limit_config = toorpia_config.get('rate_limit', {})
+        self.rate_limit_enabled = rate_limit_config.get('enabled', True)
+        self.rate_limits = {
+            key: rate_limit_config.get(key)
+            for key in ('fit_transform', 'addplot', 'logins_per_minute')
+        }
+        
+        # APIクライアントのメトリクス出力（Prometheus textfile 形式、全設備・全プロセスで累計）
+        metrics_config = toorpia_config.get('metrics', {})
+        self.metrics_enabled = metrics_config.get('enabled', True)
+        self.metrics_directory = metrics_config.get('directory', os.path.join("logs", "metrics"))
+        
+        # 設備ロック設定（ロックは処理モード別。basemap更新中もaddplotは直前のbasemapで実行できる）
+        lock_config = toorpia_config.get('lock', {})
+        self.lock_timeout = lock_config.get('timeout', 30)
+        self.lock_skip_if_busy = lock_config.get('skip_if_busy', True)  # 実行中のaddplotがあれば次回分はスキップ
+        
+        # addplot対象basemapのキャッシュ設定（logs/{equipment}/basemap.json）
+        basemap_cache_config = toorpia_config.get('basemap_cache', {})
+        self.basemap_cache_enabled = basemap_cache_config.get('enabled', True)
+        self.basemap_cache_file = os.path.join("logs", self.equipment_name, "basemap.json")
+        
+        # リクエスト本文設定
+        payload_config = toorpia_config.get('payload', {})
+        self.payload_significant_digits = payload_config.get('significant_digits')  # None: 丸めなし
+        self.payload_gzip = payload_config.get('gzip', False)
+        
+        # IF-HUBデータ取得設定
+        fetch_config = toorpia_config.get('data_fetch', {})
+        self.ifhub_url = fetch_config.get('ifhub_url', 'http://localhost:3001')
+        self.fetch_mode = fetch_config.get('mode', 'batch')  # batch / per_tag
+        self.batch_max_tags = fetch_config.get('batch_max_tags')
+        self.batch_max_url_length = fetch_config.get('batch_max_url_length')
+        self.max_concurrency = fetch_config.get('max_concurrency', 8)
+        self.max_records_per_request = fetch_config.get('max_records_per_request', 100000)
+        self._ifhub_client = None
+        self._toorpia_client = None
+        
+        # basemap用チャンクキャッシュ設定
+        chunk_cache_config = fetch_config.get('chunk_cache', {})
+        self.chunk_cache_enabled = chunk_cache_config.get('enabled', True)
+        self.chunk_cache_max_size_mb = chunk_cache_config.get('max_size_mb', 1024)
+        # 確定後に遅れて追加（バックフィル）されたデータはキャッシュに反映されないため、余裕を持たせる
+        self.chunk_cache_settle = chunk_cache_config.get('settle', '2D')
+        
+        # addplot差分取得用ローリングキャッシュ設定
+        addplot_cache_config = fetch_config.get('addplot_cache', {})
+        self.addplot_cache_enabled = addplot_cache_config.get('enabled', True)
+        self.addplot_cache_overlap = addplot_cache_config.get('overlap', '5m')
+        
+        # タグ一覧・タグ名 -> カラム名の対応のキャッシュ（logs/{equipment}/tags.json、ETagで検証）
+        tag_cache_config = fetch_config.get('tag_cache', {})
+        self.tag_cache_enabled = tag_cache_config.get('enabled', True)
+        self.tag_cache_file = os.path.join("logs", self.equipment_name, "tags.json")
+        # gtag（計算タグ）のタグ名。定義の変更で過去の値も変わるためチャンクキャッシュを使用しない
+        self.gtag_names: Set[str] = set()
+        
         # 処理モード
         self.processing_mode: Optional[str] = mode
-        self.temp_csv_path: Optional[str] = None
+        
+        # prepare() で取得したデータはメモリ上で execute() に受け渡す
+        self.prepared_frame: Optional['pd.DataFrame'] = None
+        
+        # デバッグ用中間データ保存（None: 保存しない, 'npz' / 'csv': 指定形式で保存し削除しない）
+        if keep_artifacts is not None and keep_artifacts not in self.ARTIFACT_FORMATS:
+            raise ValueError(f"Unsupported artifact format: {keep_artifacts} "
+                             f"(supported: {', '.join(self.ARTIFACT_FORMATS)})")
+        self.keep_artifacts = keep_artifacts
+        self.artifact_path: Optional[str] = None
         
     def prepare(self) -> bool:
         """事前処理：データ取得とCSV準備"""
@@ -44,12 +144,16 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             self.processing_mode = self._determine_processing_mode()
             self.logger.info(f"Processing mode: {self.processing_mode}")
             
-            # CSVデータ取得
+            # データ取得（メモリ上に保持）
             success = self._fetch_equipment_data()
             if not success:
                 self.logger.error("Failed to fetch equipment data")
                 return False
             
+            # デバッグ用中間データ保存
+            if self.keep_artifacts:
+                self._save_artifact()
+            
             self.logger.info("Preparation completed successfully")
             return True
             
@@ -134,8 +238,18 @@ class ToorPIAAnalyzer(BaseAnalyzer):
         accumulated_errors = []
         
         try:
-            with self.lock_manager.acquire_lock(timeout=30):
+            # addplotは前回分が実行中であれば待たずにスキップ（次回の実行で最新データまで処理される）
+            skip_if_busy = self.lock_skip_if_busy and self.processing_mode == "addplot_update"
+            
+            with self.lock_manager.acquire_lock(timeout=self.lock_timeout, mode=self.processing_mode,
+                                                skip_if_busy=skip_if_busy) as acquired:
+                if not acquired:
+                    self.logger.info(f"Skipping {self.processing_mode} for {self.equipment_name}: "
+                                     f"previous run is still in progress")
+                    return self._create_skipped_response("Previous run for this equipment and mode is still in progress")
+                
                 self.logger.info(f"Starting analysis for {self.equipment_name}")
+                self._start_run_budget()
                 
                 # 1. 事前処理
                 if not self.prepare():
@@ -167,8 +281,8 @@ class ToorPIAAnalyzer(BaseAnalyzer):
                         )
                         return self._create_detailed_error_response(error)
                 
-                except (APIConnectionError, AuthenticationError, ValidationError) as e:
-                    # API関連エラーは詳細ログ付きで返す
+                except (APIConnectionError, AuthenticationError, ValidationError, RequestQueueTimeoutError) as e:
+                    # API関連エラー（リクエスト制限の待ち行列タイムアウトを含む）は詳細ログ付きで返す
                     self.logger.error(f"API operation failed: {e}")
                     return self._create_detailed_error_response(e)
                 
@@ -196,7 +310,7 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             error = LockError(
                 "Failed to acquire equipment lock - another process may be running",
                 equipment_name=self.equipment_name,
-                lock_timeout=30
+                lock_timeout=self.lock_timeout
             )
             return self._create_detailed_error_response(error)
         
@@ -220,11 +334,17 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             return self._create_detailed_error_response(error)
         
         finally:
-            # 一時ファイルクリーンアップ
-            try:
-                self.temp_manager.cleanup_temp_files()
-            except Exception as cleanup_error:
-                self.logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
+            # 取得データ・期限は実行ごとに破棄（常駐実行でアナライザーを再利用する場合に備える）
+            self.prepared_frame = None
+            self._set_client_deadline(None)
+            self._export_metrics()
+            
+            # 一時ファイルクリーンアップ（中間データ保存時は残す）
+            if not self.keep_artifacts:
+                try:
+                    self.temp_manager.cleanup_temp_files()
+                except Exception as cleanup_error:
+                    self.logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
     
     def _determine_processing_mode(self) -> str:
         """処理モード判定"""
@@ -239,9 +359,6 @@ class ToorPIAAnalyzer(BaseAnalyzer):
     def _fetch_equipment_data(self) -> bool:
         """IF-HUB APIを直接使用した設備データ取得"""
         try:
-            # 一時ファイルパス生成
-            self.temp_csv_path = self.temp_manager.generate_temp_filename("csv")
-            
             # basemap設定取得
             basemap_config = self.config['basemap']
             
@@ -277,91 +394,37 @@ class ToorPIAAnalyzer(BaseAnalyzer):
     def _fetch_data_via_api(self, start_iso: str, end_iso: str) -> bool:
         """IF-HUB APIを使用してデータ取得"""
         try:
-            # 1. 設備のタグ一覧取得（gtagsも含む）
-            tags_url = f"http://localhost:3001/api/tags?equipment={self.equipment_name}&includeGtags=true"
-            tags_response = requests.get(tags_url, timeout=30)
-            tags_response.raise_for_status()
-            
-            tags_data = tags_response.json()
-            tags = tags_data.get('tags', [])
-            
-            if not tags:
-                self.logger.error(f"No tags found for equipment: {self.equipment_name}")
-                return False
-            
-            self.logger.info(f"Found {len(tags)} tags for equipment {self.equipment_name}")
+            # 1. 設備のタグ一覧（gtagsも含む）とタグ名 -> カラム名の対応
+            column_names = self._get_tag_columns()
             
             # 2. 各タグのデータ取得
-            all_data = {}
-            timestamps = set()
-            
-            for tag in tags:
-                tag_name = tag['name']  # e.g., "7th-untan.POW:7I1032.PV"
-                
-                # source_tagまたはnameをカラム名として使用
-                if tag.get('is_gtag', False):
-                    # gtagの場合はnameをそのまま使用（設備名はもう含まれていない）
-                    column_name = tag_name
-                else:
-                    # 通常タグの場合はsource_tagを使用
-                    column_name = tag.get('source_tag', tag_name)
-                
-                # データAPI呼び出し
-                data_url = f"http://localhost:3001/api/data/{tag_name}"
-                params = {
-                    'start': start_iso,
-                    'end': end_iso
-                }
-                
-                self.logger.debug(f"Fetching data for tag: {tag_name} -> {column_name}")
-                data_response = requests.get(data_url, params=params, timeout=60)
-                
-                if data_response.status_code == 200:
-                    tag_data = data_response.json()
-                    data_points = tag_data.get('data', [])
-                    
-                    all_data[column_name] = {}
-                    
-                    for point in data_points:
-                        timestamp = point['timestamp']
-                        value = point['value']
-                        all_data[column_name][timestamp] = value
-                        timestamps.add(timestamp)
-                    
-                    self.logger.debug(f"Tag {column_name}: {len(data_points)} data points")
-                else:
-                    self.logger.warning(f"Failed to fetch data for tag {tag_name}: {data_response.status_code}")
+            if self.processing_mode == "basemap_update" and self.chunk_cache_enabled:
+                # basemapは確定済みの日をチャンクキャッシュから読み込み、未確定・未取得分のみ取得
+                series = self._fetch_series_with_chunk_cache(column_names, start_iso, end_iso)
+            elif self.processing_mode == "addplot_update" and self.addplot_cache_enabled:
+                # addplotはローリングキャッシュがあれば前回取得分以降の差分のみ取得
+                rolling_cache, fetch_start_iso = self._load_rolling_cache(column_names, start_iso, end_iso)
+                series = self._fetch_series(column_names, fetch_start_iso, end_iso)
+                series = self._update_rolling_cache(
+                    rolling_cache, series, column_names, fetch_start_iso, start_iso
+                )
+            else:
+                series = self._fetch_series(column_names, start_iso, end_iso)
             
-            # 3. DataFrameに変換
-            timestamps_sorted = sorted(list(timestamps))
+            for column_name, tag_series in series.items():
+                self.logger.debug(f"Tag {column_name}: {len(tag_series)} data points")
             
-            if not timestamps_sorted:
+            if not any(len(tag_series) for tag_series in series.values()):
                 self.logger.error("No data points found for any tags")
                 return False
             
-            # CSVデータ構築
-            csv_data = []
-            for timestamp in timestamps_sorted:
-                # timestampを適切な形式に変換 (ISO -> "YYYY-MM-DD HH:MM:SS")
-                from datetime import datetime as dt
-                try:
-                    dt_obj = dt.fromisoformat(timestamp.replace('Z', '+00:00'))
-                    formatted_timestamp = dt_obj.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    formatted_timestamp = timestamp
-                
-                row = {'timestamp': formatted_timestamp}
-                for column_name in all_data.keys():
-                    value = all_data[column_name].get(timestamp, '')
-                    row[column_name] = value
-                csv_data.append(row)
-            
-            # DataFrameに変換してCSV保存
-            df = pd.DataFrame(csv_data)
+            # 3. 全タグの時刻和集合で整列してDataFrameに変換
+            from ...base.timeseries import build_frame
+            df = build_frame(series)
             
             if not df.empty:
-                df.to_csv(self.temp_csv_path, index=False)
-                self.logger.info(f"Equipment data saved: {self.temp_csv_path} ({len(df)} rows, {len(df.columns)-1} tags)")
+                self.prepared_frame = df
+                self.logger.info(f"Equipment data prepared: {len(df)} rows, {len(df.columns)-1} tags")
                 return True
             else:
                 self.logger.error("No data retrieved from API")
@@ -371,35 +434,467 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             self.logger.error(f"API data fetch failed: {e}")
             return False
     
+    def _get_tag_columns(self) -> Dict[str, str]:
+        """タグ名 -> カラム名の対応取得
+        
+        キャッシュ（logs/{equipment}/tags.json）の ETag で条件付き取得し、
+        タグ一覧が変更されていなければ（304）キャッシュした対応をそのまま使用します。
+        """
+        cached = self._load_tag_cache() if self.tag_cache_enabled else None
+        tags, etag = self._get_ifhub_client().get_tags_if_modified(
+            self.equipment_name, cached['etag'] if cached else None, include_gtags=True
+        )
+        
+        if tags is None:
+            self.logger.info(f"Tag list not modified for equipment {self.equipment_name}: "
+                             f"using {len(cached['column_names'])} cached tags")
+            self.gtag_names = set(cached['gtag_names'])
+            return cached['column_names']
+        
+        self.logger.info(f"Found {len(tags)} tags for equipment {self.equipment_name}")
+        
+        column_names = {}
+        self.gtag_names = set()
+        for tag in tags:
+            tag_name = tag['name']  # e.g., "7th-untan.POW:7I1032.PV"
+            
+            # source_tagまたはnameをカラム名として使用
+            if tag.get('is_gtag', False):
+                # gtagの場合はnameをそのまま使用（設備名はもう含まれていない）
+                column_names[tag_name] = tag_name
+                self.gtag_names.add(tag_name)
+            else:
+                # 通常タグの場合はsource_tagを使用
+                column_names[tag_name] = tag.get('source_tag', tag_name)
+        
+        # ETagを返さないサーバーでは検証できないためキャッシュしない
+        if self.tag_cache_enabled and etag:
+            self._write_json_atomic(self.tag_cache_file, {
+                "ifhub_url": self.ifhub_url,
+                "etag": etag,
+                "column_names": column_names,
+                "gtag_names": sorted(self.gtag_names),
+                "updated_at": datetime.now().isoformat()
+            }, prefix=".tags.")
+        
+        return column_names
+    
+    def _load_tag_cache(self) -> Optional[Dict[str, Any]]:
+        """タグ一覧キャッシュの読み込み（未作成・IF-HUB URL不一致・破損時はNone）"""
+        try:
+            with open(self.tag_cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read tag cache {self.tag_cache_file}: {e}")
+            return None
+        
+        if (not isinstance(entry, dict) or entry.get('ifhub_url') != self.ifhub_url
+                or not entry.get('etag') or not isinstance(entry.get('column_names'), dict)
+                or not isinstance(entry.get('gtag_names'), list)):
+            return None
+        return entry
+    
+    def _write_json_atomic(self, path: str, entry: Dict[str, Any], prefix: str) -> None:
+        """設備別キャッシュの書き込み（一時ファイル経由で置き換え、失敗時は警告のみ）"""
+        cache_dir = os.path.dirname(path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=prefix, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            self.logger.warning(f"Failed to write cache {path}: {e}")
+    
+    def _fetch_series(self, column_names: Dict[str, str], start_iso: str, end_iso: str) -> Dict[str, 'TagSeries']:
+        """タグデータを取得し、カラム名ごとに (int64エポック, float64値) の配列へ変換
+        
+        Args:
+            column_names: タグ名 -> カラム名
+        
+        Returns:
+            カラム名 -> 時系列（取得に失敗したタグは含まない）
+        """
+        tag_names = list(column_names)
+        fetched_series = {}
+        
+        # 一括取得モード：/api/batch で全タグをまとめて取得
+        if self.fetch_mode == 'batch':
+            fetched_series = self._fetch_tags_batch(tag_names, start_iso, end_iso)
+        
+        # 一括取得できなかったタグ（per_tagモードでは全タグ）を並列で個別取得
+        remaining_tags = [tag_name for tag_name in tag_names if tag_name not in fetched_series]
+        if remaining_tags:
+            fetched_series.update(self._fetch_tags_concurrent(remaining_tags, start_iso, end_iso))
+        
+        return {
+            column_name: fetched_series[tag_name]
+            for tag_name, column_name in column_names.items()
+            if tag_name in fetched_series
+        }
+    
+    def _fetch_series_with_chunk_cache(self, column_names: Dict[str, str],
+                                       start_iso: str, end_iso: str) -> Dict[str, 'TagSeries']:
+        """チャンクキャッシュを使用したタグデータ取得（basemap用）
+        
+        確定済みの日（日末から chunk_cache.settle 経過済み）はチャンクキャッシュから読み込み、
+        キャッシュにない確定日は連続する日ごとにまとめて取得してキャッシュに保存します。
+        読み込めないチャンクがあるタグは、確定日をすべて取得し直してキャッシュを置き換えます。
+        未確定の日は従来どおり期間指定で取得し、キャッシュしません。
+        gtag は定義の変更で過去の値も変わるため、キャッシュを使用せず全期間を取得します。
+        """
+        import numpy as np
+        from ...base.timeseries import TagSeries, epoch_ns_to_iso
+        from ...base.chunk_cache import ChunkCache, DAY_NS
+        
+        all_columns = list(column_names.values())
+        gtag_columns = {tag_name: column_name for tag_name, column_name in column_names.items()
+                        if tag_name in self.gtag_names}
+        column_names = {tag_name: column_name for tag_name, column_name in column_names.items()
+                        if tag_name not in self.gtag_names}
+        if not column_names:
+            return self._fetch_series(gtag_columns, start_iso, end_iso)
+        
+        start_ns = self._local_iso_to_epoch_ns(start_iso)
+        end_ns = self._local_iso_to_epoch_ns(end_iso)
+        
+        chunk_cache = ChunkCache(self.ifhub_url, self.chunk_cache_max_size_mb * 1024 * 1024, logger=self.logger)
+        
+        settle_end = datetime.now()
+        settle_ns = int((settle_end - self._parse_interval_to_start_time(self.chunk_cache_settle, settle_end))
+                        .total_seconds() * 1_000_000) * 1000
+        closed_before_ns = time.time_ns() - settle_ns
+        
+        days = chunk_cache.day_starts(start_ns, end_ns)
+        closed_days = [day for day in days if day + DAY_NS <= closed_before_ns]
+        
+        # タグごとの未キャッシュ日を連続区間にまとめ、同じ区間のタグを一括取得
+        missing_ranges: Dict[tuple, List[str]] = {}
+        for tag_name in column_names:
+            missing = [day for day in closed_days if not chunk_cache.has(tag_name, day)]
+            for run in self._contiguous_days(missing):
+                missing_ranges.setdefault(run, []).append(tag_name)
+        
+        failed_tags = set()
+        fetched_days = 0
+        for (first_day, last_day), tag_names in missing_ranges.items():
+            failed_tags.update(self._fetch_closed_days(chunk_cache, tag_names, first_day, last_day))
+            fetched_days += (last_day - first_day) // DAY_NS + 1
+        
+        # 未確定期間は全タグをまとめて取得
+        open_series = {}
+        open_start_ns = max(start_ns, closed_days[-1] + DAY_NS) if closed_days else start_ns
+        if open_start_ns <= end_ns:
+            open_start_iso = start_iso if open_start_ns == start_ns else epoch_ns_to_iso(open_start_ns)
+            open_series = self._fetch_series({tag_name: tag_name for tag_name in column_names},
+                                             open_start_iso, end_iso)
+            failed_tags.update(tag_name for tag_name in column_names if tag_name not in open_series)
+        
+        self.logger.info(f"Chunk cache: {len(closed_days)} closed days ({fetched_days} fetched), "
+                         f"open range from {epoch_ns_to_iso(open_start_ns)}")
+        
+        # 確定日のデータをキャッシュから読み込み（読み込めないタグは取得し直して再読み込み）
+        closed_parts = {}
+        unreadable_tags = []
+        for tag_name in column_names:
+            if tag_name in failed_tags:
+                continue
+            try:
+                closed_parts[tag_name] = [chunk_cache.read(tag_name, day, start_ns, end_ns) for day in closed_days]
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Failed to read chunk cache for tag {tag_name}, refetching: {e}")
+                unreadable_tags.append(tag_name)
+        
+        if unreadable_tags:
+            failed_tags.update(self._fetch_closed_days(chunk_cache, unreadable_tags, closed_days[0], closed_days[-1]))
+            for tag_name in unreadable_tags:
+                if tag_name in failed_tags:
+                    continue
+                try:
+                    closed_parts[tag_name] = [chunk_cache.read(tag_name, day, start_ns, end_ns) for day in closed_days]
+                except (OSError, ValueError) as e:
+                    self.logger.error(f"Failed to read refetched chunk cache for tag {tag_name}: {e}")
+                    failed_tags.add(tag_name)
+        
+        # カラムごとにキャッシュと未確定期間のデータを連結
+        series = {}
+        for tag_name, column_name in column_names.items():
+            if tag_name in failed_tags:
+                continue
+            
+            parts = closed_parts[tag_name]
+            if tag_name in open_series:
+                parts.append(open_series[tag_name])
+            
+            series[column_name] = TagSeries(
+                np.concatenate([part.epochs for part in parts]) if parts else np.empty(0, dtype=np.int64),
+                np.concatenate([part.values for part in parts]) if parts else np.empty(0, dtype=np.float64)
+            )
+        
+        if gtag_columns:
+            # カラムの順序はタグ一覧の順序に合わせる
+            series.update(self._fetch_series(gtag_columns, start_iso, end_iso))
+            series = {column_name: series[column_name] for column_name in all_columns if column_name in series}
+        
+        try:
+            chunk_cache.evict()
+        except OSError as e:
+            self.logger.warning(f"Failed to evict chunk cache: {e}")
+        
+        return series
+    
+    def _fetch_closed_days(self, chunk_cache: 'ChunkCache', tag_names: List[str],
+                           first_day: int, last_day: int) -> List[str]:
+        """連続する確定日 [first_day, last_day] を1回の期間指定で取得し、日ごとにキャッシュへ保存
+        
+        Returns:
+            取得に失敗したタグ名
+        """
+        from ...base.timeseries import epoch_ns_to_iso
+        from ...base.chunk_cache import DAY_NS
+        
+        run_series = self._fetch_series(
+            {tag_name: tag_name for tag_name in tag_names},
+            epoch_ns_to_iso(first_day), epoch_ns_to_iso(last_day + DAY_NS - 1_000_000)
+        )
+        
+        days = list(range(first_day, last_day + 1, DAY_NS))
+        failed = []
+        for tag_name in tag_names:
+            if tag_name not in run_series:
+                failed.append(tag_name)
+                continue
+            for chunk_day, chunk in chunk_cache.split_by_day(run_series[tag_name], days):
+                chunk_cache.write(tag_name, chunk_day, chunk)
+        return failed
+    
+    @staticmethod
+    def _contiguous_days(days: List[int]) -> List[tuple]:
+        """日の開始時刻一覧を連続区間 (先頭日, 末尾日) のリストにまとめる"""
+        from ...base.chunk_cache import DAY_NS
+        
+        runs = []
+        for day in days:
+            if runs and runs[-1][1] + DAY_NS == day:
+                runs[-1] = (runs[-1][0], day)
+            else:
+                runs.append((day, day))
+        return runs
+    
+    def _load_rolling_cache(self, column_names: Dict[str, str], start_iso: str, end_iso: str):
+        """addplot用ローリングキャッシュ読み込み
+        
+        Returns:
+            (キャッシュ, 今回の取得開始時刻)。キャッシュが使用できない場合は全期間を取得
+        """
+        from ...base.timeseries import epoch_ns_to_iso
+        from ...base.rolling_cache import RollingWindowCache
+        
+        end_time = datetime.fromisoformat(end_iso)
+        overlap_start = self._parse_interval_to_start_time(self.addplot_cache_overlap, end_time)
+        overlap_ns = int((end_time - overlap_start).total_seconds() * 1_000_000) * 1000
+        
+        rolling_cache = RollingWindowCache(self.equipment_name, overlap_ns, logger=self.logger)
+        signature = [[tag_name, column_name] for tag_name, column_name in column_names.items()]
+        
+        if not rolling_cache.load(signature, self._local_iso_to_epoch_ns(start_iso)):
+            return rolling_cache, start_iso
+        
+        fetch_start_iso = epoch_ns_to_iso(rolling_cache.fetch_start_ns())
+        self.logger.info(f"Rolling cache hit: fetching delta from {fetch_start_iso} "
+                         f"(overlap {self.addplot_cache_overlap})")
+        return rolling_cache, fetch_start_iso
+    
+    def _update_rolling_cache(self, rolling_cache: 'RollingWindowCache', fetched: Dict[str, 'TagSeries'],
+                              column_names: Dict[str, str], fetch_start_iso: str,
+                              start_iso: str) -> Dict[str, 'TagSeries']:
+        """取得データをローリングキャッシュに反映し、遡及期間分の時系列を返す"""
+        from ...base.timeseries import iso_to_epoch_ns
+        
+        if fetch_start_iso == start_iso:
+            fetch_start_ns = self._local_iso_to_epoch_ns(start_iso)
+        else:
+            fetch_start_ns = int(iso_to_epoch_ns([fetch_start_iso])[0])
+        
+        series = rolling_cache.merge(fetched, fetch_start_ns, self._local_iso_to_epoch_ns(start_iso))
+        
+        try:
+            if len(fetched) == len(column_names):
+                signature = [[tag_name, column_name] for tag_name, column_name in column_names.items()]
+                rolling_cache.save(signature)
+            else:
+                # 取得に失敗したタグがある場合、次回は全期間を取得し直す
+                self.logger.warning("Some tags failed to fetch, rolling cache invalidated")
+                rolling_cache.invalidate()
+        except Exception as e:
+            self.logger.warning(f"Failed to update rolling cache: {e}")
+        
+        return series
+    
+    @staticmethod
+    def _local_iso_to_epoch_ns(iso: str) -> int:
+        """ローカル時刻のISO文字列（IF-HUB APIへの期間指定形式）をエポックナノ秒に変換"""
+        return int(round(datetime.fromisoformat(iso).timestamp() * 1_000_000)) * 1000
+    
+    def _save_artifact(self) -> None:
+        """取得データをデバッグ用に保存（npz: バイナリ, csv: 従来形式のCSV）"""
+        from ...base.timeseries import write_csv, save_npz
+        
+        try:
+            self.artifact_path = self.temp_manager.generate_temp_filename(self.keep_artifacts)
+            
+            if self.keep_artifacts == 'csv':
+                write_csv(self.prepared_frame, self.artifact_path)
+            else:
+                save_npz(self.prepared_frame, self.artifact_path)
+            
+            self.logger.info(f"Prepared data kept for debugging: {self.artifact_path}")
+        except Exception as e:
+            raise TempFileError(
+                f"Failed to save prepared data artifact: {e}",
+                file_path=self.artifact_path or "",
+                operation="write"
+            )
+    
+    def _start_run_budget(self) -> None:
+        """処理モードの実行時間上限から今回の実行の期限を設定"""
+        budget = self.run_budget.get(self.processing_mode)
+        if not budget:
+            self._set_client_deadline(None)
+            return
+        
+        now = datetime.now()
+        seconds = (now - self._parse_interval_to_start_time(str(budget), now)).total_seconds()
+        self.logger.info(f"Run budget for {self.processing_mode}: {seconds:.0f}s")
+        self._set_client_deadline(time.monotonic() + seconds)
+    
+    def _set_client_deadline(self, deadline: Optional[float]) -> None:
+        """生成済み・今後生成するAPIクライアントの期限を設定"""
+        self.run_deadline = deadline
+        for client in (self._ifhub_client, self._toorpia_client):
+            if client is not None:
+                client.set_deadline(deadline)
+    
+    def _get_ifhub_client(self):
+        """IF-HUB APIクライアント取得（初回呼び出し時に生成）"""
+        if self._ifhub_client is None:
+            from ...base.api_client import create_ifhub_client
+            self._ifhub_client = create_ifhub_client(
+                self.ifhub_url, logger=self.logger, max_concurrency=self.max_concurrency,
+                max_records_per_request=self.max_records_per_request
+            )
+            self._ifhub_client.set_deadline(self.run_deadline)
+        return self._ifhub_client
+    
+    def _get_toorpia_client(self):
+        """toorPIA APIクライアント取得（初回呼び出し時に生成）"""
+        if self._toorpia_client is None:
+            session_cache = None
+            if self.session_cache_enabled and self.api_key:
+                now = datetime.now()
+                ttl = now - self._parse_interval_to_start_time(self.session_cache_ttl, now)
+                session_cache = SessionKeyCache(
+                    self.api_url, self.api_key, ttl.total_seconds(), logger=self.logger
+                )
+            
+            rate_limiter = None
+            if self.rate_limit_enabled:
+                from ...base.rate_limiter import ToorPIARequestLimiter
+                rate_limiter = ToorPIARequestLimiter(self.api_url, self.rate_limits)
+            
+            from ...base.api_client import create_toorpia_client
+            self._toorpia_client = create_toorpia_client(
+                self.api_url, logger=self.logger, timeout=self.timeout,
+                session_cache=session_cache, auto_refresh=self.auth_auto_refresh,
+                rate_limiter=rate_limiter
+            )
+            for endpoint_type in ('fit_transform', 'addplot'):
+                if self.endpoints.get(endpoint_type):
+                    self._toorpia_client.set_limited_endpoint(self.endpoints[endpoint_type], endpoint_type)
+            self._toorpia_client.set_deadline(self.run_deadline)
+        return self._toorpia_client
+    
+    def _export_metrics(self) -> None:
+        """実行中に使用したAPIクライアントのメトリクスを設備名ラベル付きで出力（失敗しても実行結果に影響させない）"""
+        clients = [client for client in (self._ifhub_client, self._toorpia_client) if client is not None]
+        if not self.metrics_enabled or not clients:
+            return
+        
+        try:
+            from ...base.metrics import PrometheusTextfileExporter
+            exporter = PrometheusTextfileExporter(directory=self.metrics_directory)
+            exporter.export([client.collect_metrics() for client in clients],
+                            extra_labels={"equipment": self.equipment_name})
+        except Exception as e:
+            self.logger.warning(f"Failed to export metrics: {e}")
+    
+    def _get_client_health(self) -> Dict[str, Any]:
+        """実行中に使用したAPIクライアントの統計（応答時間パーセンタイル・リトライ・回路ブレーカー・リクエスト制限の待機時間）"""
+        health = {}
+        if self._ifhub_client is not None:
+            health["ifhub"] = self._ifhub_client.get_health_status()
+        if self._toorpia_client is not None:
+            health["toorpia"] = self._toorpia_client.get_health_status()
+        return health
+    
+    def _fetch_tags_batch(self, tag_names: List[str], start_iso: str, end_iso: str) -> Dict[str, 'TagSeries']:
+        """/api/batch による全タグ一括取得（応答は逐次デコード、取得できなかったタグは個別取得にフォールバック）"""
+        try:
+            batch_data = self._get_ifhub_client().get_batch_series(
+                tag_names, start_iso, end_iso,
+                max_tags=self.batch_max_tags,
+                max_url_length=self.batch_max_url_length
+            )
+        except Exception as e:
+            self.logger.warning(f"Batch fetch failed, falling back to per-tag fetch: {e}")
+            return {}
+        
+        missing = len(tag_names) - len(batch_data)
+        self.logger.info(f"Batch fetched {len(batch_data)}/{len(tag_names)} tags"
+                         + (f", {missing} tags will be fetched individually" if missing else ""))
+        return batch_data
+    
+    def _fetch_tags_concurrent(self, tag_names: List[str], start_iso: str, end_iso: str) -> Dict[str, 'TagSeries']:
+        """タグ個別取得を並列実行（応答は逐次デコード、失敗したタグは警告を出してスキップ）"""
+        self.logger.info(f"Fetching {len(tag_names)} tags individually "
+                         f"(max_concurrency={self.max_concurrency})")
+        
+        results, errors = self._get_ifhub_client().get_tags_series_concurrent(
+            tag_names, start_iso, end_iso
+        )
+        
+        for tag_name, error in errors.items():
+            self.logger.warning(f"Failed to fetch data for tag {tag_name}: {error}")
+        
+        return results
+    
     def _execute_basemap_update(self) -> Dict[str, Any]:
         """basemap更新処理（identna対応版）"""
         try:
             self.logger.info("Executing basemap update (fit_transform)")
             
-            # CSV データ読み込み
-            df = pd.read_csv(self.temp_csv_path)
-            
-            # データクリーニング：Infinity値を除去、NaNを空文字に変換
-            df = df.replace([float('inf'), float('-inf')], pd.NA)
-            df = df.dropna(how='all')  # 全列がNAの行のみ削除
-            df = df.fillna('')  # 残ったNAを空文字に戻す
+            # prepare() で取得したデータを使用
+            # Infinity・NaN はペイロード変換時に空文字として出力（値列はfloat64のまま）
+            df = self.prepared_frame
             
-            if df.empty:
+            # timestamp列は常に値を持つため、全列が欠損の行は存在しない
+            if df is None or df.empty:
                 raise ValueError("No valid data remaining after cleaning - all rows were completely empty")
             
             self.logger.info(f"Data cleaned: {len(df)} rows remaining after removing completely empty rows")
             
-            # API リクエストデータ準備（toorpiaクライアントと同じ形式）
-            columns = df.columns.tolist()
-            data = df.values.tolist()
-            
             # basemap processing設定取得
             basemap_processing = self.config['toorpia_integration'].get('basemap_processing', {})
             parameters = basemap_processing.get('parameters', {})
             
+            # API リクエストデータ準備（toorpiaクライアントと同じ形式、columns・data はエンコード時に付加）
             request_data = {
-                "columns": columns,
-                "data": data,
                 "label": self.equipment_name,
                 "tag": f"{self.equipment_name}_basemap",
                 "description": parameters.get('description', f"{self.equipment_name} baseline analysis"),
@@ -414,12 +909,20 @@ class ToorPIAAnalyzer(BaseAnalyzer):
                 request_data['identna_effective_radius'] = parameters['identna_effective_radius']
             
             # API 呼び出し
-            response = self._call_toorpia_api('fit_transform', request_data)
+            response = self._call_toorpia_api('fit_transform', self._encode_payload(df, request_data))
             
             # 正常領域生成の確認
             if response.get('normalAreaGenerated'):
                 self.logger.info("Normal area file generated successfully")
             
+            # 生成したbasemapを以降のaddplotの対象として記録
+            resdata = response.get('resdata')
+            map_no = resdata.get('mapNo') if isinstance(resdata, dict) else None
+            if map_no is not None:
+                self._save_cached_basemap_no(map_no, source="fit_transform")
+            else:
+                self.logger.warning("No mapNo in fit_transform response, basemap cache not updated")
+            
             self.logger.info("Basemap update completed successfully")
             return response
             
@@ -432,24 +935,20 @@ class ToorPIAAnalyzer(BaseAnalyzer):
         try:
             self.logger.info("Executing addplot update")
             
-            # CSV データ読み込み
-            df = pd.read_csv(self.temp_csv_path)
-            
-            # API リクエストデータ準備
-            columns = df.columns.tolist()
-            data = df.values.tolist()
+            # prepare() で取得したデータを使用
+            df = self.prepared_frame
             
             # addplot processing設定取得
             addplot_processing = self.config['toorpia_integration'].get('addplot_processing', {})
             parameters = addplot_processing.get('parameters', {})
             
-            # 設備名で最新の有効なbasemapを検索
-            map_no = self._get_latest_basemap_no(self.equipment_name)
-            self.logger.info(f"Using basemap {map_no} for addplot processing")
+            # 対象basemap（キャッシュがなければ設備名で最新の有効なbasemapを検索）
+            map_no, from_cache = self._resolve_basemap_no()
+            self.logger.info(f"Using basemap {map_no} for addplot processing"
+                             + (" (cached)" if from_cache else ""))
             
+            # API リクエストデータ準備（columns・data はエンコード時に付加）
             request_data = {
-                "columns": columns,
-                "data": data,
                 "mapNo": map_no,
                 "weight_option_str": parameters.get('weight_option_str', "1:0"),
                 "type_option_str": parameters.get('type_option_str', "1:date")
@@ -466,7 +965,24 @@ class ToorPIAAnalyzer(BaseAnalyzer):
                 request_data['detabn_print_score'] = parameters['detabn_print_score']
             
             # API 呼び出し
-            response = self._call_toorpia_api('addplot', request_data)
+            try:
+                response = self._call_toorpia_api('addplot', self._encode_payload(df, request_data))
+            except APIConnectionError as e:
+                if not from_cache or e.details.get('status_code') not in self.BASEMAP_REJECTED_STATUS:
+                    raise
+                
+                # キャッシュしたbasemapが拒否された（削除済み等）：basemap一覧から再検索して1回だけ再送
+                self.logger.warning(f"Cached basemap {map_no} was rejected "
+                                    f"(HTTP {e.details.get('status_code')}), rescanning basemap list")
+                self._invalidate_cached_basemap_no()
+                rescanned_map_no, _ = self._resolve_basemap_no()
+                if rescanned_map_no == map_no:
+                    raise
+                
+                map_no = rescanned_map_no
+                request_data['mapNo'] = map_no
+                self.logger.info(f"Using basemap {map_no} for addplot processing")
+                response = self._call_toorpia_api('addplot', self._encode_payload(df, request_data))
             
             # 異常度情報の取得とログ出力
             abnormality_status = response.get('abnormalityStatus', 'unknown')
@@ -491,99 +1007,64 @@ class ToorPIAAnalyzer(BaseAnalyzer):
                 raise ProcessingModeError(
                     f"Cannot perform addplot: {str(e)}. Please create a basemap first using basemap_update mode.",
                     specified_mode="addplot_update",
-                    suggested_action="Run basemap_update mode first"
+                    supported_modes=["basemap_update", "addplot_update"]
                 )
             else:
                 self.logger.error(f"Addplot update failed: {e}")
                 raise
     
-    def _call_toorpia_api(self, endpoint_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """toorPIA API呼び出し"""
+    def _encode_payload(self, df: 'pd.DataFrame', fields: Dict[str, Any]) -> bytes:
+        """DataFrameと付加フィールドをリクエスト本文（JSON）に変換"""
+        from ...base.payload_encoder import encode_frame_payload
+        
+        start = time.time()
+        body = encode_frame_payload(df, fields, significant_digits=self.payload_significant_digits)
+        self.logger.info(f"Payload encoded: {len(df)} rows, {len(body)} bytes ({time.time() - start:.2f}s)")
+        return body
+    
+    def _call_toorpia_api(self, endpoint_type: str, body: bytes) -> Dict[str, Any]:
+        """toorPIA API呼び出し
+        
+        Args:
+            endpoint_type: エンドポイント種別（fit_transform / addplot）
+            body: _encode_payload() で生成したJSON本文
+        """
         endpoint = self.endpoints.get(endpoint_type)
         if not endpoint:
             raise ValueError(f"Unknown endpoint type: {endpoint_type}")
         
-        url = f"{self.api_url}{endpoint}"
+        # セッションキー取得（クライアントのセッションヘッダーに設定される）
+        self._get_session_key()
         
-        # セッションキー取得（実装では認証処理）
-        session_key = self._get_session_key()
+        content_encoding = None
+        if self.payload_gzip:
+            from ...base.payload_encoder import compress_payload
+            body = compress_payload(body)
+            content_encoding = 'gzip'
         
-        headers = {
-            'Content-Type': 'application/json',
-            'session-key': session_key
-        }
-        
-        self.logger.info(f"Calling toorPIA API: {endpoint_type} -> {url}")
-        
-        response = requests.post(
-            url,
-            json=data,
-            headers=headers,
-            timeout=self.timeout
-        )
+        self.logger.info(f"Calling toorPIA API: {endpoint_type} -> {self.api_url}{endpoint}")
         
-        if response.status_code == 200:
-            result = response.json()
-            self.logger.info(f"API call successful: {endpoint_type}")
-            return result
-        else:
-            error_msg = f"API call failed: {response.status_code} - {response.text}"
-            self.logger.error(error_msg)
-            raise Exception(error_msg)
+        result = self._get_toorpia_client().post_payload(endpoint, body, content_encoding=content_encoding)
+        self.logger.info(f"API call successful: {endpoint_type}")
+        return result
     
     def _get_session_key(self) -> str:
-        """toorPIA認証セッションキー取得"""
-        auth_config = self.config.get('toorpia_integration', {}).get('auth', {})
-        api_key = auth_config.get('api_key', '')  # 'session_key' から 'api_key' に変更
+        """toorPIA認証セッションキー取得
         
-        if not api_key:
+        取得済みのセッションキー、またはセッションキーキャッシュ（logs/session_cache/）に
+        有効なセッションキーがあれば認証APIを呼び出さずに再利用します。
+        """
+        if not self.api_key:
             raise AuthenticationError(
                 "API key not found in configuration",
-                auth_type="api_key",
-                config_path=self.config_path
+                auth_type="api_key"
             )
         
-        # APIキーを使ってセッションキーを取得（toorpiaクライアントと同じ実装）
-        auth_url = f"{self.api_url}/auth/login"
-        auth_data = {"apiKey": api_key}
-        
-        self.logger.info("Authenticating with toorPIA Backend API")
-        
         try:
-            response = requests.post(
-                auth_url,
-                json=auth_data,
-                headers={'Content-Type': 'application/json'},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                session_key = result.get('sessionKey')
-                if session_key:
-                    self.logger.info("Authentication successful, session key obtained")
-                    return session_key
-                else:
-                    raise AuthenticationError(
-                        "No session key in authentication response",
-                        auth_type="response_format",
-                        response_data=result
-                    )
-            else:
-                error_msg = f"Authentication failed: {response.status_code} - {response.text}"
-                self.logger.error(error_msg)
-                raise AuthenticationError(
-                    error_msg,
-                    auth_type="http_error",
-                    status_code=response.status_code
-                )
-                
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Network error during authentication: {e}")
-            raise APIConnectionError(
-                f"Failed to connect to authentication endpoint: {str(e)}",
-                api_url=auth_url
-            )
+            return self._get_toorpia_client().login(self.api_key)
+        except (AuthenticationError, APIConnectionError) as e:
+            self.logger.error(f"Authentication failed: {e}")
+            raise
     
     def _calculate_time_range(self, update_config: Dict[str, Any]) -> tuple:
         """basemap更新時の時間範囲計算（新しい設定構造に対応）"""
@@ -650,15 +1131,10 @@ class ToorPIAAnalyzer(BaseAnalyzer):
     def _get_equipment_basemaps(self, equipment_name: str) -> List[Dict]:
         """設備名でbasemap一覧を取得"""
         try:
-            session_key = self._get_session_key()
-            url = f"{self.api_url}/maps"
-            headers = {'session-key': session_key}
+            self._get_session_key()
             
             self.logger.info(f"Fetching basemap list for equipment: {equipment_name}")
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            all_maps = response.json()
+            all_maps = self._get_toorpia_client().list_maps()
             
             # 設備名でフィルタ
             equipment_maps = [m for m in all_maps if m.get('label') == equipment_name]
@@ -674,7 +1150,60 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             
         except Exception as e:
             self.logger.error(f"Failed to fetch basemap list: {e}")
-            raise APIConnectionError(f"Failed to retrieve basemap list: {str(e)}")
+            error = APIConnectionError(f"Failed to retrieve basemap list: {str(e)}")
+            error.retry_info = getattr(e, 'retry_info', {})
+            raise error
+    
+    def _resolve_basemap_no(self) -> tuple:
+        """addplot対象basemapのmapNo取得
+        
+        Returns:
+            (mapNo, キャッシュから取得した場合True)
+        """
+        if self.basemap_cache_enabled:
+            map_no = self._load_cached_basemap_no()
+            if map_no is not None:
+                return map_no, True
+        
+        map_no = self._get_latest_basemap_no(self.equipment_name)
+        self._save_cached_basemap_no(map_no, source="maps")
+        return map_no, False
+    
+    def _load_cached_basemap_no(self) -> Optional[int]:
+        """キャッシュしたmapNoの読み込み（未作成・API URL不一致・破損時はNone）"""
+        try:
+            with open(self.basemap_cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read basemap cache {self.basemap_cache_file}: {e}")
+            return None
+        
+        if not isinstance(entry, dict) or entry.get('api_url') != self.api_url:
+            return None
+        return entry.get('mapNo')
+    
+    def _save_cached_basemap_no(self, map_no: int, source: str) -> None:
+        """mapNoのキャッシュ書き込み（一時ファイル経由で置き換え）"""
+        if not self.basemap_cache_enabled:
+            return
+        
+        self._write_json_atomic(self.basemap_cache_file, {
+            "api_url": self.api_url,
+            "mapNo": map_no,
+            "source": source,  # fit_transform: basemap更新時に記録 / maps: basemap一覧から検索
+            "updated_at": datetime.now().isoformat()
+        }, prefix=".basemap.")
+    
+    def _invalidate_cached_basemap_no(self) -> None:
+        """mapNoのキャッシュ破棄"""
+        try:
+            os.remove(self.basemap_cache_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Failed to remove basemap cache {self.basemap_cache_file}: {e}")
     
     def _get_latest_basemap_no(self, equipment_name: str) -> int:
         """設備の最新basemapのmapNoを取得（データ点数確認付き）"""
@@ -706,7 +1235,7 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             "equipment": self.equipment_name,
             "processing_mode": self.processing_mode,
             "api_url": self.api_url,
-            "lock_status": self.lock_manager.is_locked(),
+            "lock_status": self.lock_manager.is_locked(self.processing_mode),
             "temp_files": self.temp_manager.list_temp_files()
         }
     
@@ -791,7 +1320,8 @@ class ToorPIAAnalyzer(BaseAnalyzer):
             "equipment": self.equipment_name,
             "timestamp": self._get_timestamp(),
             "processing_mode": self.processing_mode,
-            "api_response": api_response
+            "api_response": api_response,
+            "api_clients": self._get_client_health()
         }
         
         # addplot_updateの場合は異常度情報を追加
@@ -804,6 +1334,16 @@ class ToorPIAAnalyzer(BaseAnalyzer):
         
         return response
 
+    def _create_skipped_response(self, reason: str) -> Dict[str, Any]:
+        """スキップ応答生成（同一設備・同一モードの実行中に重複して起動された場合）"""
+        return {
+            "status": "skipped",
+            "equipment": self.equipment_name,
+            "timestamp": self._get_timestamp(),
+            "processing_mode": self.processing_mode,
+            "reason": reason
+        }
+    
     def _create_detailed_error_response(self, error: PluginError) -> Dict[str, Any]:
         """詳細エラー応答生成（PluginError対応）"""
         
@@ -826,6 +1366,7 @@ class ToorPIAAnalyzer(BaseAnalyzer):
                 "processing_mode": self.processing_mode,
                 "config_path": self.config_path,
                 "api_url": self.api_url,
-                "temp_files": self.temp_manager.list_temp_files() if hasattr(self, 'temp_manager') else []
+                "temp_files": self.temp_manager.list_temp_files() if hasattr(self, 'temp_manager') else [],
+                "api_clients": self._get_client_health()
             }
         }
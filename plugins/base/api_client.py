@@ -6,20 +6,50 @@ IF-HUB プラグインシステム 強化APIクライアント
 """
 
 import requests
+import numpy as np
 import time
 import logging
-from typing import Dict, Any, Optional, Union, List
-from urllib.parse import urljoin
+import math
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional, Union, List, Tuple, Callable, ContextManager, Generator
+from urllib.parse import urljoin, quote
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from urllib3.exceptions import NewConnectionError
 from contextlib import contextmanager
 
 from .errors import (
     APIConnectionError, AuthenticationError, DataFetchError, 
-    ValidationError, PluginError
+    ValidationError, PluginError, DeadlineExceededError, RequestQueueTimeoutError
 )
 from .retry_manager import RetryManager, create_retry_manager
 from .circuit_breaker import CircuitBreaker, create_service_circuit_breaker
+from .timeseries import TagSeries
+from .stream_decoder import DataPointStreamDecoder, BatchStreamDecoder
+from .session_cache import SessionKeyCache
+from .rate_limiter import ToorPIARequestLimiter
+from .metrics import MetricsRegistry
+
+
+# 再送しても結果が変わらないHTTPメソッド（その他のメソッドはサーバーが処理していない失敗のみリトライ）
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# サーバーがリクエストを処理せずに拒否したことを示すHTTPステータス
+UNPROCESSED_STATUS = (408, 429, 503)
+
+
+def is_unprocessed_failure(exception: Exception) -> bool:
+    """リクエストがサーバーで処理されていない失敗か（接続確立前の失敗・408/429/503）
+    
+    POST 等の非冪等リクエストは、この条件を満たす場合のみリトライします。
+    読み取りタイムアウトや 500 はサーバーが処理済みの可能性があるため再送しません。
+    """
+    if not isinstance(exception, APIConnectionError):
+        return False
+    return (exception.details.get('connect_failed', False)
+            or exception.details.get('status_code') in UNPROCESSED_STATUS)
 
 
 class APIClientConfig:
@@ -33,7 +63,8 @@ class APIClientConfig:
                  pool_maxsize: int = 20,
                  enable_circuit_breaker: bool = True,
                  enable_retry: bool = True,
-                 headers: Optional[Dict[str, str]] = None):
+                 headers: Optional[Dict[str, str]] = None,
+                 share_circuit_breaker: bool = True):
         """
         Args:
             base_url: ベースURL
@@ -44,6 +75,7 @@ class APIClientConfig:
             enable_circuit_breaker: 回路ブレーカー有効化
             enable_retry: リトライ有効化
             headers: デフォルトヘッダー
+            share_circuit_breaker: 回路ブレーカーの状態をプロセス間で共有（logs/circuit_breakers/）
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
@@ -53,6 +85,7 @@ class APIClientConfig:
         self.enable_circuit_breaker = enable_circuit_breaker
         self.enable_retry = enable_retry
         self.headers = headers or {}
+        self.share_circuit_breaker = share_circuit_breaker
 
 
 class APIResponse:
@@ -60,12 +93,20 @@ class APIResponse:
     
     def __init__(self, 
                  response: requests.Response,
-                 request_info: Dict[str, Any]):
+                 request_info: Dict[str, Any],
+                 decode: bool = True):
         self.response = response
         self.request_info = request_info
         self.status_code = response.status_code
         self.headers = dict(response.headers)
         self.elapsed = response.elapsed.total_seconds()
+        # 本文の読み込み後に記録するメトリクス（ストリーミング応答のみ）
+        self.pending_metrics: Optional[Dict[str, Any]] = None
+        
+        # ストリーミング応答は本文を読み込まず、呼び出し側で response から逐次読み込む
+        if not decode:
+            self.data = None
+            return
         
         # JSON解析を試行
         try:
@@ -88,7 +129,54 @@ class APIResponse:
         }
 
 
-class EnhancedAPIClient:
+class APIClientMetrics:
+    """APIクライアントのメトリクス記録（同期・非同期クライアント共通）
+    
+    self.service_name・self.metrics・self.retry_manager・self.circuit_breaker を使用します。
+    """
+    
+    REQUEST_DURATION_METRIC = "ifhub_plugin_api_request_duration_seconds"
+    
+    def _metric_endpoint(self, endpoint: str) -> str:
+        """メトリクスのendpointラベル（パスごとに値が変わるエンドポイントはまとめる）"""
+        return endpoint.split('?', 1)[0]
+    
+    def _record_metrics(self, method: str, endpoint: str, status: str, response_time: float,
+                        request_bytes: Optional[int] = None, response_bytes: Optional[int] = None) -> None:
+        """応答時間・ステータス別件数・転送量を記録"""
+        labels = {"service": self.service_name, "endpoint": self._metric_endpoint(endpoint), "method": method.upper()}
+        self.metrics.observe(self.REQUEST_DURATION_METRIC, labels, response_time)
+        self.metrics.inc("ifhub_plugin_api_requests_total", dict(labels, status=status))
+        
+        if request_bytes is not None:
+            self.metrics.inc("ifhub_plugin_api_request_bytes_total", labels, request_bytes)
+        if response_bytes is not None:
+            self.metrics.inc("ifhub_plugin_api_response_bytes_total", labels, response_bytes)
+    
+    def collect_metrics(self) -> MetricsRegistry:
+        """リトライ回数・回路ブレーカー状態を反映したメトリクス"""
+        labels = {"service": self.service_name}
+        
+        if self.retry_manager:
+            retry_stats = self.retry_manager.get_statistics()
+            self.metrics.set_counter("ifhub_plugin_api_retries_total", labels, retry_stats["total_retries"])
+        
+        if self.circuit_breaker:
+            breaker = self.circuit_breaker.get_metrics()
+            self.metrics.set_gauge("ifhub_plugin_circuit_breaker_open", labels,
+                                   1 if breaker["current_state"] == "OPEN" else 0)
+            self.metrics.set_gauge("ifhub_plugin_circuit_breaker_half_open", labels,
+                                   1 if breaker["current_state"] == "HALF_OPEN" else 0)
+            self.metrics.set_counter("ifhub_plugin_circuit_breaker_rejected_total", labels, breaker["rejected_calls"])
+        
+        return self.metrics
+    
+    def get_latency_summary(self) -> List[Dict[str, Any]]:
+        """エンドポイント別の件数・応答時間パーセンタイル（p50/p95/p99）"""
+        return self.metrics.histogram_summary(self.REQUEST_DURATION_METRIC)
+
+
+class EnhancedAPIClient(APIClientMetrics):
     """強化APIクライアント"""
     
     def __init__(self, 
@@ -114,13 +202,19 @@ class EnhancedAPIClient:
         else:
             self.retry_manager = None
         
-        # 回路ブレーカー設定
+        # 回路ブレーカー設定（接続先ごと。状態は同じ接続先を使う他プロセスと共有）
         if config.enable_circuit_breaker:
-            self.circuit_breaker = create_service_circuit_breaker(service_name)
+            self.circuit_breaker = create_service_circuit_breaker(
+                service_name, scope=config.base_url, shared=config.share_circuit_breaker
+            )
         else:
             self.circuit_breaker = None
         
-        # 統計情報
+        # 全リクエスト共通の期限（time.monotonic() 基準、set_deadline() で設定）
+        self.deadline: Optional[float] = None
+        
+        # 統計情報（並列リクエストから更新されるためロックで保護）
+        self._stats_lock = threading.Lock()
         self.stats = {
             "total_requests": 0,
             "successful_requests": 0,
@@ -128,6 +222,9 @@ class EnhancedAPIClient:
             "total_response_time": 0.0,
             "average_response_time": 0.0
         }
+        
+        # エンドポイント別の応答時間・転送量（PrometheusTextfileExporter で logs/metrics/ に出力）
+        self.metrics = MetricsRegistry()
     
     def _create_session(self) -> requests.Session:
         """HTTPセッション作成"""
@@ -150,17 +247,18 @@ class EnhancedAPIClient:
     
     def _update_stats(self, success: bool, response_time: float):
         """統計情報更新"""
-        self.stats["total_requests"] += 1
-        self.stats["total_response_time"] += response_time
-        
-        if success:
-            self.stats["successful_requests"] += 1
-        else:
-            self.stats["failed_requests"] += 1
-        
-        self.stats["average_response_time"] = (
-            self.stats["total_response_time"] / self.stats["total_requests"]
-        )
+        with self._stats_lock:
+            self.stats["total_requests"] += 1
+            self.stats["total_response_time"] += response_time
+            
+            if success:
+                self.stats["successful_requests"] += 1
+            else:
+                self.stats["failed_requests"] += 1
+            
+            self.stats["average_response_time"] = (
+                self.stats["total_response_time"] / self.stats["total_requests"]
+            )
     
     def _create_request_info(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
         """リクエスト情報作成"""
@@ -184,19 +282,25 @@ class EnhancedAPIClient:
         request_info = self._create_request_info(method, url, **kwargs)
         
         start_time = time.time()
+        response = None
+        status = "error"
+        stream = kwargs.get('stream', False)
+        pending_metrics = None
         
         try:
             # HTTPリクエスト実行
             response = self.session.request(method, url, **kwargs)
             response_time = time.time() - start_time
+            status = str(response.status_code)
             
             self.logger.debug(
                 f"[{self.service_name}] {method} {url} -> "
                 f"{response.status_code} ({response_time:.3f}s)"
             )
             
-            # エラーステータスの場合は例外発生
-            if not (200 <= response.status_code < 300):
+            # エラーステータスの場合は例外発生（条件付きリクエストの 304 Not Modified は正常応答）
+            not_modified = response.status_code == 304 and 'If-None-Match' in (kwargs.get('headers') or {})
+            if not (200 <= response.status_code < 300) and not not_modified:
                 self._update_stats(False, response_time)
                 raise APIConnectionError(
                     f"HTTP {response.status_code}: {response.text}",
@@ -207,23 +311,34 @@ class EnhancedAPIClient:
                 )
             
             self._update_stats(True, response_time)
-            return APIResponse(response, request_info)
+            api_response = APIResponse(response, request_info, decode=not stream)
+            if stream:
+                # 応答時間・受信量は本文を読み終えてから _finish_stream() で記録
+                pending_metrics = {"method": method, "endpoint": endpoint, "status": status,
+                                   "start_time": start_time}
+                api_response.pending_metrics = pending_metrics
+            return api_response
             
         except requests.exceptions.Timeout as e:
             response_time = time.time() - start_time
+            status = "timeout"
             self._update_stats(False, response_time)
             raise APIConnectionError(
                 f"Request timeout after {kwargs.get('timeout', self.config.timeout)}s",
                 api_url=url,
-                timeout=kwargs.get('timeout', self.config.timeout)
+                timeout=kwargs.get('timeout', self.config.timeout),
+                connect_failed=isinstance(e, requests.exceptions.ConnectTimeout)
             )
         
         except requests.exceptions.ConnectionError as e:
             response_time = time.time() - start_time
             self._update_stats(False, response_time)
+            # 接続確立前の失敗（接続拒否・名前解決失敗）はリクエストが送信されていない
+            reason = getattr(e.args[0], 'reason', None) if e.args else None
             raise APIConnectionError(
                 f"Connection error: {str(e)}",
-                api_url=url
+                api_url=url,
+                connect_failed=isinstance(reason, NewConnectionError)
             )
         
         except requests.exceptions.RequestException as e:
@@ -233,71 +348,164 @@ class EnhancedAPIClient:
                 f"Request error: {str(e)}",
                 api_url=url
             )
+        
+        finally:
+            request_bytes = response_bytes = None
+            if response is not None:
+                if isinstance(response.request.body, (bytes, str)):
+                    request_bytes = len(response.request.body)
+                content_length = response.headers.get('Content-Length', '')
+                if content_length.isdigit():
+                    response_bytes = int(content_length)
+                elif not stream:
+                    response_bytes = len(response.content)
+            if pending_metrics is not None:
+                pending_metrics["request_bytes"] = request_bytes
+            else:
+                self._record_metrics(method, endpoint, status, time.time() - start_time,
+                                     request_bytes, response_bytes)
+    
+    def _finish_stream(self, response: APIResponse, received_bytes: int) -> None:
+        """ストリーミング応答の読み込み終了後にメトリクスを記録（応答時間は本文の読み込みを含む）"""
+        pending = response.pending_metrics
+        if pending is None:
+            return
+        response.pending_metrics = None
+        self._record_metrics(pending["method"], pending["endpoint"], pending["status"],
+                             time.time() - pending["start_time"], pending["request_bytes"], received_bytes)
     
-    def _execute_with_protection(self, operation_name: str, operation_func) -> APIResponse:
-        """保護機構付きでAPIコールを実行"""
+    def set_deadline(self, deadline: Optional[float]) -> None:
+        """以降のリクエストの期限を設定（None で解除）
         
-        def protected_operation():
+        Args:
+            deadline: 期限（time.monotonic() 基準）。リトライは期限内に限り、
+                      各リクエストのタイムアウトは期限までの残り時間に制限されます
+        """
+        self.deadline = deadline
+    
+    def _execute_with_protection(self, operation_name: str, operation_func,
+                                 deadline: Optional[float] = None,
+                                 idempotent: bool = True,
+                                 admission: Optional[Callable[[], ContextManager]] = None) -> APIResponse:
+        """保護機構付きでAPIコールを実行
+        
+        Args:
+            operation_name: 操作名（ログ用）
+            operation_func: リクエストを実行する関数（試行ごとに呼び出す）
+            deadline: 期限（time.monotonic() 基準）
+            idempotent: False の場合はサーバーが処理していない失敗のみリトライ
+            admission: 試行ごとに回路ブレーカーの外側で保持する実行枠（リトライの待機中は解放）
+        """
+        
+        def guarded_operation():
+            # 期限切れは接続先の障害ではないため、回路ブレーカーに入る前に判定
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceededError(f"Deadline exceeded before {operation_name}")
             if self.circuit_breaker:
                 with self.circuit_breaker.context():
                     return operation_func()
             else:
                 return operation_func()
         
+        def protected_operation():
+            if admission is None:
+                return guarded_operation()
+            with admission():
+                return guarded_operation()
+        
         if self.retry_manager:
-            with self.retry_manager.retry_context(operation_name):
-                return protected_operation()
+            return self.retry_manager.execute(
+                protected_operation, operation_name, deadline=deadline,
+                retryable=None if idempotent else is_unprocessed_failure
+            )
         else:
             return protected_operation()
     
-    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> APIResponse:
-        """GETリクエスト"""
-        operation_name = f"GET {endpoint}"
+    def _request(self, method: str, endpoint: str, **kwargs) -> APIResponse:
+        """期限・保護機構付きのリクエスト（get/post/put/delete の共通処理）
+        
+        kwargs の deadline（省略時は set_deadline() の値）までの残り時間で
+        試行ごとのタイムアウトを制限します。
+        POST 等の非冪等メソッドは、接続確立前の失敗と 408/429/503 のみリトライします
+        （kwargs の idempotent=True で冪等として扱い、他の失敗もリトライ）。
+        """
+        deadline = kwargs.pop('deadline', self.deadline)
+        timeout = kwargs.pop('timeout', self.config.timeout)
+        idempotent = kwargs.pop('idempotent', method.upper() in IDEMPOTENT_METHODS)
         
         def operation():
-            return self._make_request('GET', endpoint, params=params, **kwargs)
+            request_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceededError(
+                        f"Deadline exceeded before {method} {endpoint}",
+                        api_url=endpoint,
+                        timeout=timeout
+                    )
+                request_timeout = min(timeout, remaining)
+            try:
+                return self._make_request(method, endpoint, timeout=request_timeout, **kwargs)
+            except APIConnectionError as e:
+                # 残り時間に合わせて短縮したタイムアウトで打ち切った場合は期限超過
+                if request_timeout < timeout and e.details.get('status_code') is None \
+                        and time.monotonic() >= deadline:
+                    raise DeadlineExceededError(
+                        f"Deadline exceeded during {method} {endpoint}",
+                        api_url=endpoint,
+                        timeout=request_timeout
+                    ) from e
+                raise
+        
+        def admission():
+            # 実行枠の待機も期限までの残り時間に制限
+            queue_timeout = timeout if deadline is None else max(0.0, min(timeout, deadline - time.monotonic()))
+            return self._admission(method, endpoint, queue_timeout)
+        
+        return self._execute_with_protection(f"{method} {endpoint}", operation, deadline=deadline,
+                                             idempotent=idempotent, admission=admission)
+    
+    @contextmanager
+    def _admission(self, method: str, endpoint: str, timeout: float) -> Generator[float, None, None]:
+        """送信前に取得する実行枠（サブクラスで同時実行数等を制限する場合に上書き）
         
-        return self._execute_with_protection(operation_name, operation)
+        Yields:
+            待機した秒数
+        """
+        yield 0.0
+    
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> APIResponse:
+        """GETリクエスト"""
+        return self._request('GET', endpoint, params=params, **kwargs)
     
     def post(self, endpoint: str, 
              json: Optional[Dict[str, Any]] = None,
              data: Optional[Union[Dict[str, Any], str]] = None,
              **kwargs) -> APIResponse:
         """POSTリクエスト"""
-        operation_name = f"POST {endpoint}"
-        
-        def operation():
-            return self._make_request('POST', endpoint, json=json, data=data, **kwargs)
-        
-        return self._execute_with_protection(operation_name, operation)
+        return self._request('POST', endpoint, json=json, data=data, **kwargs)
     
     def put(self, endpoint: str,
             json: Optional[Dict[str, Any]] = None,
             data: Optional[Union[Dict[str, Any], str]] = None,
             **kwargs) -> APIResponse:
         """PUTリクエスト"""
-        operation_name = f"PUT {endpoint}"
-        
-        def operation():
-            return self._make_request('PUT', endpoint, json=json, data=data, **kwargs)
-        
-        return self._execute_with_protection(operation_name, operation)
+        return self._request('PUT', endpoint, json=json, data=data, **kwargs)
     
     def delete(self, endpoint: str, **kwargs) -> APIResponse:
         """DELETEリクエスト"""
-        operation_name = f"DELETE {endpoint}"
-        
-        def operation():
-            return self._make_request('DELETE', endpoint, **kwargs)
-        
-        return self._execute_with_protection(operation_name, operation)
+        return self._request('DELETE', endpoint, **kwargs)
     
     def get_health_status(self) -> Dict[str, Any]:
         """ヘルスステータス取得"""
+        with self._stats_lock:
+            stats = self.stats.copy()
+        
         status = {
             "service_name": self.service_name,
             "base_url": self.config.base_url,
-            "stats": self.stats.copy()
+            "stats": stats,
+            "latency": self.get_latency_summary()
         }
         
         # 回路ブレーカー情報
@@ -327,19 +535,37 @@ class EnhancedAPIClient:
 class ToorPIAAPIClient(EnhancedAPIClient):
     """toorPIA API専用クライアント"""
     
+    # 認証・basemap一覧取得のタイムアウト（秒）
+    SHORT_REQUEST_TIMEOUT = 30.0
+    
+    # リクエスト制限の種別（ToorPIARequestLimiter.acquire の kind）
+    DEFAULT_LIMITED_ENDPOINTS = {
+        '/auth/login': 'login',
+        '/data/fit_transform': 'fit_transform',
+        '/data/addplot': 'addplot'
+    }
+    
     def __init__(self, 
                  api_url: str,
                  session_key: Optional[str] = None,
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 timeout: float = 300.0,
+                 session_cache: Optional[SessionKeyCache] = None,
+                 auto_refresh: bool = True,
+                 rate_limiter: Optional[ToorPIARequestLimiter] = None):
         """
         Args:
             api_url: toorPIA API URL
             session_key: セッションキー
             logger: ロガー
+            timeout: fit_transform・addplot のタイムアウト（秒）
+            session_cache: プロセス間で共有するセッションキーキャッシュ
+            auto_refresh: login() 後に401を受けた場合、再認証して1回だけ再送する
+            rate_limiter: ホスト全体で共有するリクエスト制限（同時実行数・認証回数）
         """
         config = APIClientConfig(
             base_url=api_url,
-            timeout=300.0,  # toorPIA APIは処理時間が長い
+            timeout=timeout,  # toorPIA APIは処理時間が長い
             headers={
                 'Content-Type': 'application/json',
                 'session-key': session_key or ''
@@ -348,16 +574,107 @@ class ToorPIAAPIClient(EnhancedAPIClient):
         
         super().__init__(config, "toorpia_api", logger)
         self.session_key = session_key
+        self.session_cache = session_cache
+        self.auto_refresh = auto_refresh
+        self._api_key: Optional[str] = None
+        self._session_key_obtained_at: Optional[float] = None
+        
+        # リクエスト制限の対象エンドポイント（パス -> 種別）
+        self.rate_limiter = rate_limiter
+        self.limited_endpoints = dict(self.DEFAULT_LIMITED_ENDPOINTS)
+    
+    def set_limited_endpoint(self, endpoint: str, kind: str) -> None:
+        """設定でエンドポイントのパスを変更した場合の制限対象の登録"""
+        self.limited_endpoints[endpoint] = kind
+    
+    def _make_request(self, method: str, endpoint: str, **kwargs) -> APIResponse:
+        """セッションキー期限切れ（401）時は再認証して1回だけ再送"""
+        try:
+            return super()._make_request(method, endpoint, **kwargs)
+        except APIConnectionError as e:
+            if (e.details.get('status_code') != 401 or not self.auto_refresh
+                    or self._api_key is None or endpoint == '/auth/login'):
+                raise
+        
+        self.logger.warning(f"Session key rejected by {method} {endpoint}, re-authenticating")
+        self._refresh_session()
+        return super()._make_request(method, endpoint, **kwargs)
+    
+    @contextmanager
+    def _admission(self, method: str, endpoint: str, timeout: float) -> Generator[float, None, None]:
+        """リクエスト制限の実行枠を試行ごとに取得（回路ブレーカー・リトライの対象外）
+        
+        Raises:
+            RequestQueueTimeoutError: timeout 秒以内に実行枠を取得できなかった場合
+        """
+        kind = self.limited_endpoints.get(endpoint)
+        if self.rate_limiter is None or kind is None:
+            yield 0.0
+            return
+        
+        acquired = False
+        try:
+            with self.rate_limiter.acquire(kind, timeout) as waited:
+                acquired = True
+                if waited >= 1.0:
+                    self.logger.info(f"Waited {waited:.1f}s for a toorPIA {kind} slot")
+                yield waited
+        except TimeoutError as e:
+            if acquired:
+                raise
+            raise RequestQueueTimeoutError(
+                f"Request queue timeout: {e}",
+                endpoint=endpoint,
+                limit_kind=kind,
+                queue_timeout=timeout
+            )
+    
+    def login(self, api_key: str) -> str:
+        """セッションキー取得（取得済み・キャッシュ済みのセッションキーを再利用）
+        
+        authenticate() と異なり、有効なセッションキーがあれば認証APIを呼び出しません。
+        取得済みのセッションキーがキャッシュの再利用期間を過ぎた場合は、キャッシュから取得し直します。
+        """
+        if self._api_key == api_key and self.session_key and not self._session_key_expired():
+            return self.session_key
+        
+        self._api_key = api_key
+        if self.session_cache is None:
+            return self.authenticate(api_key)
+        
+        session_key = self.session_cache.get_or_create(lambda: self.authenticate(api_key))
+        self.update_session_key(session_key)
+        return session_key
+    
+    def _refresh_session(self) -> str:
+        """拒否されたセッションキーを再認証で置き換え"""
+        if self.session_cache is None:
+            return self.authenticate(self._api_key)
+        
+        session_key = self.session_cache.refresh(
+            self.session_key, lambda: self.authenticate(self._api_key)
+        )
+        self.update_session_key(session_key)
+        return session_key
+    
+    def _session_key_expired(self) -> bool:
+        """取得済みのセッションキーがキャッシュの再利用期間を過ぎたか（キャッシュ未使用時はFalse）"""
+        if self.session_cache is None or self._session_key_obtained_at is None:
+            return False
+        return time.monotonic() - self._session_key_obtained_at >= self.session_cache.ttl_seconds
     
     def update_session_key(self, session_key: str):
         """セッションキー更新"""
         self.session_key = session_key
         self.session.headers['session-key'] = session_key
+        self._session_key_obtained_at = time.monotonic()
     
     def authenticate(self, api_key: str) -> str:
         """認証してセッションキー取得"""
         try:
-            response = self.post('/auth/login', json={"apiKey": api_key})
+            # 認証は再送しても新しいセッションキーが発行されるだけのため冪等として扱う
+            response = self.post('/auth/login', json={"apiKey": api_key},
+                                 timeout=self.SHORT_REQUEST_TIMEOUT, idempotent=True)
             
             if not response.is_success():
                 raise AuthenticationError(
@@ -378,14 +695,60 @@ class ToorPIAAPIClient(EnhancedAPIClient):
             self.logger.info("toorPIA authentication successful")
             return session_key
             
-        except APIConnectionError:
+        except APIConnectionError as e:
+            # 認証拒否（4xx）は接続エラーではなく認証エラーとして扱う
+            status_code = e.details.get('status_code')
+            if status_code is not None and 400 <= status_code < 500:
+                raise AuthenticationError(
+                    f"Authentication failed: {status_code} - {e.details.get('response_text', '')}",
+                    auth_type="http_error",
+                    api_key_provided=bool(api_key)
+                )
+            raise
+        except AuthenticationError:
             raise
         except Exception as e:
-            raise AuthenticationError(
+            error = AuthenticationError(
                 f"Authentication error: {str(e)}",
                 auth_type="api_key",
                 api_key_provided=bool(api_key)
             )
+            error.retry_info = getattr(e, 'retry_info', {})  # 回路ブレーカー遮断等のリトライ経過を引き継ぐ
+            raise error
+    
+    def post_payload(self, endpoint: str, body: bytes,
+                     content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        """エンコード済みJSON本文の送信（fit_transform・addplot の本文を再直列化せずに送る）
+        
+        Args:
+            endpoint: エンドポイント（例: /data/fit_transform）
+            body: JSON本文
+            content_encoding: 圧縮済み本文の場合のContent-Encoding（例: gzip）
+        """
+        headers = {'Content-Encoding': content_encoding} if content_encoding else None
+        response = self.post(endpoint, data=body, headers=headers)
+        
+        if not isinstance(response.data, dict):
+            raise ValidationError(
+                f"Unexpected response from {endpoint}",
+                validation_type="api_response",
+                actual_data=response.to_dict()
+            )
+        
+        return response.data
+    
+    def list_maps(self) -> List[Dict[str, Any]]:
+        """basemap一覧取得（全設備分）"""
+        response = self.get('/maps', timeout=self.SHORT_REQUEST_TIMEOUT)
+        
+        if not isinstance(response.data, list):
+            raise ValidationError(
+                "Unexpected response from /maps",
+                validation_type="api_response",
+                actual_data=response.to_dict()
+            )
+        
+        return response.data
     
     def fit_transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """basemap生成（fit_transform）"""
@@ -412,35 +775,142 @@ class ToorPIAAPIClient(EnhancedAPIClient):
             )
         
         return response.data
+    
+    def get_health_status(self) -> Dict[str, Any]:
+        """ヘルスステータス取得（リクエスト制限の待機時間を含む）"""
+        status = super().get_health_status()
+        if self.rate_limiter is not None:
+            status["rate_limit"] = self.rate_limiter.get_status()
+        return status
+
+
+class IFHubRequestPlanner:
+    """IF-HUB API 取得件数上限への対応（同期・非同期クライアント共通）
+    
+    使用するクラスは max_records_per_request 属性を持つ必要があります。
+    """
+    
+    # サーバー側の1リクエストあたり最大レコード数（config.api.maxRecordsPerRequest の既定値）
+    DEFAULT_MAX_RECORDS_PER_REQUEST = 100000
+    # 時間窓分割時の1窓あたり目標レコード数（上限に対する割合）
+    WINDOW_FILL_RATIO = 0.8
+    
+    def is_truncated(self, points: Union[List[Dict[str, Any]], TagSeries]) -> bool:
+        """取得件数がサーバーの上限に達している（切り詰められた可能性がある）か"""
+        return len(points) >= self.max_records_per_request
+    
+    def plan_time_windows(self,
+                          start_ms: int,
+                          end_ms: int,
+                          rows_per_ms: float) -> List[Tuple[int, int]]:
+        """推定レコード密度から、各窓が上限内に収まるよう期間を分割
+        
+        Args:
+            start_ms: 開始時刻（エポックミリ秒）
+            end_ms: 終了時刻（エポックミリ秒）
+            rows_per_ms: 1ミリ秒あたりの推定レコード数
+        
+        Returns:
+            (開始, 終了) のリスト。窓同士は重ならず、両端を含みます
+        """
+        if end_ms <= start_ms:
+            return [(start_ms, end_ms)]
+        
+        target_rows = self.max_records_per_request * self.WINDOW_FILL_RATIO
+        estimated_rows = rows_per_ms * (end_ms - start_ms + 1)
+        window_count = max(1, math.ceil(estimated_rows / target_rows))
+        window_count = min(window_count, end_ms - start_ms + 1)
+        
+        step = (end_ms - start_ms + 1) / window_count
+        bounds = [start_ms + round(step * i) for i in range(window_count)] + [end_ms + 1]
+        return [(bounds[i], bounds[i + 1] - 1) for i in range(window_count)]
+    
+    @staticmethod
+    def _to_epoch_ms(timestamp: str) -> int:
+        """ISO 8601文字列をエポックミリ秒に変換（タイムゾーン指定なしはローカル時刻）"""
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.astimezone()
+        return round(parsed.timestamp() * 1000)
+    
+    @staticmethod
+    def _from_epoch_ms(epoch_ms: int) -> str:
+        """エポックミリ秒をUTCのISO 8601文字列に変換"""
+        parsed = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
+        return parsed.strftime('%Y-%m-%dT%H:%M:%S.') + f"{epoch_ms % 1000:03d}Z"
 
 
-class IFHubAPIClient(EnhancedAPIClient):
+class IFHubAPIClient(EnhancedAPIClient, IFHubRequestPlanner):
     """IF-HUB API専用クライアント"""
     
+    # /api/batch 1リクエストあたりのタグ数上限
+    BATCH_MAX_TAGS = 50
+    # /api/batch のURL長上限（プロキシ・HTTPサーバーの一般的な制限を考慮）
+    BATCH_MAX_URL_LENGTH = 2000
+    
+    # 並列取得のデフォルト同時実行数
+    DEFAULT_MAX_CONCURRENCY = 8
+    
+    # ストリーミングデコード時の読み込み単位（バイト）
+    STREAM_CHUNK_SIZE = 256 * 1024
+    
     def __init__(self, 
                  api_url: str = "http://localhost:3001",
-                 logger: Optional[logging.Logger] = None):
+                 logger: Optional[logging.Logger] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_records_per_request: Optional[int] = None):
         """
         Args:
             api_url: IF-HUB API URL
             logger: ロガー
+            max_concurrency: 並列取得時の最大同時リクエスト数
+            max_records_per_request: サーバーの maxRecordsPerRequest 設定値（切り詰め検出に使用）
         """
+        self.max_concurrency = max(1, max_concurrency or self.DEFAULT_MAX_CONCURRENCY)
+        self.max_records_per_request = max(1, max_records_per_request or self.DEFAULT_MAX_RECORDS_PER_REQUEST)
+        
         config = APIClientConfig(
             base_url=api_url,
             timeout=60.0,
+            # 並列取得で接続が破棄されないようプールサイズを同時実行数以上に確保
+            pool_maxsize=max(20, self.max_concurrency),
             headers={'Content-Type': 'application/json'}
         )
         
         super().__init__(config, "ifhub_api", logger)
     
+    def _metric_endpoint(self, endpoint: str) -> str:
+        """タグ別データ取得（/api/data/{タグ名}）はタグ名をまとめる"""
+        if endpoint.startswith('/api/data/'):
+            return '/api/data/{tag}'
+        return super()._metric_endpoint(endpoint)
+    
     def get_tags(self, equipment: str, include_gtags: bool = True) -> List[Dict[str, Any]]:
         """設備のタグ一覧取得"""
+        tags, _ = self.get_tags_if_modified(equipment, None, include_gtags=include_gtags)
+        return tags
+    
+    def get_tags_if_modified(self, equipment: str, etag: Optional[str],
+                             include_gtags: bool = True) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """ETag による条件付きのタグ一覧取得
+        
+        Args:
+            equipment: 設備名
+            etag: 前回取得時の ETag（None の場合は常に取得）
+        
+        Returns:
+            (タグ一覧, ETag)。前回から変更がない場合（304）はタグ一覧が None
+        """
         params = {
             "equipment": equipment,
-            "includeGtags": include_gtags
+            "includeGtags": "true" if include_gtags else "false"  # サーバーは文字列 'true' で判定
         }
+        headers = {'If-None-Match': etag} if etag else None
+        
+        response = self.get('/api/tags', params=params, headers=headers)
         
-        response = self.get('/api/tags', params=params)
+        if response.status_code == 304:
+            return None, response.headers.get('ETag', etag)
         
         if not response.is_success():
             raise DataFetchError(
@@ -455,13 +925,30 @@ class IFHubAPIClient(EnhancedAPIClient):
                 equipment_name=equipment
             )
         
-        return tags
+        return tags, response.headers.get('ETag')
     
     def get_tag_data(self, 
                     tag_name: str, 
                     start_time: str, 
-                    end_time: str) -> List[Dict[str, Any]]:
-        """タグデータ取得"""
+                    end_time: str,
+                    concurrent: bool = True) -> List[Dict[str, Any]]:
+        """タグデータ取得
+        
+        サーバーの maxRecordsPerRequest で切り詰められた場合は、残りの期間を
+        時間窓に分割して追加取得し、重複なく連結した全データを返します。
+        
+        Args:
+            concurrent: 切り詰め時の時間窓を並列取得するか（複数タグの並列取得中は False）
+        """
+        points = self._request_tag_data(tag_name, start_time, end_time)
+        
+        if self.is_truncated(points):
+            points = self.complete_truncated(tag_name, points, end_time, concurrent=concurrent)
+        
+        return points
+    
+    def _request_tag_data(self, tag_name: str, start_time: str, end_time: str) -> List[Dict[str, Any]]:
+        """/api/data/:tagName への単一リクエスト（切り詰めの補完なし）"""
         params = {
             "start": start_time,
             "end": end_time
@@ -477,14 +964,403 @@ class IFHubAPIClient(EnhancedAPIClient):
             )
         
         return response.data.get('data', [])
+    
+    def get_tag_series(self, tag_name: str, start_time: str, end_time: str,
+                       concurrent: bool = True) -> TagSeries:
+        """タグデータを時系列配列として取得（応答本文を逐次デコード）
+        
+        get_tag_data() と同じデータを、データポイントごとの辞書を生成せずに
+        (int64エポック, float64値) の配列として返します。
+        """
+        series = self._request_tag_series(tag_name, start_time, end_time)
+        
+        if self.is_truncated(series):
+            series = self.complete_truncated_series(tag_name, series, end_time, concurrent=concurrent)
+        
+        return series
+    
+    def _request_tag_series(self, tag_name: str, start_time: str, end_time: str) -> TagSeries:
+        """/api/data/:tagName への単一リクエスト（ストリーミングデコード）"""
+        params = {
+            "start": start_time,
+            "end": end_time
+        }
+        
+        response = self.get(f'/api/data/{tag_name}', params=params, stream=True)
+        
+        received_bytes = 0
+        try:
+            decoder = DataPointStreamDecoder()
+            for chunk in response.response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE):
+                received_bytes += len(chunk)
+                decoder.feed(chunk)
+            return decoder.close()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise DataFetchError(
+                f"Failed to decode data for tag {tag_name}: {e}",
+                tag_names=[tag_name],
+                time_range={"start": start_time, "end": end_time}
+            )
+        finally:
+            response.response.close()
+            self._finish_stream(response, received_bytes)
+    
+    def complete_truncated(self,
+                           tag_name: str,
+                           points: List[Dict[str, Any]],
+                           end_time: str,
+                           concurrent: bool = True) -> List[Dict[str, Any]]:
+        """切り詰められた取得結果の残り期間を時間窓に分割して取得し連結
+        
+        サーバーは時刻昇順で上限件数まで返すため、最終レコードの時刻以降を
+        取得済みデータの密度から見積もった時間窓で取得します。
+        窓内でさらに切り詰められた場合は、その窓の密度で再分割します。
+        
+        Args:
+            tag_name: タグ名
+            points: 切り詰められた取得結果（時刻昇順）
+            end_time: 元の取得期間の終了時刻
+            concurrent: 時間窓を並列取得するか
+        
+        Returns:
+            時刻の重複を除いた全データポイント
+        """
+        last_ms = self._to_epoch_ms(points[-1]['timestamp'])
+        window_points = self._fetch_remaining_windows(
+            tag_name, len(points), self._to_epoch_ms(points[0]['timestamp']), last_ms,
+            end_time, self._fetch_window, concurrent
+        )
+        
+        # 窓は時刻順・重複なしだが、取得済みデータとの境界（最終レコード時刻）は重複し得る
+        result = list(points)
+        seen_until = last_ms
+        for chunk in window_points:
+            skip = 0
+            while skip < len(chunk) and self._to_epoch_ms(chunk[skip]['timestamp']) <= seen_until:
+                skip += 1
+            if skip < len(chunk):
+                result.extend(chunk[skip:])
+                seen_until = self._to_epoch_ms(chunk[-1]['timestamp'])
+        
+        return result
+    
+    def complete_truncated_series(self,
+                                  tag_name: str,
+                                  series: TagSeries,
+                                  end_time: str,
+                                  concurrent: bool = True) -> TagSeries:
+        """complete_truncated() の時系列配列版"""
+        first_ms = int(series.epochs[0] // 1_000_000)
+        last_ms = int(series.epochs[-1] // 1_000_000)
+        window_series = self._fetch_remaining_windows(
+            tag_name, len(series), first_ms, last_ms,
+            end_time, self._fetch_series_window, concurrent
+        )
+        
+        epochs = [series.epochs]
+        values = [series.values]
+        seen_until = series.epochs[-1]
+        for chunk in window_series:
+            keep = chunk.epochs > seen_until
+            if keep.any():
+                epochs.append(chunk.epochs[keep])
+                values.append(chunk.values[keep])
+                seen_until = chunk.epochs[keep][-1]
+        
+        return TagSeries(np.concatenate(epochs), np.concatenate(values))
+    
+    def _fetch_remaining_windows(self, tag_name: str, count: int, first_ms: int, last_ms: int,
+                                 end_time: str, fetch_window, concurrent: bool) -> List[Any]:
+        """最終レコード時刻から終了時刻までを時間窓に分割して取得
+        
+        Returns:
+            時間窓ごとの取得結果（時刻順）。残り期間がない場合は空リスト
+        """
+        end_ms = self._to_epoch_ms(end_time)
+        if last_ms >= end_ms:
+            return []
+        
+        rows_per_ms = count / max(1, last_ms - first_ms + 1)
+        windows = self.plan_time_windows(last_ms, end_ms, rows_per_ms)
+        
+        self.logger.info(
+            f"Tag {tag_name}: response truncated at {count} records, "
+            f"fetching remaining range in {len(windows)} windows"
+        )
+        
+        if concurrent and len(windows) > 1:
+            workers = max(1, min(self.max_concurrency, len(windows)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ifhub-window") as executor:
+                return list(executor.map(lambda window: fetch_window(tag_name, *window), windows))
+        
+        return [fetch_window(tag_name, *window) for window in windows]
+    
+    def _fetch_window(self, tag_name: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        """1時間窓分の取得（窓内で切り詰められた場合は逐次再分割）"""
+        end_time = self._from_epoch_ms(end_ms)
+        points = self._request_tag_data(tag_name, self._from_epoch_ms(start_ms), end_time)
+        
+        if self.is_truncated(points):
+            points = self.complete_truncated(tag_name, points, end_time, concurrent=False)
+        
+        return points
+    
+    def _fetch_series_window(self, tag_name: str, start_ms: int, end_ms: int) -> TagSeries:
+        """1時間窓分の取得（時系列配列版）"""
+        end_time = self._from_epoch_ms(end_ms)
+        series = self._request_tag_series(tag_name, self._from_epoch_ms(start_ms), end_time)
+        
+        if self.is_truncated(series):
+            series = self.complete_truncated_series(tag_name, series, end_time, concurrent=False)
+        
+        return series
+    
+    def get_tags_data_concurrent(self,
+                                 tag_names: List[str],
+                                 start_time: str,
+                                 end_time: str,
+                                 max_workers: Optional[int] = None
+                                 ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Exception]]:
+        """複数タグのデータをスレッドプールで並列取得
+        
+        各タグの get_tag_data は共有セッション（接続プール）上で実行されます。
+        1タグの失敗は他タグの取得を中断せず、エラーとして個別に返されます。
+        
+        Args:
+            tag_names: タグ名リスト
+            start_time: 開始時刻（ISO形式）
+            end_time: 終了時刻（ISO形式）
+            max_workers: 最大同時実行数（省略時は max_concurrency）
+        
+        Returns:
+            (タグ名 -> データポイントリスト, タグ名 -> 例外) のタプル
+        """
+        return self._run_concurrent(self.get_tag_data, tag_names, start_time, end_time, max_workers)
+    
+    def get_tags_series_concurrent(self,
+                                   tag_names: List[str],
+                                   start_time: str,
+                                   end_time: str,
+                                   max_workers: Optional[int] = None
+                                   ) -> Tuple[Dict[str, TagSeries], Dict[str, Exception]]:
+        """get_tags_data_concurrent() の時系列配列版（各タグを get_tag_series で取得）"""
+        return self._run_concurrent(self.get_tag_series, tag_names, start_time, end_time, max_workers)
+    
+    def _run_concurrent(self, fetch_func, tag_names: List[str], start_time: str, end_time: str,
+                        max_workers: Optional[int]) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """タグごとの取得関数をスレッドプールで並列実行
+        
+        同時リクエスト数を workers に抑えるため、複数ワーカーで実行する場合は
+        切り詰め時の時間窓をワーカー内で逐次取得します（スレッドプールを入れ子にしない）。
+        """
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        
+        if not tag_names:
+            return results, errors
+        
+        workers = max(1, min(max_workers or self.max_concurrency, len(tag_names)))
+        concurrent_windows = workers == 1
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ifhub-fetch") as executor:
+            futures = {
+                executor.submit(fetch_func, tag_name, start_time, end_time, concurrent=concurrent_windows): tag_name
+                for tag_name in tag_names
+            }
+            
+            for future in as_completed(futures):
+                tag_name = futures[future]
+                try:
+                    results[tag_name] = future.result()
+                except Exception as e:
+                    errors[tag_name] = e
+        
+        self.logger.debug(
+            f"Concurrent fetch: {len(results)}/{len(tag_names)} tags succeeded "
+            f"(workers={workers})"
+        )
+        
+        return results, errors
+    
+    def split_tag_batches(self,
+                          tag_names: List[str],
+                          max_tags: Optional[int] = None,
+                          max_url_length: Optional[int] = None,
+                          reserved_length: int = 0) -> List[List[str]]:
+        """タグ名をURL長制限内に収まるグループに分割
+        
+        Args:
+            tag_names: タグ名リスト
+            max_tags: 1グループあたりの最大タグ数
+            max_url_length: URL長上限
+            reserved_length: tags以外のクエリパラメータ分の予約長
+        
+        Returns:
+            タグ名グループのリスト
+        """
+        max_tags = max_tags or self.BATCH_MAX_TAGS
+        max_url_length = max_url_length or self.BATCH_MAX_URL_LENGTH
+        
+        # ベースURL + '/api/batch?tags=' + 他パラメータ分
+        base_length = len(self.config.base_url) + len('/api/batch?tags=') + reserved_length
+        
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_length = base_length
+        
+        for tag_name in tag_names:
+            # カンマはURLエンコードで '%2C'（3文字）になる
+            encoded_length = len(quote(tag_name, safe='')) + (3 if current else 0)
+            
+            if current and (len(current) >= max_tags or
+                            current_length + encoded_length > max_url_length):
+                batches.append(current)
+                current = []
+                current_length = base_length
+                encoded_length = len(quote(tag_name, safe=''))
+            
+            current.append(tag_name)
+            current_length += encoded_length
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def get_batch_data(self,
+                       tag_names: List[str],
+                       start_time: str,
+                       end_time: str,
+                       max_tags: Optional[int] = None,
+                       max_url_length: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """/api/batch による複数タグデータ一括取得
+        
+        タグはURL長制限内のグループに分割して取得します。取得に失敗した
+        グループのタグは結果に含まれないため、呼び出し側で個別取得に
+        フォールバックできます。
+        
+        Args:
+            tag_names: タグ名リスト（通常タグ・gtag混在可）
+            start_time: 開始時刻（ISO形式）
+            end_time: 終了時刻（ISO形式）
+            max_tags: 1リクエストあたりの最大タグ数
+            max_url_length: URL長上限
+        
+        Returns:
+            タグ名 -> データポイントリストの辞書
+        """
+        result = self._run_batches(self._request_batch_data, tag_names, start_time, end_time,
+                                   max_tags, max_url_length)
+        return self._complete_truncated_batch(self.complete_truncated, result, end_time)
+    
+    def get_batch_series(self,
+                         tag_names: List[str],
+                         start_time: str,
+                         end_time: str,
+                         max_tags: Optional[int] = None,
+                         max_url_length: Optional[int] = None) -> Dict[str, TagSeries]:
+        """get_batch_data() の時系列配列版（応答本文を逐次デコード）"""
+        result = self._run_batches(self._request_batch_series, tag_names, start_time, end_time,
+                                   max_tags, max_url_length)
+        return self._complete_truncated_batch(self.complete_truncated_series, result, end_time)
+    
+    def _run_batches(self, fetch_batch, tag_names: List[str], start_time: str, end_time: str,
+                     max_tags: Optional[int], max_url_length: Optional[int]) -> Dict[str, Any]:
+        """URL長制限内のグループごとに /api/batch を呼び出し（失敗したグループは結果に含めない）"""
+        params_length = len(f"&start={quote(start_time, safe='')}&end={quote(end_time, safe='')}")
+        batches = self.split_tag_batches(tag_names, max_tags, max_url_length, params_length)
+        
+        result: Dict[str, Any] = {}
+        
+        for i, batch in enumerate(batches):
+            try:
+                batch_result = fetch_batch(batch, start_time, end_time)
+            except Exception as e:
+                self.logger.warning(
+                    f"Batch fetch failed for group {i + 1}/{len(batches)} "
+                    f"({len(batch)} tags): {e}"
+                )
+                continue
+            
+            result.update((tag_name, batch_result[tag_name]) for tag_name in batch if tag_name in batch_result)
+            
+            self.logger.debug(
+                f"Batch group {i + 1}/{len(batches)}: "
+                f"{len(batch)} tags requested, {sum(1 for t in batch if t in result)} returned"
+            )
+        
+        return result
+    
+    def _request_batch_data(self, batch: List[str], start_time: str, end_time: str) -> Dict[str, List[Dict[str, Any]]]:
+        """/api/batch への単一リクエスト"""
+        params = {
+            "tags": ','.join(batch),
+            "start": start_time,
+            "end": end_time
+        }
+        
+        response = self.get('/api/batch', params=params)
+        
+        batch_data = response.data if isinstance(response.data, dict) else {}
+        return {
+            tag_name: tag_result.get('data', [])
+            for tag_name, tag_result in batch_data.items()
+            if isinstance(tag_result, dict)
+        }
+    
+    def _request_batch_series(self, batch: List[str], start_time: str, end_time: str) -> Dict[str, TagSeries]:
+        """/api/batch への単一リクエスト（ストリーミングデコード）"""
+        params = {
+            "tags": ','.join(batch),
+            "start": start_time,
+            "end": end_time
+        }
+        
+        response = self.get('/api/batch', params=params, stream=True)
+        
+        received_bytes = 0
+        try:
+            decoder = BatchStreamDecoder()
+            for chunk in response.response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE):
+                received_bytes += len(chunk)
+                decoder.feed(chunk)
+            return decoder.close()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise DataFetchError(
+                f"Failed to decode batch data: {e}",
+                tag_names=batch,
+                time_range={"start": start_time, "end": end_time}
+            )
+        finally:
+            response.response.close()
+            self._finish_stream(response, received_bytes)
+    
+    def _complete_truncated_batch(self, complete, result: Dict[str, Any], end_time: str) -> Dict[str, Any]:
+        """上限件数で切り詰められたタグは残り期間を時間窓に分割して補完（失敗したタグは結果から除外）"""
+        truncated = [tag_name for tag_name, points in result.items() if self.is_truncated(points)]
+        for tag_name in truncated:
+            try:
+                result[tag_name] = complete(tag_name, result[tag_name], end_time)
+            except Exception as e:
+                self.logger.warning(f"Failed to complete truncated batch data for tag {tag_name}: {e}")
+                del result[tag_name]
+        
+        return result
 
 
 # ファクトリー関数
 def create_toorpia_client(api_url: str, 
                          api_key: Optional[str] = None,
-                         logger: Optional[logging.Logger] = None) -> ToorPIAAPIClient:
+                         logger: Optional[logging.Logger] = None,
+                         timeout: Optional[float] = None,
+                         session_cache: Optional[SessionKeyCache] = None,
+                         auto_refresh: bool = True,
+                         rate_limiter: Optional[ToorPIARequestLimiter] = None) -> ToorPIAAPIClient:
     """toorPIA APIクライアント作成"""
-    client = ToorPIAAPIClient(api_url, logger=logger)
+    options = {'session_cache': session_cache, 'auto_refresh': auto_refresh, 'rate_limiter': rate_limiter}
+    if timeout is not None:
+        options['timeout'] = timeout
+    client = ToorPIAAPIClient(api_url, logger=logger, **options)
     
     if api_key:
         client.authenticate(api_key)
@@ -493,6 +1369,9 @@ def create_toorpia_client(api_url: str,
 
 
 def create_ifhub_client(api_url: str = "http://localhost:3001",
-                       logger: Optional[logging.Logger] = None) -> IFHubAPIClient:
+                       logger: Optional[logging.Logger] = None,
+                       max_concurrency: Optional[int] = None,
+                       max_records_per_request: Optional[int] = None) -> IFHubAPIClient:
     """IF-HUB APIクライアント作成"""
-    return IFHubAPIClient(api_url, logger)
+    return IFHubAPIClient(api_url, logger, max_concurrency=max_concurrency,
+                          max_records_per_request=max_records_per_request)
@@ -0,0 +1,711 @@
+"""
+IF-HUB プラグインシステム 非同期APIクライアント
+
+EnhancedAPIClient・ToorPIAAPIClient・IFHubAPIClient の asyncio 版です。
+1つのイベントループ上で多数の設備のリクエストを並行実行でき、
+実行中のリクエストごとにスレッドを必要としません。
+
+接続プール（aiohttp.ClientSession）は create_client_session() で作成して
+複数のクライアントで共有できます。ホストごとの同時接続数は
+コネクターの limit_per_host で制限されます。
+
+リトライ（RetryManager.execute_async）と回路ブレーカー（接続先単位）は
+同期クライアントと同じ設定・状態を使用します。
+
+aiohttp は任意依存です（未インストール時はクライアント生成時に ImportError）。
+"""
+
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Union, List, Tuple
+from urllib.parse import urljoin
+
+try:
+    import aiohttp
+except ImportError:  # 任意依存：非同期クライアントを使用する場合のみ必要
+    aiohttp = None
+
+from .errors import (
+    APIConnectionError, AuthenticationError, DataFetchError, ValidationError, DeadlineExceededError
+)
+from .retry_manager import create_retry_manager
+from .circuit_breaker import create_service_circuit_breaker
+from .api_client import (
+    APIClientConfig, APIClientMetrics, IFHubRequestPlanner, IDEMPOTENT_METHODS, is_unprocessed_failure
+)
+from .metrics import MetricsRegistry
+from .session_cache import SessionKeyCache
+
+
+# 共有接続プールの既定値
+DEFAULT_POOL_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 20
+
+
+def _require_aiohttp() -> None:
+    if aiohttp is None:
+        raise ImportError("aiohttp is required for the asyncio API clients (pip install aiohttp)")
+
+
+def create_client_session(limit: int = DEFAULT_POOL_LIMIT,
+                          limit_per_host: int = DEFAULT_LIMIT_PER_HOST) -> 'aiohttp.ClientSession':
+    """クライアント間で共有する接続プールを作成（イベントループ内で呼び出す）
+    
+    Args:
+        limit: 全体の最大同時接続数
+        limit_per_host: ホストごとの最大同時接続数
+    """
+    _require_aiohttp()
+    connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class AsyncAPIResponse:
+    """非同期API応答（APIResponse と同じ属性を持ち、本文は読み込み済み）"""
+    
+    def __init__(self,
+                 status_code: int,
+                 headers: Dict[str, str],
+                 body: bytes,
+                 elapsed: float,
+                 request_info: Dict[str, Any]):
+        self.status_code = status_code
+        self.headers = headers
+        self.elapsed = elapsed
+        self.request_info = request_info
+        
+        # JSON解析を試行
+        try:
+            self.data = json.loads(body)
+        except ValueError:
+            self.data = body.decode('utf-8', errors='replace')
+    
+    def is_success(self) -> bool:
+        """成功判定"""
+        return 200 <= self.status_code < 300
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式で返す"""
+        return {
+            "status_code": self.status_code,
+            "data": self.data,
+            "headers": self.headers,
+            "elapsed_seconds": self.elapsed,
+            "request_info": self.request_info
+        }
+
+
+class AsyncEnhancedAPIClient(APIClientMetrics):
+    """非同期強化APIクライアント"""
+    
+    def __init__(self,
+                 config: APIClientConfig,
+                 service_name: str = "api_client",
+                 logger: Optional[logging.Logger] = None,
+                 session: Optional['aiohttp.ClientSession'] = None):
+        """
+        Args:
+            config: API設定（pool_maxsize は専用の接続プールを作成する場合の最大同時接続数）
+            service_name: サービス名（回路ブレーカーは同じ接続先の同期クライアントと共有）
+            logger: ロガー
+            session: 共有する接続プール（省略時は初回リクエストで専用のプールを作成）
+        """
+        _require_aiohttp()
+        
+        self.config = config
+        self.service_name = service_name
+        self.logger = logger or logging.getLogger(__name__)
+        
+        # 共有プール使用時もクライアント固有のヘッダーを送れるよう、ヘッダーはリクエストごとに付与
+        self.headers: Dict[str, str] = dict(config.headers)
+        self._session = session
+        self._owns_session = session is None
+        
+        self.retry_manager = create_retry_manager("api_call", self.logger) if config.enable_retry else None
+        self.circuit_breaker = (
+            create_service_circuit_breaker(service_name, scope=config.base_url,
+                                           shared=config.share_circuit_breaker)
+            if config.enable_circuit_breaker else None
+        )
+        
+        # 全リクエスト共通の期限（time.monotonic() 基準、set_deadline() で設定）
+        self.deadline: Optional[float] = None
+        
+        # 統計情報（単一のイベントループから更新されるためロック不要）
+        self.stats = {
+            "total_requests": 0,
+            "successful_requests": 0,
+            "failed_requests": 0,
+            "total_response_time": 0.0,
+            "average_response_time": 0.0
+        }
+        
+        # エンドポイント別の応答時間・転送量（EnhancedAPIClient と同じメトリクス）
+        self.metrics = MetricsRegistry()
+    
+    async def __aenter__(self) -> 'AsyncEnhancedAPIClient':
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.config.pool_maxsize,
+                                             limit_per_host=self.config.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+    
+    def _update_stats(self, success: bool, response_time: float):
+        """統計情報更新"""
+        self.stats["total_requests"] += 1
+        self.stats["total_response_time"] += response_time
+        
+        if success:
+            self.stats["successful_requests"] += 1
+        else:
+            self.stats["failed_requests"] += 1
+        
+        self.stats["average_response_time"] = (
+            self.stats["total_response_time"] / self.stats["total_requests"]
+        )
+    
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> AsyncAPIResponse:
+        """実際のHTTPリクエスト実行（本文を読み込んで返す）"""
+        url = urljoin(self.config.base_url + '/', endpoint.lstrip('/'))
+        
+        timeout = kwargs.pop('timeout', self.config.timeout)
+        headers = dict(self.headers)
+        headers.update(kwargs.pop('headers', None) or {})
+        
+        # リクエスト情報
+        request_info = {
+            "method": method.upper(),
+            "url": url,
+            "service_name": self.service_name,
+            "timestamp": time.time(),
+            "timeout": timeout,
+            "has_data": kwargs.get('json') is not None or kwargs.get('data') is not None
+        }
+        
+        start_time = time.time()
+        data = kwargs.get('data')
+        request_bytes = len(data) if isinstance(data, (bytes, str)) else None
+        
+        try:
+            async with self._get_session().request(
+                method, url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+            ) as response:
+                body = await response.read()
+                status_code = response.status
+                response_headers = dict(response.headers)
+        
+        except asyncio.TimeoutError:
+            self._update_stats(False, time.time() - start_time)
+            self._record_metrics(method, endpoint, "timeout", time.time() - start_time, request_bytes)
+            raise APIConnectionError(
+                f"Request timeout after {timeout}s",
+                api_url=url,
+                timeout=timeout
+            )
+        
+        except aiohttp.ClientConnectionError as e:
+            self._update_stats(False, time.time() - start_time)
+            self._record_metrics(method, endpoint, "error", time.time() - start_time, request_bytes)
+            raise APIConnectionError(
+                f"Connection error: {str(e)}",
+                api_url=url,
+                connect_failed=isinstance(e, aiohttp.ClientConnectorError)  # 接続確立前の失敗
+            )
+        
+        except aiohttp.ClientError as e:
+            self._update_stats(False, time.time() - start_time)
+            self._record_metrics(method, endpoint, "error", time.time() - start_time, request_bytes)
+            raise APIConnectionError(
+                f"Request error: {str(e)}",
+                api_url=url
+            )
+        
+        response_time = time.time() - start_time
+        self.logger.debug(
+            f"[{self.service_name}] {method} {url} -> {status_code} ({response_time:.3f}s)"
+        )
+        self._record_metrics(method, endpoint, str(status_code), response_time, request_bytes, len(body))
+        
+        # エラーステータスの場合は例外発生
+        if not (200 <= status_code < 300):
+            self._update_stats(False, response_time)
+            text = body.decode('utf-8', errors='replace')
+            raise APIConnectionError(
+                f"HTTP {status_code}: {text}",
+                api_url=url,
+                status_code=status_code,
+                response_text=text[:500],  # レスポンステキストを制限
+                timeout=timeout
+            )
+        
+        self._update_stats(True, response_time)
+        return AsyncAPIResponse(status_code, response_headers, body, response_time, request_info)
+    
+    def set_deadline(self, deadline: Optional[float]) -> None:
+        """以降のリクエストの期限を設定（None で解除、EnhancedAPIClient.set_deadline と同じ）"""
+        self.deadline = deadline
+    
+    async def _request(self, method: str, endpoint: str, **kwargs) -> AsyncAPIResponse:
+        """期限・保護機構付きのリクエスト（get/post/put/delete の共通処理）"""
+        deadline = kwargs.pop('deadline', self.deadline)
+        timeout = kwargs.pop('timeout', self.config.timeout)
+        idempotent = kwargs.pop('idempotent', method.upper() in IDEMPOTENT_METHODS)
+        
+        async def operation():
+            request_timeout = timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceededError(
+                        f"Deadline exceeded before {method} {endpoint}",
+                        api_url=endpoint,
+                        timeout=timeout
+                    )
+                request_timeout = min(timeout, remaining)
+            try:
+                return await self._make_request(method, endpoint, timeout=request_timeout, **kwargs)
+            except APIConnectionError as e:
+                # 残り時間に合わせて短縮したタイムアウトで打ち切った場合は期限超過
+                if request_timeout < timeout and e.details.get('status_code') is None \
+                        and time.monotonic() >= deadline:
+                    raise DeadlineExceededError(
+                        f"Deadline exceeded during {method} {endpoint}",
+                        api_url=endpoint,
+                        timeout=request_timeout
+                    ) from e
+                raise
+        
+        async def protected_operation():
+            # 期限切れは接続先の障害ではないため、回路ブレーカーに入る前に判定
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceededError(f"Deadline exceeded before {method} {endpoint}",
+                                            api_url=endpoint)
+            if self.circuit_breaker:
+                return await self.circuit_breaker.call_async(operation)
+            return await operation()
+        
+        if self.retry_manager:
+            return await self.retry_manager.execute_async(
+                protected_operation, f"{method} {endpoint}", deadline=deadline,
+                retryable=None if idempotent else is_unprocessed_failure
+            )
+        return await protected_operation()
+    
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> AsyncAPIResponse:
+        """GETリクエスト"""
+        return await self._request('GET', endpoint, params=params, **kwargs)
+    
+    async def post(self, endpoint: str,
+                   json: Optional[Dict[str, Any]] = None,
+                   data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+                   **kwargs) -> AsyncAPIResponse:
+        """POSTリクエスト"""
+        return await self._request('POST', endpoint, json=json, data=data, **kwargs)
+    
+    async def put(self, endpoint: str,
+                  json: Optional[Dict[str, Any]] = None,
+                  data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+                  **kwargs) -> AsyncAPIResponse:
+        """PUTリクエスト"""
+        return await self._request('PUT', endpoint, json=json, data=data, **kwargs)
+    
+    async def delete(self, endpoint: str, **kwargs) -> AsyncAPIResponse:
+        """DELETEリクエスト"""
+        return await self._request('DELETE', endpoint, **kwargs)
+    
+    def get_health_status(self) -> Dict[str, Any]:
+        """ヘルスステータス取得"""
+        status = {
+            "service_name": self.service_name,
+            "base_url": self.config.base_url,
+            "stats": self.stats.copy(),
+            "latency": self.get_latency_summary()
+        }
+        
+        if self.circuit_breaker:
+            status["circuit_breaker"] = self.circuit_breaker.get_metrics()
+        
+        if self.retry_manager:
+            status["retry"] = self.retry_manager.get_statistics()
+        
+        return status
+    
+    async def close(self) -> None:
+        """リソースクリーンアップ（共有の接続プールは閉じない）"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+
+class AsyncToorPIAAPIClient(AsyncEnhancedAPIClient):
+    """toorPIA API専用非同期クライアント
+    
+    複数設備で1つのクライアントを共有した場合も、認証は同時に1回だけ行います。
+    """
+    
+    # 認証・basemap一覧取得のタイムアウト（秒）
+    SHORT_REQUEST_TIMEOUT = 30.0
+    
+    def __init__(self,
+                 api_url: str,
+                 session_key: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None,
+                 timeout: float = 300.0,
+                 session_cache: Optional[SessionKeyCache] = None,
+                 auto_refresh: bool = True,
+                 session: Optional['aiohttp.ClientSession'] = None):
+        """
+        Args:
+            api_url: toorPIA API URL
+            session_key: セッションキー
+            logger: ロガー
+            timeout: fit_transform・addplot のタイムアウト（秒）
+            session_cache: プロセス間で共有するセッションキーキャッシュ
+            auto_refresh: login() 後に401を受けた場合、再認証して1回だけ再送する
+            session: 共有する接続プール
+        """
+        config = APIClientConfig(
+            base_url=api_url,
+            timeout=timeout,
+            headers={
+                'Content-Type': 'application/json',
+                'session-key': session_key or ''
+            }
+        )
+        
+        super().__init__(config, "toorpia_api", logger, session=session)
+        self.session_key = session_key
+        self.session_cache = session_cache
+        self.auto_refresh = auto_refresh
+        self._api_key: Optional[str] = None
+        self._session_key_obtained_at: Optional[float] = None
+        self._auth_lock = asyncio.Lock()
+    
+    async def _make_request(self, method: str, endpoint: str, **kwargs) -> AsyncAPIResponse:
+        """セッションキー期限切れ（401）時は再認証して1回だけ再送"""
+        rejected_key = self.session_key
+        try:
+            return await super()._make_request(method, endpoint, **kwargs)
+        except APIConnectionError as e:
+            if (e.details.get('status_code') != 401 or not self.auto_refresh
+                    or self._api_key is None or endpoint == '/auth/login'):
+                raise
+        
+        self.logger.warning(f"Session key rejected by {method} {endpoint}, re-authenticating")
+        await self._refresh_session(rejected_key)
+        return await super()._make_request(method, endpoint, **kwargs)
+    
+    async def login(self, api_key: str) -> str:
+        """セッションキー取得（取得済み・キャッシュ済みのセッションキーを再利用）
+        
+        取得済みのセッションキーがキャッシュの再利用期間を過ぎた場合は、キャッシュから取得し直します。
+        """
+        async with self._auth_lock:
+            if self._api_key == api_key and self.session_key and not self._session_key_expired():
+                return self.session_key
+            
+            self._api_key = api_key
+            session_key = self.session_cache.get() if self.session_cache is not None else None
+            if session_key:
+                self.update_session_key(session_key)
+                return session_key
+            
+            return await self._authenticate_and_store(api_key)
+    
+    async def _refresh_session(self, rejected_key: Optional[str]) -> str:
+        """拒否されたセッションキーを再認証で置き換え（他のタスクが更新済みならそれを使用）"""
+        async with self._auth_lock:
+            if self.session_key and self.session_key != rejected_key:
+                return self.session_key
+            
+            if self.session_cache is not None:
+                cached_key = self.session_cache.get()
+                if cached_key and cached_key != rejected_key:
+                    self.update_session_key(cached_key)
+                    return cached_key
+            
+            return await self._authenticate_and_store(self._api_key)
+    
+    async def _authenticate_and_store(self, api_key: str) -> str:
+        session_key = await self.authenticate(api_key)
+        if self.session_cache is not None:
+            try:
+                self.session_cache.put(session_key)
+            except OSError as e:
+                self.logger.warning(f"Failed to store session key: {e}")
+        return session_key
+    
+    def _session_key_expired(self) -> bool:
+        """取得済みのセッションキーがキャッシュの再利用期間を過ぎたか（キャッシュ未使用時はFalse）"""
+        if self.session_cache is None or self._session_key_obtained_at is None:
+            return False
+        return time.monotonic() - self._session_key_obtained_at >= self.session_cache.ttl_seconds
+    
+    def update_session_key(self, session_key: str):
+        """セッションキー更新"""
+        self.session_key = session_key
+        self.headers['session-key'] = session_key
+        self._session_key_obtained_at = time.monotonic()
+    
+    async def authenticate(self, api_key: str) -> str:
+        """認証してセッションキー取得"""
+        try:
+            response = await self.post('/auth/login', json={"apiKey": api_key},
+                                       timeout=self.SHORT_REQUEST_TIMEOUT, idempotent=True)
+            
+            session_key = response.data.get('sessionKey') if isinstance(response.data, dict) else None
+            if not session_key:
+                raise AuthenticationError(
+                    "No session key in authentication response",
+                    auth_type="api_key",
+                    api_key_provided=bool(api_key)
+                )
+            
+            self.update_session_key(session_key)
+            self.logger.info("toorPIA authentication successful")
+            return session_key
+        
+        except APIConnectionError as e:
+            # 認証拒否（4xx）は接続エラーではなく認証エラーとして扱う
+            status_code = e.details.get('status_code')
+            if status_code is not None and 400 <= status_code < 500:
+                raise AuthenticationError(
+                    f"Authentication failed: {status_code} - {e.details.get('response_text', '')}",
+                    auth_type="http_error",
+                    api_key_provided=bool(api_key)
+                )
+            raise
+        except AuthenticationError:
+            raise
+        except Exception as e:
+            error = AuthenticationError(
+                f"Authentication error: {str(e)}",
+                auth_type="api_key",
+                api_key_provided=bool(api_key)
+            )
+            error.retry_info = getattr(e, 'retry_info', {})
+            raise error
+    
+    async def post_payload(self, endpoint: str, body: bytes,
+                           content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        """エンコード済みJSON本文の送信（ToorPIAAPIClient.post_payload と同じ）"""
+        headers = {'Content-Encoding': content_encoding} if content_encoding else None
+        response = await self.post(endpoint, data=body, headers=headers)
+        
+        if not isinstance(response.data, dict):
+            raise ValidationError(
+                f"Unexpected response from {endpoint}",
+                validation_type="api_response",
+                actual_data=response.to_dict()
+            )
+        
+        return response.data
+    
+    async def list_maps(self) -> List[Dict[str, Any]]:
+        """basemap一覧取得（全設備分）"""
+        response = await self.get('/maps', timeout=self.SHORT_REQUEST_TIMEOUT)
+        
+        if not isinstance(response.data, list):
+            raise ValidationError(
+                "Unexpected response from /maps",
+                validation_type="api_response",
+                actual_data=response.to_dict()
+            )
+        
+        return response.data
+    
+    async def fit_transform(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """basemap生成（fit_transform）"""
+        response = await self.post('/data/fit_transform', json=data)
+        return response.data
+    
+    async def addplot(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """追加プロット"""
+        response = await self.post('/data/addplot', json=data)
+        return response.data
+
+
+class AsyncIFHubAPIClient(AsyncEnhancedAPIClient, IFHubRequestPlanner):
+    """IF-HUB API専用非同期クライアント"""
+    
+    # 複数タグ取得のデフォルト同時実行数
+    DEFAULT_MAX_CONCURRENCY = 8
+    
+    def __init__(self,
+                 api_url: str = "http://localhost:3001",
+                 logger: Optional[logging.Logger] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_records_per_request: Optional[int] = None,
+                 session: Optional['aiohttp.ClientSession'] = None):
+        """
+        Args:
+            api_url: IF-HUB API URL
+            logger: ロガー
+            max_concurrency: 複数タグ取得時の最大同時リクエスト数
+            max_records_per_request: サーバーの maxRecordsPerRequest 設定値（切り詰め検出に使用）
+            session: 共有する接続プール
+        """
+        self.max_concurrency = max(1, max_concurrency or self.DEFAULT_MAX_CONCURRENCY)
+        self.max_records_per_request = max(1, max_records_per_request or self.DEFAULT_MAX_RECORDS_PER_REQUEST)
+        
+        config = APIClientConfig(
+            base_url=api_url,
+            timeout=60.0,
+            pool_maxsize=max(20, self.max_concurrency),
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        super().__init__(config, "ifhub_api", logger, session=session)
+    
+    def _metric_endpoint(self, endpoint: str) -> str:
+        """タグ別データ取得（/api/data/{タグ名}）はタグ名をまとめる"""
+        if endpoint.startswith('/api/data/'):
+            return '/api/data/{tag}'
+        return super()._metric_endpoint(endpoint)
+    
+    async def get_tags(self, equipment: str, include_gtags: bool = True) -> List[Dict[str, Any]]:
+        """設備のタグ一覧取得"""
+        params = {
+            "equipment": equipment,
+            "includeGtags": "true" if include_gtags else "false"  # サーバーは文字列 'true' で判定
+        }
+        
+        response = await self.get('/api/tags', params=params)
+        
+        tags = response.data.get('tags', []) if isinstance(response.data, dict) else []
+        if not tags:
+            raise DataFetchError(
+                f"No tags found for equipment {equipment}",
+                equipment_name=equipment
+            )
+        
+        return tags
+    
+    async def get_tag_data(self,
+                           tag_name: str,
+                           start_time: str,
+                           end_time: str) -> List[Dict[str, Any]]:
+        """タグデータ取得（切り詰められた場合は残りの期間を時間窓に分割して追加取得）"""
+        points = await self._request_tag_data(tag_name, start_time, end_time)
+        
+        if self.is_truncated(points):
+            points = await self._complete_truncated(tag_name, points, end_time)
+        
+        return points
+    
+    async def _request_tag_data(self, tag_name: str, start_time: str, end_time: str) -> List[Dict[str, Any]]:
+        """/api/data/:tagName への単一リクエスト（切り詰めの補完なし）"""
+        params = {
+            "start": start_time,
+            "end": end_time
+        }
+        
+        response = await self.get(f'/api/data/{tag_name}', params=params)
+        
+        if not isinstance(response.data, dict):
+            raise DataFetchError(
+                f"Failed to fetch data for tag {tag_name}",
+                tag_names=[tag_name],
+                time_range={"start": start_time, "end": end_time}
+            )
+        
+        return response.data.get('data', [])
+    
+    async def _complete_truncated(self, tag_name: str, points: List[Dict[str, Any]],
+                                  end_time: str) -> List[Dict[str, Any]]:
+        """IFHubAPIClient.complete_truncated() の非同期版（時間窓は並行取得）"""
+        first_ms = self._to_epoch_ms(points[0]['timestamp'])
+        last_ms = self._to_epoch_ms(points[-1]['timestamp'])
+        end_ms = self._to_epoch_ms(end_time)
+        if last_ms >= end_ms:
+            return points
+        
+        rows_per_ms = len(points) / max(1, last_ms - first_ms + 1)
+        windows = self.plan_time_windows(last_ms, end_ms, rows_per_ms)
+        self.logger.info(
+            f"Tag {tag_name}: response truncated at {len(points)} records, "
+            f"fetching remaining range in {len(windows)} windows"
+        )
+        
+        window_points = await asyncio.gather(*(
+            self._fetch_window(tag_name, window_start, window_end) for window_start, window_end in windows
+        ))
+        
+        # 窓は時刻順・重複なしだが、取得済みデータとの境界（最終レコード時刻）は重複し得る
+        result = list(points)
+        seen_until = last_ms
+        for chunk in window_points:
+            fresh = [point for point in chunk if self._to_epoch_ms(point['timestamp']) > seen_until]
+            if fresh:
+                result.extend(fresh)
+                seen_until = self._to_epoch_ms(fresh[-1]['timestamp'])
+        
+        return result
+    
+    async def _fetch_window(self, tag_name: str, start_ms: int, end_ms: int) -> List[Dict[str, Any]]:
+        """1時間窓分の取得（窓内で切り詰められた場合は再分割）"""
+        end_time = self._from_epoch_ms(end_ms)
+        points = await self._request_tag_data(tag_name, self._from_epoch_ms(start_ms), end_time)
+        
+        if self.is_truncated(points):
+            points = await self._complete_truncated(tag_name, points, end_time)
+        
+        return points
+    
+    async def get_tags_data_concurrent(self,
+                                       tag_names: List[str],
+                                       start_time: str,
+                                       end_time: str,
+                                       max_concurrency: Optional[int] = None
+                                       ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Exception]]:
+        """複数タグのデータを並行取得（IFHubAPIClient.get_tags_data_concurrent と同じ戻り値）"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+        
+        async def fetch(tag_name: str):
+            async with semaphore:
+                return await self.get_tag_data(tag_name, start_time, end_time)
+        
+        outcomes = await asyncio.gather(*(fetch(tag_name) for tag_name in tag_names), return_exceptions=True)
+        
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        errors: Dict[str, Exception] = {}
+        for tag_name, outcome in zip(tag_names, outcomes):
+            if isinstance(outcome, Exception):
+                errors[tag_name] = outcome
+            else:
+                results[tag_name] = outcome
+        
+        return results, errors
+
+
+# ファクトリー関数
+def create_async_toorpia_client(api_url: str,
+                                logger: Optional[logging.Logger] = None,
+                                timeout: Optional[float] = None,
+                                session_cache: Optional[SessionKeyCache] = None,
+                                auto_refresh: bool = True,
+                                session: Optional['aiohttp.ClientSession'] = None) -> AsyncToorPIAAPIClient:
+    """toorPIA API非同期クライアント作成（認証は login() で行う）"""
+    options = {'session_cache': session_cache, 'auto_refresh': auto_refresh, 'session': session}
+    if timeout is not None:
+        options['timeout'] = timeout
+    return AsyncToorPIAAPIClient(api_url, logger=logger, **options)
+
+
+def create_async_ifhub_client(api_url: str = "http://localhost:3001",
+                              logger: Optional[logging.Logger] = None,
+                              max_concurrency: Optional[int] = None,
+                              max_records_per_request: Optional[int] = None,
+                              session: Optional['aiohttp.ClientSession'] = None) -> AsyncIFHubAPIClient:
+    """IF-HUB API非同期クライアント作成"""
+    return AsyncIFHubAPIClient(api_url, logger, max_concurrency=max_concurrency,
+                               max_records_per_request=max_records_per_request, session=session)
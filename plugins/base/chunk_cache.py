@@ -0,0 +1,182 @@
+"""
+IF-HUB プラグインシステム 時系列チャンクキャッシュ
+
+確定済み（過去日）の時系列データを (タグ, UTC日) 単位のチャンクとして
+logs/chunk_cache/ に保存し、basemap更新時の長期間データ取得を差分化します。
+
+チャンクは int64 の 2×N 配列（1行目: エポックナノ秒, 2行目: float64値のビット列）を
+.npy 形式で保存し、読み込み時はメモリマップで必要な範囲のみ参照します。
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from .timeseries import TagSeries
+
+
+DAY_NS = 86400 * 1_000_000_000
+
+
+class ChunkCache:
+    """(タグ, 日) 単位の時系列チャンクキャッシュ（サイズ上限付きLRU）
+    
+    最終参照時刻はファイルの更新時刻で管理し、サイズ上限を超えた場合は
+    参照の古いチャンクから削除します。
+    """
+    
+    def __init__(self, namespace: str, max_size_bytes: int,
+                 cache_dir: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            namespace: キャッシュの名前空間（IF-HUBのURLなど、データ取得元を区別する文字列）
+            max_size_bytes: キャッシュ全体のサイズ上限（バイト）
+            cache_dir: キャッシュディレクトリ（デフォルト: logs/chunk_cache）
+            logger: ロガー
+        """
+        self.max_size_bytes = int(max_size_bytes)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        self.root_dir = Path(cache_dir or Path("logs") / "chunk_cache")
+        namespace_key = hashlib.sha1(namespace.encode('utf-8')).hexdigest()[:12]
+        self.cache_dir = self.root_dir / namespace_key
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def day_starts(start_ns: int, end_ns: int) -> List[int]:
+        """期間 [start_ns, end_ns] と重なるUTC日の開始時刻（エポックナノ秒）一覧"""
+        if end_ns < start_ns:
+            return []
+        first = start_ns - start_ns % DAY_NS
+        return list(range(first, end_ns + 1, DAY_NS))
+    
+    @staticmethod
+    def day_label(day_start_ns: int) -> str:
+        """日の開始時刻を YYYY-MM-DD 形式に変換"""
+        return str(np.datetime64(int(day_start_ns), 'ns').astype('datetime64[D]'))
+    
+    def chunk_path(self, tag_name: str, day_start_ns: int) -> Path:
+        """チャンクファイルパス"""
+        return self.cache_dir / quote(tag_name, safe='') / f"{self.day_label(day_start_ns)}.npy"
+    
+    def has(self, tag_name: str, day_start_ns: int) -> bool:
+        """チャンクの有無"""
+        return self.chunk_path(tag_name, day_start_ns).exists()
+    
+    def read(self, tag_name: str, day_start_ns: int,
+             start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> TagSeries:
+        """チャンク読み込み（[start_ns, end_ns] の範囲のみ）
+        
+        Raises:
+            OSError, ValueError: チャンクが存在しない、または破損している場合
+        """
+        path = self.chunk_path(tag_name, day_start_ns)
+        chunk = np.load(path, mmap_mode='r')
+        if chunk.ndim != 2 or chunk.shape[0] != 2 or chunk.dtype != np.int64:
+            raise ValueError(f"Invalid chunk format: {path}")
+        
+        epochs = chunk[0]
+        lo = 0 if start_ns is None else int(np.searchsorted(epochs, start_ns, side='left'))
+        hi = len(epochs) if end_ns is None else int(np.searchsorted(epochs, end_ns, side='right'))
+        
+        result = TagSeries(np.array(epochs[lo:hi]), np.array(chunk[1, lo:hi]).view(np.float64))
+        del chunk
+        
+        # LRU用に最終参照時刻を更新
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        
+        return result
+    
+    def write(self, tag_name: str, day_start_ns: int, series: TagSeries) -> None:
+        """チャンク書き込み（一時ファイル経由で置き換え）
+        
+        Args:
+            series: 当日分の時系列（時刻昇順）
+        """
+        path = self.chunk_path(tag_name, day_start_ns)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        chunk = np.empty((2, len(series)), dtype=np.int64)
+        chunk[0] = series.epochs
+        chunk[1] = series.values.view(np.int64)
+        
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    @staticmethod
+    def split_by_day(series: TagSeries, day_starts: List[int]) -> List[Tuple[int, TagSeries]]:
+        """時系列を日ごとに分割（時刻昇順に整列し、同一時刻の重複は後勝ち）"""
+        order = np.argsort(series.epochs, kind='stable')
+        epochs = series.epochs[order]
+        values = series.values[order]
+        
+        if len(epochs):
+            last = np.append(epochs[1:] != epochs[:-1], True)
+            epochs, values = epochs[last], values[last]
+        
+        result = []
+        for day_start in day_starts:
+            lo = int(np.searchsorted(epochs, day_start, side='left'))
+            hi = int(np.searchsorted(epochs, day_start + DAY_NS, side='left'))
+            result.append((day_start, TagSeries(epochs[lo:hi], values[lo:hi])))
+        return result
+    
+    def evict(self) -> int:
+        """サイズ上限を超えた分を最終参照時刻の古いチャンクから削除
+        
+        Returns:
+            削除したチャンク数
+        """
+        chunks = []
+        total_size = 0
+        for root, _, files in os.walk(self.root_dir):
+            for name in files:
+                if not name.endswith('.npy'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                chunks.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+        
+        if total_size <= self.max_size_bytes:
+            return 0
+        
+        removed = 0
+        for _, size, path in sorted(chunks):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"Failed to evict chunk {path}: {e}")
+                continue
+            total_size -= size
+        
+        self.logger.info(f"Chunk cache evicted {removed} chunks "
+                         f"(size limit {self.max_size_bytes // (1024 * 1024)}MB)")
+        return removed
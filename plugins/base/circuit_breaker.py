@@ -3,15 +3,26 @@ IF-HUB プラグインシステム 回路ブレーカー
 
 連続的な失敗からサービスを保護し、障害の伝播を防ぐ
 回路ブレーカーパターンを実装します。
+
+サービス用の回路ブレーカーは状態（開閉状態・失敗回数・最終失敗時刻）を
+logs/circuit_breakers/ のファイルで同一ホスト上のプロセス間に共有します。
+cronで設備ごとに起動されたプロセスも、他プロセスが検出した障害で即座に拒否されます。
 """
 
+import os
+import json
 import time
+import fcntl
+import asyncio
+import hashlib
+import tempfile
 import threading
 from enum import Enum
+from pathlib import Path
 from contextlib import contextmanager
 from typing import Dict, Any, Optional, Callable, Generator
 from datetime import datetime, timedelta
-from .errors import CircuitBreakerOpenError, PluginError
+from .errors import CircuitBreakerOpenError, PluginError, APIConnectionError, DeadlineExceededError
 
 
 class CircuitBreakerState(Enum):
@@ -112,21 +123,149 @@ class CircuitBreakerMetrics:
         }
 
 
+class SharedBreakerState:
+    """プロセス間で共有する回路ブレーカー状態（logs/circuit_breakers/{名前}.json）
+    
+    更新は flock で排他制御し、一時ファイル経由の置き換えで書き込みます。
+    """
+    
+    def __init__(self, name: str, state_dir: Optional[str] = None):
+        """
+        Args:
+            name: 状態ファイル名（回路ブレーカー名から導出）
+            state_dir: 状態ディレクトリ（デフォルト: logs/circuit_breakers）
+        """
+        self.state_dir = Path(state_dir or Path("logs") / "circuit_breakers")
+        self.state_file = self.state_dir / f"{name}.json"
+        self.lock_file = self.state_dir / f"{name}.lock"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+    
+    @contextmanager
+    def locked(self) -> Generator[Optional[Dict[str, Any]], None, None]:
+        """排他制御下で状態を読み込み、変更があれば書き戻す
+        
+        ロックファイルを開けない場合はNoneを渡します（プロセス内の状態のみで判定）。
+        """
+        try:
+            lock_fd = open(self.lock_file, 'a')
+        except OSError:
+            yield None
+            return
+        
+        with lock_fd:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+            try:
+                entry = self.read()
+                original = dict(entry)
+                yield entry
+                if entry != original:
+                    self._write(entry)
+            finally:
+                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+    
+    def read(self) -> Dict[str, Any]:
+        """状態読み込み（未作成・破損時は空）"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entry if isinstance(entry, dict) else {}
+    
+    def _write(self, entry: Dict[str, Any]) -> None:
+        """一時ファイル経由で置き換え（書き込めない場合はプロセス内の状態のみ更新）"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, prefix=f".{self.state_file.stem}.", suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
 class CircuitBreaker:
-    """回路ブレーカー実装"""
+    """回路ブレーカー実装
+    
+    HALF_OPEN 状態では試行呼び出しを1件だけ許可し、結果が出るまで
+    （最大 recovery_timeout 秒）他の呼び出しは拒否します。
+    """
+    
+    # 監視対象外とするHTTPステータス（4xx：サービスは応答しておりリクエスト側の問題）
+    # 408・429はサービス側の過負荷を示すため失敗として数える
+    CLIENT_ERROR_STATUS = range(400, 500)
+    OVERLOAD_STATUS = (408, 429)
     
-    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None,
+                 shared_state: Optional[SharedBreakerState] = None):
         """
         Args:
             config: 回路ブレーカー設定
+            shared_state: プロセス間で共有する状態（省略時はプロセス内のみ）
         """
         self.config = config or CircuitBreakerConfig()
         self.state = CircuitBreakerState.CLOSED
         self.failure_count = 0
         self.last_failure_time: Optional[float] = None
+        self.probe_started: Optional[float] = None  # HALF_OPEN の試行呼び出し開始時刻
         self.metrics = CircuitBreakerMetrics()
+        self.shared_state = shared_state
         self._lock = threading.RLock()  # 再帰可能ロック
     
+    @contextmanager
+    def _synchronized(self) -> Generator[None, None, None]:
+        """状態の判定・更新区間（共有状態は読み込んでから判定し、変更を書き戻す）
+        
+        ファイルロックは再入できないため、この区間を入れ子にしないこと。
+        """
+        with self._lock:
+            if self.shared_state is None:
+                yield
+                return
+            
+            with self.shared_state.locked() as shared:
+                if shared:
+                    self._load_shared(shared)
+                yield
+                if shared is not None:
+                    shared.update({
+                        "state": self.state.value,
+                        "failure_count": self.failure_count,
+                        "last_failure_time": self.last_failure_time,
+                        "probe_started": self.probe_started
+                    })
+    
+    def _load_shared(self, shared: Dict[str, Any]) -> None:
+        """他プロセスの更新を反映（状態変更履歴は自プロセスの変更のみ記録）"""
+        try:
+            self.state = CircuitBreakerState(shared.get("state", self.state.value))
+        except ValueError:
+            return
+        self.failure_count = int(shared.get("failure_count", 0))
+        self.last_failure_time = shared.get("last_failure_time")
+        self.probe_started = shared.get("probe_started")
+    
+    def _is_service_failure(self, exception: Exception) -> bool:
+        """サービス障害として数える例外か"""
+        if not isinstance(exception, self.config.expected_exception):
+            return False
+        
+        # 呼び出し側の実行期限による打ち切りはサービスの状態と無関係
+        if isinstance(exception, DeadlineExceededError):
+            return False
+        
+        if isinstance(exception, APIConnectionError):
+            status_code = exception.details.get('status_code')
+            if status_code in self.CLIENT_ERROR_STATUS and status_code not in self.OVERLOAD_STATUS:
+                return False
+        
+        return True
+    
     def _should_trip(self) -> bool:
         """回路ブレーカーを開放すべきかの判定"""
         return self.failure_count >= self.config.failure_threshold
@@ -148,9 +287,10 @@ class CircuitBreaker:
     
     def _record_success(self):
         """成功の記録と状態更新"""
-        with self._lock:
+        with self._synchronized():
             self.failure_count = 0
             self.last_failure_time = None
+            self.probe_started = None
             self.metrics.record_success()
             
             if self.state == CircuitBreakerState.HALF_OPEN:
@@ -158,48 +298,68 @@ class CircuitBreaker:
     
     def _record_failure(self, exception: Exception):
         """失敗の記録と状態更新"""
-        with self._lock:
-            # 監視対象の例外かチェック
-            if isinstance(exception, self.config.expected_exception):
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                self.metrics.record_failure()
-                
-                # 失敗閾値に達した場合は開放状態に
-                if self._should_trip():
-                    self._change_state(CircuitBreakerState.OPEN)
-            else:
-                # 監視対象外の例外は通常の成功として扱う
-                self._record_success()
+        # 期限による打ち切りは成功・失敗のいずれにも数えず、試行呼び出しの枠だけ解放
+        if isinstance(exception, DeadlineExceededError):
+            self._release_probe()
+            return
+        
+        # 監視対象外の例外は通常の成功として扱う
+        if not self._is_service_failure(exception):
+            self._record_success()
+            return
+        
+        with self._synchronized():
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            self.probe_started = None
+            self.metrics.record_failure()
+            
+            # 失敗閾値に達した場合、または試行呼び出しが失敗した場合は開放状態に
+            if self._should_trip() or self.state == CircuitBreakerState.HALF_OPEN:
+                self._change_state(CircuitBreakerState.OPEN)
+    
+    def _release_probe(self):
+        """結果の出なかった試行呼び出しの枠を解放（次の呼び出しで再試行）"""
+        with self._synchronized():
+            self.probe_started = None
     
     def _call_allowed(self) -> bool:
         """呼び出し許可の判定"""
-        with self._lock:
+        with self._synchronized():
             if self.state == CircuitBreakerState.CLOSED:
                 return True
             
             elif self.state == CircuitBreakerState.OPEN:
                 if self._should_attempt_reset():
                     self._change_state(CircuitBreakerState.HALF_OPEN)
+                    self.probe_started = time.time()
                     return True
                 return False
             
             elif self.state == CircuitBreakerState.HALF_OPEN:
-                return True
+                # 試行呼び出しの結果待ち（応答がないまま recovery_timeout を過ぎた場合は再試行）
+                if self.probe_started is None or time.time() - self.probe_started >= self.config.recovery_timeout:
+                    self.probe_started = time.time()
+                    return True
+                return False
             
             return False
     
+    def _reject(self) -> CircuitBreakerOpenError:
+        """呼び出し拒否の記録と例外の生成"""
+        self.metrics.record_rejection()
+        return CircuitBreakerOpenError(
+            f"Circuit breaker '{self.config.name}' is open",
+            service_name=self.config.name,
+            failure_count=self.failure_count,
+            open_time=datetime.fromtimestamp(self.last_failure_time).isoformat() if self.last_failure_time else None
+        )
+    
     @contextmanager
     def context(self) -> Generator[None, None, None]:
         """回路ブレーカーコンテキストマネージャー"""
         if not self._call_allowed():
-            self.metrics.record_rejection()
-            raise CircuitBreakerOpenError(
-                f"Circuit breaker '{self.config.name}' is open",
-                service_name=self.config.name,
-                failure_count=self.failure_count,
-                open_time=datetime.fromtimestamp(self.last_failure_time).isoformat() if self.last_failure_time else None
-            )
+            raise self._reject()
         
         try:
             yield
@@ -213,16 +373,52 @@ class CircuitBreaker:
         with self.context():
             return func(*args, **kwargs)
     
+    async def call_async(self, func: Callable, *args, **kwargs):
+        """コルーチン関数を回路ブレーカー保護下で実行（同期呼び出しと状態を共有）
+        
+        共有状態の判定・更新はファイルロックを取得するため、イベントループを
+        止めないよう既定のスレッドプールで実行します。
+        """
+        if not await self._run_synchronized(self._call_allowed):
+            raise self._reject()
+        
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            await self._run_synchronized(self._record_failure, e)
+            raise
+        
+        await self._run_synchronized(self._record_success)
+        return result
+    
+    async def _run_synchronized(self, func: Callable, *args):
+        """状態の判定・更新をイベントループ外で実行（共有状態がない場合はそのまま実行）"""
+        if self.shared_state is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    
     def get_state(self) -> CircuitBreakerState:
-        """現在の状態を取得"""
+        """現在の状態を取得（共有状態がある場合は他プロセスの更新を反映）"""
+        self._refresh()
         return self.state
     
+    def _refresh(self) -> None:
+        """共有状態の読み込み（ロックなし。ファイルは置き換えで更新される）"""
+        if self.shared_state is None:
+            return
+        shared = self.shared_state.read()
+        if shared:
+            with self._lock:
+                self._load_shared(shared)
+    
     def get_metrics(self) -> Dict[str, Any]:
-        """メトリクスを取得"""
+        """メトリクスを取得（呼び出し回数等は自プロセス分、状態は共有状態）"""
+        self._refresh()
         with self._lock:
             metrics = self.metrics.to_dict()
             metrics.update({
                 "circuit_breaker_name": self.config.name,
+                "shared_state_file": str(self.shared_state.state_file) if self.shared_state else None,
                 "current_state": self.state.value,
                 "failure_count": self.failure_count,
                 "failure_threshold": self.config.failure_threshold,
@@ -235,17 +431,19 @@ class CircuitBreaker:
             return metrics
     
     def reset(self):
-        """手動リセット"""
-        with self._lock:
+        """手動リセット（共有状態の場合は全プロセスに反映）"""
+        with self._synchronized():
             self.failure_count = 0
             self.last_failure_time = None
+            self.probe_started = None
             self._change_state(CircuitBreakerState.CLOSED)
     
     def force_open(self):
-        """強制開放"""
-        with self._lock:
+        """強制開放（共有状態の場合は全プロセスに反映）"""
+        with self._synchronized():
             self._change_state(CircuitBreakerState.OPEN)
             self.last_failure_time = time.time()
+            self.probe_started = None
 
 
 class CircuitBreakerManager:
@@ -255,12 +453,13 @@ class CircuitBreakerManager:
         self._breakers: Dict[str, CircuitBreaker] = {}
         self._lock = threading.RLock()
     
-    def get_or_create(self, name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
+    def get_or_create(self, name: str, config: Optional[CircuitBreakerConfig] = None,
+                      shared_state: Optional[SharedBreakerState] = None) -> CircuitBreaker:
         """回路ブレーカーを取得または作成"""
         with self._lock:
             if name not in self._breakers:
                 breaker_config = config or CircuitBreakerConfig(name=name)
-                self._breakers[name] = CircuitBreaker(breaker_config)
+                self._breakers[name] = CircuitBreaker(breaker_config, shared_state)
             return self._breakers[name]
     
     def get(self, name: str) -> Optional[CircuitBreaker]:
@@ -296,22 +495,45 @@ class CircuitBreakerManager:
 _global_manager = CircuitBreakerManager()
 
 
-def get_circuit_breaker(name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
+def get_circuit_breaker(name: str, config: Optional[CircuitBreakerConfig] = None,
+                        shared_state: Optional[SharedBreakerState] = None) -> CircuitBreaker:
     """グローバルマネージャーから回路ブレーカーを取得"""
-    return _global_manager.get_or_create(name, config)
+    return _global_manager.get_or_create(name, config, shared_state)
 
 
 def create_circuit_breaker_for_service(service_name: str,
                                      failure_threshold: int = 5,
-                                     recovery_timeout: float = 60.0) -> CircuitBreaker:
-    """サービス用の回路ブレーカーを作成"""
+                                     recovery_timeout: float = 60.0,
+                                     scope: Optional[str] = None,
+                                     shared: bool = True) -> CircuitBreaker:
+    """サービス用の回路ブレーカーを作成
+    
+    Args:
+        service_name: サービス名
+        failure_threshold: 失敗閾値
+        recovery_timeout: 回復タイムアウト（秒）
+        scope: 接続先の区別（APIのベースURL等）。接続先ごとに別の回路ブレーカーとする
+        shared: 状態を logs/circuit_breakers/ でプロセス間に共有する
+    """
+    name = service_name
+    if scope:
+        name = f"{service_name}-{hashlib.sha256(scope.encode('utf-8')).hexdigest()[:12]}"
+    
     config = CircuitBreakerConfig(
         failure_threshold=failure_threshold,
         recovery_timeout=recovery_timeout,
         expected_exception=(PluginError, ConnectionError, TimeoutError),
-        name=service_name
+        name=name
     )
-    return get_circuit_breaker(service_name, config)
+    
+    shared_state = None
+    if shared:
+        try:
+            shared_state = SharedBreakerState(name)
+        except OSError:
+            pass  # 状態ディレクトリを作成できない場合はプロセス内のみ
+    
+    return get_circuit_breaker(name, config, shared_state)
 
 
 # サービス別のプリセット設定
@@ -335,11 +557,14 @@ SERVICE_PRESETS = {
 }
 
 
-def create_service_circuit_breaker(service_type: str) -> CircuitBreaker:
-    """サービスタイプに基づいて回路ブレーカーを作成"""
+def create_service_circuit_breaker(service_type: str, scope: Optional[str] = None,
+                                   shared: bool = True) -> CircuitBreaker:
+    """サービスタイプに基づいて回路ブレーカーを作成（scope・shared は create_circuit_breaker_for_service と同じ）"""
     preset = SERVICE_PRESETS.get(service_type, SERVICE_PRESETS["toorpia_api"])
     return create_circuit_breaker_for_service(
         service_name=service_type,
         failure_threshold=preset["failure_threshold"],
-        recovery_timeout=preset["recovery_timeout"]
+        recovery_timeout=preset["recovery_timeout"],
+        scope=scope,
+        shared=shared
     )
@@ -82,12 +82,14 @@ class APIConnectionError(PluginError):
                  api_url: str = "", 
                  status_code: Optional[int] = None,
                  response_text: str = "",
-                 timeout: Optional[float] = None):
+                 timeout: Optional[float] = None,
+                 connect_failed: bool = False):
         details = {
             "api_url": api_url,
             "status_code": status_code,
             "response_text": response_text,
-            "timeout": timeout
+            "timeout": timeout,
+            "connect_failed": connect_failed  # 接続確立前の失敗（リクエストは送信されていない）
         }
         suggestions = [
             "APIサーバーが稼働しているか確認してください",
@@ -98,6 +100,51 @@ class APIConnectionError(PluginError):
         super().__init__(message, "API_CONNECTION_ERROR", details, suggestions)
 
 
+class DeadlineExceededError(APIConnectionError):
+    """実行期限超過エラー
+    
+    処理モードの実行時間上限（run_budget）に達したため、
+    リクエストを送信しなかった、または残り時間で打ち切ったことを表します。
+    接続先の障害ではないため、回路ブレーカーの失敗には数えません。
+    """
+    
+    def __init__(self, 
+                 message: str, 
+                 api_url: str = "", 
+                 timeout: Optional[float] = None):
+        super().__init__(message, api_url=api_url, timeout=timeout)
+        self.error_code = "DEADLINE_EXCEEDED"
+        self.suggestions = [
+            "処理モードの実行時間上限（run_budget）を確認してください",
+            "取得対象のタグ数・期間を見直してください"
+        ]
+
+
+class RequestQueueTimeoutError(PluginError):
+    """リクエスト待ち行列のタイムアウト
+    
+    ホスト単位のリクエスト制限（同時実行数・認証回数）の実行枠を
+    待機時間内に取得できず、リクエストを送信しなかったことを表します。
+    接続先の障害ではないため、リトライ・回路ブレーカーの対象外です。
+    """
+    
+    def __init__(self, 
+                 message: str, 
+                 endpoint: str = "",
+                 limit_kind: str = "",
+                 queue_timeout: Optional[float] = None):
+        details = {
+            "endpoint": endpoint,
+            "limit_kind": limit_kind,
+            "queue_timeout": queue_timeout
+        }
+        suggestions = [
+            "同じtoorPIA APIを使う他の設備の実行状況を確認してください",
+            "rate_limit の同時実行数・スケジュールの実行間隔を見直してください"
+        ]
+        super().__init__(message, "REQUEST_QUEUE_TIMEOUT", details, suggestions)
+
+
 class DataFetchError(PluginError):
     """データ取得エラー
     
@@ -275,6 +322,8 @@ class AuthenticationError(PluginError):
 ERROR_SEVERITY = {
     ConfigurationError: "HIGH",          # 設定エラーは重要度高
     APIConnectionError: "MEDIUM",        # API接続エラーは中程度（リトライ可能）
+    DeadlineExceededError: "MEDIUM",     # 期限超過は中程度（次回実行で回復）
+    RequestQueueTimeoutError: "LOW",     # 待ち行列のタイムアウトは軽微（時間解決）
     DataFetchError: "MEDIUM",           # データ取得エラーは中程度（部分的継続可能）
     ValidationError: "MEDIUM",          # バリデーションエラーは中程度
     LockError: "LOW",                   # ロックエラーは軽微（時間解決）
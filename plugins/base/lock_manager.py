@@ -1,13 +1,22 @@
 import fcntl
-import time
 import os
+import time
 from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, IO, List, Optional
 
 class EquipmentLockManager:
-    """設備別排他制御マネージャー"""
+    """設備別排他制御マネージャー
+    
+    処理モードを指定した場合はモード別のロックファイル（logs/{設備名}/.{モード}.lock）を使用し、
+    異なるモードの処理（時間のかかるbasemap更新とaddplot等）は互いに待機しません。
+    モードを指定しない場合は設備単位のロックファイル（logs/{設備名}/.lock）を使用します。
+    """
+    
+    # ロック待機時のポーリング間隔（秒）。初期値から倍々に延ばし、上限で打ち止め
+    LOCK_POLL_INITIAL_INTERVAL = 0.01
+    LOCK_POLL_MAX_INTERVAL = 0.1
     
     def __init__(self, equipment_name: str):
         self.equipment_name = equipment_name
@@ -17,48 +26,106 @@ class EquipmentLockManager:
         # ディレクトリ作成
         self.lock_dir.mkdir(parents=True, exist_ok=True)
     
+    def get_lock_file(self, mode: Optional[str] = None) -> Path:
+        """ロックファイルパス（mode 省略時は設備単位のロック）"""
+        if mode is None:
+            return self.lock_file
+        return self.lock_dir / f".{mode}.lock"
+    
     @contextmanager
-    def acquire_lock(self, timeout: int = 30) -> Generator[None, None, None]:
-        """設備別排他制御コンテキストマネージャー"""
-        lock_fd = None
+    def acquire_lock(self, timeout: float = 30, mode: Optional[str] = None,
+                     skip_if_busy: bool = False) -> Generator[bool, None, None]:
+        """設備別排他制御コンテキストマネージャー
+        
+        他のプロセスが保持している場合は、解放されるまで短い間隔で取得を試行します。
+        
+        Args:
+            timeout: 取得を待機する最大秒数
+            mode: 処理モード（指定時はモード別のロック）
+            skip_if_busy: 他のプロセスが保持している場合は待機せず False を返す
+        
+        Yields:
+            ロックを取得した場合はTrue（skip_if_busy 指定時に保持中だった場合のみFalse）
+        
+        Raises:
+            TimeoutError: timeout 秒以内に取得できなかった場合
+        """
+        # 'w' で開くと保持中のプロセスの記録を消してしまうため、取得後に書き換える
+        lock_fd = open(self.get_lock_file(mode), 'a+')
+        acquired = False
         try:
-            lock_fd = open(self.lock_file, 'w')
+            if skip_if_busy:
+                acquired = self._try_lock(lock_fd)
+            else:
+                acquired = self._wait_lock(lock_fd, timeout)
+                if not acquired:
+                    raise TimeoutError(f"Could not acquire lock for {self.equipment_name} within {timeout}s")
             
-            # ノンブロッキングロック試行
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-                    
-                    # ロック取得成功：プロセス情報記録
-                    lock_info = f"PID: {os.getpid()}\nTimestamp: {datetime.now().isoformat()}\nEquipment: {self.equipment_name}\n"
-                    lock_fd.write(lock_info)
-                    lock_fd.flush()
-                    
-                    yield
-                    return
-                    
-                except IOError:
-                    # ロック取得失敗：待機
-                    time.sleep(1)
-            
-            raise TimeoutError(f"Could not acquire lock for {self.equipment_name} within {timeout}s")
+            if acquired:
+                # ロック取得成功：プロセス情報記録
+                lock_info = f"PID: {os.getpid()}\nTimestamp: {datetime.now().isoformat()}\nEquipment: {self.equipment_name}\n"
+                if mode is not None:
+                    lock_info += f"Mode: {mode}\n"
+                lock_fd.seek(0)
+                lock_fd.truncate()
+                lock_fd.write(lock_info)
+                lock_fd.flush()
             
+            yield acquired
+        
         finally:
             if lock_fd:
                 try:
-                    fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+                    if acquired:
+                        fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
                     lock_fd.close()
                 except Exception:
                     pass
     
-    def is_locked(self) -> bool:
-        """ロック状態確認"""
-        if not self.lock_file.exists():
+    @staticmethod
+    def _try_lock(lock_fd: IO) -> bool:
+        """ノンブロッキングロック試行"""
+        try:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+    
+    def _wait_lock(self, lock_fd: IO, timeout: float) -> bool:
+        """期限付きのロック取得
+        
+        flock にはタイムアウト指定がないため、ノンブロッキング取得を間隔を延ばしながら
+        期限まで繰り返します（解放から取得までの遅延は最大 LOCK_POLL_MAX_INTERVAL 秒）。
+        期限切れの場合に待機中のスレッドや取得途中のロックが残ることはありません。
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.LOCK_POLL_INITIAL_INTERVAL
+        while True:
+            if self._try_lock(lock_fd):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.LOCK_POLL_MAX_INTERVAL)
+    
+    def is_locked(self, mode: Optional[str] = None) -> bool:
+        """ロック状態確認（mode 省略時は設備単位・モード別のいずれかが保持されていればTrue）"""
+        if mode is not None:
+            return self._is_file_locked(self.get_lock_file(mode))
+        return any(self._is_file_locked(lock_file) for lock_file in self._list_lock_files())
+    
+    def _list_lock_files(self) -> List[Path]:
+        """設備単位・モード別のロックファイル一覧"""
+        return [self.lock_file] + sorted(self.lock_dir.glob(".*.lock"))
+    
+    @staticmethod
+    def _is_file_locked(lock_file: Path) -> bool:
+        if not lock_file.exists():
             return False
         
         try:
-            with open(self.lock_file, 'r+') as f:
+            with open(lock_file, 'r+') as f:
                 fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
                 fcntl.flock(f.fileno(), fcntl.LOCK_UN)
                 return False  # ロック取得できた = ロックされていない
@@ -67,18 +134,19 @@ class EquipmentLockManager:
         except Exception:
             return False
     
-    def get_lock_info(self) -> Dict[str, Any]:
+    def get_lock_info(self, mode: Optional[str] = None) -> Dict[str, Any]:
         """ロック情報取得"""
-        if not self.lock_file.exists():
+        lock_file = self.get_lock_file(mode)
+        if not lock_file.exists():
             return {"locked": False}
         
         try:
-            with open(self.lock_file, 'r') as f:
+            with open(lock_file, 'r') as f:
                 content = f.read()
                 return {
-                    "locked": self.is_locked(),
+                    "locked": self._is_file_locked(lock_file),
                     "lock_info": content,
-                    "lock_file": str(self.lock_file)
+                    "lock_file": str(lock_file)
                 }
         except Exception as e:
             return {"locked": False, "error": str(e)}
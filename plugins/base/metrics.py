@@ -0,0 +1,298 @@
+"""
+IF-HUB プラグインシステム メトリクス収集・Prometheus textfile 出力
+
+APIクライアントの応答時間ヒストグラム・カウンター・ゲージをプロセス内で集計し、
+実行ごとに logs/metrics/ の Prometheus textfile collector 形式（{job}.prom）へ出力します。
+各プロセスは前回出力以降の増分のみを flock 下で累計状態（{job}.json）に加算し、
+.prom ファイルは一時ファイルからの置き換えで更新するため、読み取り側は常に完全な内容を参照します。
+
+    logs/metrics/{job}.prom   node_exporter の --collector.textfile.directory で読み込む
+    logs/metrics/{job}.json   全プロセスの累計値（加算のための状態）
+    logs/metrics/{job}.lock   更新時の排他制御
+"""
+
+import os
+import json
+import fcntl
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+# 応答時間ヒストグラムの上限値（秒）。toorPIAのbasemap更新（数分）まで含める
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# 実行結果に出力するパーセンタイル
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _series_key(name: str, labels: Optional[Dict[str, Any]]) -> SeriesKey:
+    return name, tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+class Histogram:
+    """固定バケットのヒストグラム（バケットごとの件数を加算して集約できる）"""
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(float(b) for b in buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 末尾は +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """パーセンタイル推定（バケット内は線形補間。Prometheus の histogram_quantile と同じ方法）"""
+        if self.count == 0:
+            return None
+        
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets, self.counts):
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]  # +Inf バケット: 最大の上限値
+    
+    def subtract(self, other: 'Histogram') -> 'Histogram':
+        """other からの増分"""
+        delta = Histogram(self.buckets)
+        delta.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        delta.sum = self.sum - other.sum
+        delta.count = self.count - other.count
+        return delta
+    
+    def copy(self) -> 'Histogram':
+        return self.subtract(Histogram(self.buckets))
+
+
+class MetricsRegistry:
+    """プロセス内のメトリクス集計（並列リクエストから更新されるためロックで保護）"""
+    
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.counters: Dict[SeriesKey, float] = {}
+        self.gauges: Dict[SeriesKey, float] = {}
+        self.histograms: Dict[SeriesKey, Histogram] = {}
+        
+        # 前回 take_delta() 時点の値（出力済み分）
+        self._exported_counters: Dict[SeriesKey, float] = {}
+        self._exported_histograms: Dict[SeriesKey, Histogram] = {}
+    
+    def inc(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1.0) -> None:
+        """カウンター加算"""
+        key = _series_key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+    
+    def set_counter(self, name: str, labels: Optional[Dict[str, Any]], total: float) -> None:
+        """カウンターを累計値で更新（リトライ統計など、他で集計済みの累計を反映する場合）"""
+        with self._lock:
+            self.counters[_series_key(name, labels)] = float(total)
+    
+    def set_gauge(self, name: str, labels: Optional[Dict[str, Any]], value: float) -> None:
+        """ゲージ設定"""
+        with self._lock:
+            self.gauges[_series_key(name, labels)] = float(value)
+    
+    def observe(self, name: str, labels: Optional[Dict[str, Any]], value: float) -> None:
+        """ヒストグラムに観測値を追加"""
+        key = _series_key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+    
+    def histogram_summary(self, name: str) -> List[Dict[str, Any]]:
+        """ヒストグラムの系列ごとの件数・パーセンタイル（実行結果用）"""
+        summary = []
+        with self._lock:
+            for (series_name, labels), histogram in sorted(self.histograms.items()):
+                if series_name != name:
+                    continue
+                entry: Dict[str, Any] = dict(labels)
+                entry["count"] = histogram.count
+                for q in SUMMARY_QUANTILES:
+                    value = histogram.quantile(q)
+                    entry[f"p{int(q * 100)}"] = round(value, 3) if value is not None else None
+                summary.append(entry)
+        return summary
+    
+    def take_delta(self) -> Dict[str, Any]:
+        """前回呼び出し以降の増分（ゲージは現在値）を取得し、出力済みとして記録"""
+        with self._lock:
+            counters = {}
+            for key, total in self.counters.items():
+                delta = total - self._exported_counters.get(key, 0.0)
+                if delta or key not in self._exported_counters:
+                    counters[key] = delta
+            self._exported_counters = dict(self.counters)
+            
+            histograms = {}
+            for key, histogram in self.histograms.items():
+                exported = self._exported_histograms.get(key)
+                delta_histogram = histogram.subtract(exported) if exported else histogram.copy()
+                if delta_histogram.count:
+                    histograms[key] = delta_histogram
+            self._exported_histograms = {key: histogram.copy() for key, histogram in self.histograms.items()}
+            
+            return {"counters": counters, "gauges": dict(self.gauges), "histograms": histograms}
+
+
+class PrometheusTextfileExporter:
+    """Prometheus textfile collector 形式での出力（全プロセスの値を累計）"""
+    
+    def __init__(self, job: str = "ifhub_plugins", directory: Optional[str] = None):
+        """
+        Args:
+            job: 出力ファイル名（{job}.prom）
+            directory: 出力ディレクトリ（デフォルト: logs/metrics）
+        """
+        self.directory = Path(directory or Path("logs") / "metrics")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prom_file = self.directory / f"{job}.prom"
+        self.state_file = self.directory / f"{job}.json"
+        self.lock_file = self.directory / f"{job}.lock"
+    
+    def export(self, registries: Sequence[MetricsRegistry],
+               extra_labels: Optional[Dict[str, Any]] = None) -> Path:
+        """前回出力以降の増分を累計状態に加算し、.prom ファイルを再生成
+        
+        Args:
+            registries: 出力するメトリクス（各レジストリの増分を加算）
+            extra_labels: 全系列に付与するラベル（設備名など）
+        """
+        deltas = [registry.take_delta() for registry in registries]
+        
+        with open(self.lock_file, 'a') as lock_fd:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+            try:
+                state = self._read_state()
+                for delta in deltas:
+                    self._merge(state, delta, extra_labels or {})
+                
+                self._write_atomic(self.state_file, json.dumps(state, ensure_ascii=False))
+                self._write_atomic(self.prom_file, self.render(state))
+            finally:
+                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+        
+        return self.prom_file
+    
+    def _read_state(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if isinstance(state, dict):
+                for section in ("counters", "gauges", "histograms"):
+                    state.setdefault(section, {})
+                return state
+        except (OSError, ValueError):
+            pass
+        return {"counters": {}, "gauges": {}, "histograms": {}}
+    
+    @staticmethod
+    def _merge(state: Dict[str, Dict[str, Any]], delta: Dict[str, Any], extra_labels: Dict[str, Any]) -> None:
+        def entry_for(section: str, key: SeriesKey) -> Tuple[str, Dict[str, Any]]:
+            name, labels = key
+            merged_labels = dict(labels)
+            merged_labels.update({k: str(v) for k, v in extra_labels.items()})
+            series_id = _format_series(name, merged_labels)
+            return series_id, state[section].get(series_id) or {"name": name, "labels": merged_labels}
+        
+        for key, value in delta["counters"].items():
+            series_id, entry = entry_for("counters", key)
+            entry["value"] = entry.get("value", 0.0) + value
+            state["counters"][series_id] = entry
+        
+        for key, value in delta["gauges"].items():
+            series_id, entry = entry_for("gauges", key)
+            entry["value"] = value
+            state["gauges"][series_id] = entry
+        
+        for key, histogram in delta["histograms"].items():
+            series_id, entry = entry_for("histograms", key)
+            if entry.get("buckets") != list(histogram.buckets):
+                # バケット定義が変わった場合は新しい定義で集計し直す
+                entry.update({"buckets": list(histogram.buckets), "counts": [0] * len(histogram.counts),
+                              "sum": 0.0, "count": 0})
+            entry["counts"] = [a + b for a, b in zip(entry["counts"], histogram.counts)]
+            entry["sum"] += histogram.sum
+            entry["count"] += histogram.count
+            state["histograms"][series_id] = entry
+    
+    @staticmethod
+    def render(state: Dict[str, Dict[str, Any]]) -> str:
+        """累計状態を Prometheus テキスト形式に変換"""
+        lines: List[str] = []
+        
+        for section, metric_type in (("counters", "counter"), ("gauges", "gauge")):
+            for name, entries in _group_by_name(state[section]):
+                lines.append(f"# TYPE {name} {metric_type}")
+                for entry in entries:
+                    lines.append(f"{_format_series(name, entry['labels'])} {_format_value(entry['value'])}")
+        
+        for name, entries in _group_by_name(state["histograms"]):
+            lines.append(f"# TYPE {name} histogram")
+            for entry in entries:
+                cumulative = 0
+                for upper, count in zip(entry["buckets"] + ["+Inf"], entry["counts"]):
+                    cumulative += count
+                    le = upper if upper == "+Inf" else _format_value(upper)
+                    lines.append(f"{_format_series(name + '_bucket', dict(entry['labels'], le=le))} {cumulative}")
+                lines.append(f"{_format_series(name + '_sum', entry['labels'])} {_format_value(entry['sum'])}")
+                lines.append(f"{_format_series(name + '_count', entry['labels'])} {entry['count']}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def _write_atomic(self, path: Path, content: str) -> None:
+        # .prom 以外の拡張子の一時ファイルに書き込むため、collector が書き込み途中の内容を読むことはない
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{path.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+def _group_by_name(entries: Dict[str, Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for series_id in sorted(entries):
+        entry = entries[series_id]
+        groups.setdefault(entry["name"], []).append(entry)
+    return sorted(groups.items())
+
+
+def _format_series(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    pairs = ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{pairs}}}"
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
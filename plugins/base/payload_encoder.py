@@ -0,0 +1,141 @@
+"""
+IF-HUB プラグインシステム リクエストペイロードエンコーダー
+
+build_frame() で構築したDataFrame（timestamp列 + float64値列）を、
+toorPIA API の {"columns": [...], "data": [[...], ...], ...} 形式のJSON本文に
+行リストのPythonオブジェクトを経由せず直接変換します。
+
+orjson がインストールされている場合は数値配列の直列化に使用します（任意依存）。
+"""
+
+import gzip
+import json
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # 任意依存：未インストール時は標準ライブラリで直列化
+    orjson = None
+
+
+# 欠損値（NaN・Inf）のJSON表現（toorPIA APIは空文字を欠損として扱う）
+EMPTY_VALUE = '""'
+
+# 一度に文字列化する行数（作業領域の上限を決める）
+ENCODE_BLOCK_ROWS = 4096
+
+
+def round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    """有効桁数で丸め（0・NaN・Infはそのまま）"""
+    values = np.asarray(values, dtype=np.float64)
+    result = values.copy()
+    
+    target = np.isfinite(values) & (values != 0)
+    exponents = np.zeros(len(values), dtype=np.int64)
+    exponents[target] = digits - 1 - np.floor(np.log10(np.abs(values[target]))).astype(np.int64)
+    
+    # 10の冪がオーバーフローする極小値（非正規化数）は丸めない
+    target &= np.abs(exponents) <= 300
+    if not target.any():
+        return result
+    
+    exponents = exponents[target]
+    scaled = values[target]
+    
+    # 10の負冪は2進で正確に表せないため、指数の符号で乗除算を使い分ける
+    positive = exponents >= 0
+    factors = 10.0 ** np.abs(exponents)
+    rounded = np.empty_like(scaled)
+    rounded[positive] = np.round(scaled[positive] * factors[positive]) / factors[positive]
+    rounded[~positive] = np.round(scaled[~positive] / factors[~positive]) * factors[~positive]
+    
+    result[target] = rounded
+    return result
+
+
+def format_json_values(values: np.ndarray) -> list:
+    """float64配列をJSON数値トークン（最短表現）のリストに変換（NaN・Infは空文字）"""
+    values = np.asarray(values, dtype=np.float64)
+    tokens = list(map(float.__repr__, values.tolist()))
+    
+    for index in np.flatnonzero(~np.isfinite(values)).tolist():
+        tokens[index] = EMPTY_VALUE
+    
+    return tokens
+
+
+def encode_frame_payload(frame: pd.DataFrame,
+                         fields: Dict[str, Any],
+                         significant_digits: Optional[int] = None,
+                         block_rows: int = ENCODE_BLOCK_ROWS) -> bytes:
+    """DataFrameをtoorPIA APIのリクエスト本文に変換
+    
+    値の文字列化は block_rows 行ずつ行い、変換済みの部分から順に本文へ書き込むため、
+    作業領域は本文サイズに対してブロック分のみです。
+    
+    Args:
+        frame: 先頭がtimestamp列、以降がfloat64値列のDataFrame
+        fields: columns・data 以外のリクエストフィールド
+        significant_digits: 値の有効桁数（省略時は丸めなし）
+        block_rows: 一度に文字列化する行数
+    
+    Returns:
+        UTF-8エンコードされたJSON本文
+    """
+    value_columns = [frame[column_name].to_numpy(dtype=np.float64) for column_name in frame.columns[1:]]
+    if significant_digits:
+        value_columns = [round_significant(values, int(significant_digits)) for values in value_columns]
+    timestamps = frame['timestamp'].to_numpy()
+    
+    encode_block = _encode_block_orjson if orjson is not None and value_columns else _encode_block
+    
+    body = bytearray()
+    body += b'{"columns":'
+    body += json.dumps(list(frame.columns), ensure_ascii=False).encode('utf-8')
+    body += b',"data":['
+    
+    for block_start in range(0, len(frame), block_rows):
+        block = slice(block_start, block_start + block_rows)
+        if block_start:
+            body += b','
+        body += encode_block(
+            [json.dumps(str(ts), ensure_ascii=False) for ts in timestamps[block]],
+            [values[block] for values in value_columns]
+        )
+    
+    body += b']'
+    for key, value in fields.items():
+        body += f',{json.dumps(key)}:{json.dumps(value, ensure_ascii=False)}'.encode('utf-8')
+    body += b'}'
+    
+    return bytes(body)
+
+
+def _encode_block(timestamps: list, value_columns: list) -> bytes:
+    """行ブロックを "[ts,v1,...],[ts,v1,...]" 形式に変換（標準ライブラリ版）"""
+    columns = [timestamps] + [format_json_values(values) for values in value_columns]
+    return ','.join('[' + ','.join(row) + ']' for row in zip(*columns)).encode('utf-8')
+
+
+def _encode_block_orjson(timestamps: list, value_columns: list) -> bytes:
+    """行ブロックを "[ts,v1,...],[ts,v1,...]" 形式に変換（orjson版）
+    
+    orjson は NaN・Inf を null として出力するため、空文字に置き換えます
+    （数値配列のみを直列化するため null は欠損値以外に現れません）。
+    """
+    matrix = np.ascontiguousarray(np.column_stack(value_columns))
+    encoded = orjson.dumps(matrix, option=orjson.OPT_SERIALIZE_NUMPY)
+    rows = encoded[2:-2].replace(b'null', EMPTY_VALUE.encode()).split(b'],[')
+    
+    return b','.join(
+        b'[' + ts.encode('utf-8') + b',' + row + b']'
+        for ts, row in zip(timestamps, rows)
+    )
+
+
+def compress_payload(body: bytes, level: int = 6) -> bytes:
+    """Content-Encoding: gzip 用の圧縮"""
+    return gzip.compress(body, compresslevel=level)
@@ -0,0 +1,253 @@
+"""
+IF-HUB プラグインシステム ホスト単位のリクエスト制限
+
+同一ホスト上の全プロセス（設備ごとのcron実行など）で共有する
+同時実行数の上限（スロット）とトークンバケットによるレート制限を提供します。
+状態は logs/rate_limits/ のファイルで共有し、flock で排他制御します。
+
+    スロット: {名前}.{番号}.slot を flock で保持している間を1実行とする
+    トークンバケット: {名前}.bucket.json（残トークン・更新時刻）を flock 下で更新
+"""
+
+import os
+import json
+import time
+import fcntl
+import random
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Generator, IO, Optional
+
+
+class ConcurrencySlots:
+    """ホスト全体での同時実行数の上限"""
+    
+    # 空きスロット確認の間隔（秒）
+    POLL_INTERVAL = 0.05
+    
+    def __init__(self, name: str, limit: int, state_dir: Path):
+        """
+        Args:
+            name: スロット名（ファイル名に使用）
+            limit: 最大同時実行数
+            state_dir: 状態ディレクトリ
+        """
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.slot_files = [state_dir / f"{name}.{i}.slot" for i in range(self.limit)]
+    
+    @contextmanager
+    def acquire(self, timeout: float) -> Generator[float, None, None]:
+        """空きスロットを取得して保持（待機した秒数を返す）
+        
+        Raises:
+            TimeoutError: timeout 秒以内に空きがなかった場合
+        """
+        start = time.monotonic()
+        slot_fd = self._try_acquire()
+        while slot_fd is None:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                raise TimeoutError(f"No free {self.name} slot within {timeout:.1f}s "
+                                   f"({self.limit} concurrent allowed)")
+            time.sleep(min(self.POLL_INTERVAL, remaining))
+            slot_fd = self._try_acquire()
+        
+        try:
+            yield time.monotonic() - start
+        finally:
+            try:
+                fcntl.flock(slot_fd.fileno(), fcntl.LOCK_UN)
+            finally:
+                slot_fd.close()
+    
+    def _try_acquire(self) -> Optional[IO]:
+        """ノンブロッキングで空きスロットを取得（確認順は毎回ずらす）"""
+        offset = random.randrange(self.limit)
+        for i in range(self.limit):
+            slot_fd = open(self.slot_files[(offset + i) % self.limit], 'a')
+            try:
+                fcntl.flock(slot_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return slot_fd
+            except BlockingIOError:
+                slot_fd.close()
+        return None
+    
+    def in_use(self) -> int:
+        """使用中のスロット数"""
+        count = 0
+        for slot_file in self.slot_files:
+            try:
+                with open(slot_file, 'a') as f:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            except BlockingIOError:
+                count += 1
+            except OSError:
+                pass
+        return count
+
+
+class TokenBucket:
+    """ホスト全体でのレート制限（1分あたりの回数）"""
+    
+    def __init__(self, name: str, per_minute: float, state_dir: Path):
+        """
+        Args:
+            name: バケット名（ファイル名に使用）
+            per_minute: 1分あたりの上限回数（バースト上限を兼ねる）
+            state_dir: 状態ディレクトリ
+        """
+        self.name = name
+        self.capacity = max(1.0, float(per_minute))
+        self.rate = self.capacity / 60.0  # 1秒あたりの補充量
+        self.state_dir = state_dir
+        self.state_file = state_dir / f"{name}.bucket.json"
+        self.lock_file = state_dir / f"{name}.bucket.lock"
+    
+    def acquire(self, timeout: float) -> float:
+        """トークンを1つ消費（不足時は補充まで待機し、待機した秒数を返す）
+        
+        Raises:
+            TimeoutError: timeout 秒以内にトークンが補充されない場合
+        """
+        start = time.monotonic()
+        while True:
+            wait = self._try_consume()
+            if wait <= 0:
+                return time.monotonic() - start
+            
+            remaining = timeout - (time.monotonic() - start)
+            if wait > remaining:
+                raise TimeoutError(f"{self.name} rate limit ({self.capacity:.0f}/min) "
+                                   f"not available within {timeout:.1f}s")
+            time.sleep(wait)
+    
+    def _try_consume(self) -> float:
+        """トークンを消費できれば0、できなければ補充までの秒数"""
+        with open(self.lock_file, 'a') as lock_fd:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                tokens, updated_at = self._read(now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+                
+                if tokens >= 1:
+                    self._write({"tokens": tokens - 1, "updated_at": now})
+                    return 0.0
+                
+                self._write({"tokens": tokens, "updated_at": now})
+                return (1 - tokens) / self.rate
+            finally:
+                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+    
+    def _read(self, now: float):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return float(entry["tokens"]), float(entry["updated_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return self.capacity, now
+    
+    def _write(self, entry: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, prefix=f".{self.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.state_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class ToorPIARequestLimiter:
+    """toorPIA API 接続先ごとのリクエスト制限
+    
+    fit_transform・addplot はエンドポイント別の同時実行数、
+    認証（/auth/login）は1分あたりの回数で制限します。
+    待機時間はエンドポイント種別ごとに累積し、実行結果に含めます。
+    """
+    
+    DEFAULT_LIMITS = {
+        "fit_transform": 1,       # 同時実行数
+        "addplot": 4,             # 同時実行数
+        "logins_per_minute": 10
+    }
+    
+    def __init__(self, api_url: str, limits: Optional[Dict[str, Any]] = None,
+                 state_dir: Optional[str] = None):
+        """
+        Args:
+            api_url: toorPIA API URL（接続先ごとに別の制限とする）
+            limits: fit_transform・addplot（同時実行数）、logins_per_minute（1分あたりの回数）
+            state_dir: 状態ディレクトリ（デフォルト: logs/rate_limits）
+        """
+        self.limits = dict(self.DEFAULT_LIMITS)
+        self.limits.update({key: value for key, value in (limits or {}).items() if value is not None})
+        
+        prefix = f"toorpia-{hashlib.sha256(api_url.encode('utf-8')).hexdigest()[:12]}"
+        self.state_dir = Path(state_dir or Path("logs") / "rate_limits")
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.slots = {
+            kind: ConcurrencySlots(f"{prefix}.{kind}", self.limits[kind], self.state_dir)
+            for kind in ("fit_transform", "addplot")
+        }
+        self.login_bucket = TokenBucket(f"{prefix}.login", self.limits["logins_per_minute"], self.state_dir)
+        
+        self.queue_wait: Dict[str, float] = {}
+        self.max_queue_wait: Dict[str, float] = {}
+        self.queue_timeouts: Dict[str, int] = {}
+    
+    @contextmanager
+    def acquire(self, kind: str, timeout: float) -> Generator[float, None, None]:
+        """エンドポイント種別（fit_transform / addplot / login）の実行枠を取得
+        
+        Yields:
+            待機した秒数
+        
+        Raises:
+            TimeoutError: timeout 秒以内に実行枠を取得できなかった場合
+        """
+        if kind == "login":
+            try:
+                waited = self.login_bucket.acquire(timeout)
+            except TimeoutError:
+                self._record_timeout(kind)
+                raise
+            self._record_wait(kind, waited)
+            yield waited
+            return
+        
+        acquired = False
+        try:
+            with self.slots[kind].acquire(timeout) as waited:
+                acquired = True
+                self._record_wait(kind, waited)
+                yield waited
+        except TimeoutError:
+            if not acquired:
+                self._record_timeout(kind)
+            raise
+    
+    def _record_wait(self, kind: str, waited: float) -> None:
+        self.queue_wait[kind] = self.queue_wait.get(kind, 0.0) + waited
+        self.max_queue_wait[kind] = max(self.max_queue_wait.get(kind, 0.0), waited)
+    
+    def _record_timeout(self, kind: str) -> None:
+        self.queue_timeouts[kind] = self.queue_timeouts.get(kind, 0) + 1
+    
+    def get_status(self) -> Dict[str, Any]:
+        """制限値・待機時間とタイムアウト回数（このプロセスの累計）・使用中スロット数"""
+        return {
+            "limits": self.limits,
+            "queue_wait_seconds": {kind: round(waited, 3) for kind, waited in self.queue_wait.items()},
+            "max_queue_wait_seconds": {kind: round(waited, 3) for kind, waited in self.max_queue_wait.items()},
+            "queue_timeouts": dict(self.queue_timeouts),
+            "slots_in_use": {kind: slots.in_use() for kind, slots in self.slots.items()}
+        }
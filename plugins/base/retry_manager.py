@@ -7,11 +7,14 @@ IF-HUB プラグインシステム リトライマネージャー
 
 import time
 import random
+import asyncio
 import logging
-from contextlib import contextmanager
-from typing import Dict, Any, Optional, List, Callable, Type, Union, Generator
+import threading
+from typing import Dict, Any, Optional, List, Callable, Type, Union, Awaitable, Tuple, TypeVar
 from datetime import datetime, timedelta
-from .errors import PluginError, APIConnectionError, DataFetchError, AuthenticationError
+from .errors import PluginError, APIConnectionError, DataFetchError, AuthenticationError, DeadlineExceededError
+
+T = TypeVar('T')
 
 
 class RetryConfig:
@@ -63,36 +66,40 @@ class RetryStatistics:
         self.average_attempts = 0.0
         self.error_distribution: Dict[str, int] = {}
         self.last_updated = datetime.now()
+        # 並列取得のワーカースレッド・非同期処理から同時に更新されるため排他制御
+        self._lock = threading.Lock()
     
     def update(self, attempts: List[RetryAttempt], operation_name: str):
         """統計情報を更新"""
-        self.total_operations += 1
-        self.total_retries += len(attempts) - 1  # 最初の試行はリトライではない
-        
-        if attempts[-1].success:
-            self.successful_operations += 1
-        else:
-            self.failed_operations += 1
-            error_type = type(attempts[-1].exception).__name__ if attempts[-1].exception else "Unknown"
-            self.error_distribution[error_type] = self.error_distribution.get(error_type, 0) + 1
-        
-        self.average_attempts = (self.total_retries + self.total_operations) / self.total_operations
-        self.last_updated = datetime.now()
+        with self._lock:
+            self.total_operations += 1
+            self.total_retries += len(attempts) - 1  # 最初の試行はリトライではない
+            
+            if attempts[-1].success:
+                self.successful_operations += 1
+            else:
+                self.failed_operations += 1
+                error_type = type(attempts[-1].exception).__name__ if attempts[-1].exception else "Unknown"
+                self.error_distribution[error_type] = self.error_distribution.get(error_type, 0) + 1
+            
+            self.average_attempts = (self.total_retries + self.total_operations) / self.total_operations
+            self.last_updated = datetime.now()
     
     def to_dict(self) -> Dict[str, Any]:
         """統計情報を辞書形式で返す"""
-        success_rate = (self.successful_operations / self.total_operations * 100) if self.total_operations > 0 else 0
-        
-        return {
-            "total_operations": self.total_operations,
-            "successful_operations": self.successful_operations,
-            "failed_operations": self.failed_operations,
-            "success_rate_percent": round(success_rate, 2),
-            "total_retries": self.total_retries,
-            "average_attempts": round(self.average_attempts, 2),
-            "error_distribution": self.error_distribution,
-            "last_updated": self.last_updated.isoformat()
-        }
+        with self._lock:
+            success_rate = (self.successful_operations / self.total_operations * 100) if self.total_operations > 0 else 0
+            
+            return {
+                "total_operations": self.total_operations,
+                "successful_operations": self.successful_operations,
+                "failed_operations": self.failed_operations,
+                "success_rate_percent": round(success_rate, 2),
+                "total_retries": self.total_retries,
+                "average_attempts": round(self.average_attempts, 2),
+                "error_distribution": dict(self.error_distribution),
+                "last_updated": self.last_updated.isoformat()
+            }
 
 
 class RetryManager:
@@ -107,6 +114,9 @@ class RetryManager:
         OSError  # ネットワーク関連のOSError
     )
     
+    # 4xxのうちリトライ対象とするHTTPステータス（その他の4xxは再送しても結果が変わらない）
+    RETRYABLE_CLIENT_STATUS = (408, 429)
+    
     def __init__(self, 
                  config: Optional[RetryConfig] = None,
                  logger: Optional[logging.Logger] = None,
@@ -148,6 +158,17 @@ class RetryManager:
         if not isinstance(exception, self.retryable_exceptions):
             return False
         
+        # リクエスト内容に起因するHTTPエラー（4xx）はリトライしない
+        if isinstance(exception, APIConnectionError):
+            status_code = exception.details.get('status_code')
+            if status_code is not None and 400 <= status_code < 500 \
+                    and status_code not in self.RETRYABLE_CLIENT_STATUS:
+                return False
+        
+        # 実行期限の超過は再試行しても回復しない
+        if isinstance(exception, DeadlineExceededError):
+            return False
+        
         # 認証エラーの場合は特別扱い（通常はリトライしない）
         if isinstance(exception, AuthenticationError):
             # APIキーが提供されていない場合はリトライしない
@@ -156,101 +177,162 @@ class RetryManager:
         
         return True
     
-    @contextmanager
-    def retry_context(self, operation_name: str) -> Generator[int, None, None]:
-        """リトライコンテキストマネージャー
+    def execute(self,
+                operation: Callable[[], T],
+                operation_name: str,
+                deadline: Optional[float] = None,
+                retryable: Optional[Callable[[Exception], bool]] = None) -> T:
+        """操作をリトライ付きで実行
         
         Args:
+            operation: 実行する操作（引数なしの関数）。リトライ時は再度呼び出す
             operation_name: 操作名（ログ用）
+            deadline: 期限（time.monotonic() 基準）。待機後に期限を過ぎる場合はリトライしない
+            retryable: 追加のリトライ条件（False を返した例外はリトライしない。非冪等リクエスト用）
+        
+        Returns:
+            操作の実行結果
         
-        Yields:
-            現在の試行回数（0から開始）
+        Raises:
+            最後の試行で発生した例外（PluginError の場合は retry_info を設定）
         """
         attempts: List[RetryAttempt] = []
-        last_exception = None
         
         for attempt in range(self.config.max_retries + 1):
+            self.logger.debug(f"[{operation_name}] Attempt {attempt + 1}/{self.config.max_retries + 1}")
             try:
-                self.logger.debug(f"[{operation_name}] Attempt {attempt + 1}/{self.config.max_retries + 1}")
-                yield attempt
-                
-                # 成功した場合
-                attempts.append(RetryAttempt(attempt, 0.0))
-                self.logger.info(f"[{operation_name}] Operation succeeded on attempt {attempt + 1}")
-                break
-                
+                result = operation()
             except Exception as e:
-                last_exception = e
-                
-                # リトライ判定
-                if self.should_retry(e, attempt):
-                    delay = self.calculate_delay(attempt)
-                    attempts.append(RetryAttempt(attempt, delay, e))
-                    
-                    self.logger.warning(
-                        f"[{operation_name}] Attempt {attempt + 1} failed: {str(e)}. "
-                        f"Retrying in {delay:.2f} seconds..."
-                    )
-                    
-                    time.sleep(delay)
-                else:
-                    # リトライしない場合
-                    attempts.append(RetryAttempt(attempt, 0.0, e))
-                    self.logger.error(f"[{operation_name}] Operation failed permanently: {str(e)}")
-                    break
+                delay, stop_reason = self._next_delay(e, attempt, deadline, operation_name, retryable)
+                attempts.append(RetryAttempt(attempt, delay, e))
+                if stop_reason:
+                    self._finish(attempts, operation_name, stop_reason)
+                    raise
+                time.sleep(delay)
+                continue
+            
+            attempts.append(RetryAttempt(attempt, 0.0))
+            self._finish(attempts, operation_name)
+            return result
+    
+    async def execute_async(self,
+                            operation: Callable[[], Awaitable[T]],
+                            operation_name: str,
+                            deadline: Optional[float] = None,
+                            retryable: Optional[Callable[[Exception], bool]] = None) -> T:
+        """execute() の asyncio 版（バックオフ中はイベントループをブロックしない）
         
-        # 統計情報更新
+        Args:
+            operation: コルーチンを返す引数なしの関数。リトライ時は再度呼び出す
+            operation_name: 操作名（ログ用）
+            deadline: 期限（time.monotonic() 基準）
+            retryable: 追加のリトライ条件（execute() と同じ）
+        """
+        attempts: List[RetryAttempt] = []
+        
+        for attempt in range(self.config.max_retries + 1):
+            self.logger.debug(f"[{operation_name}] Attempt {attempt + 1}/{self.config.max_retries + 1}")
+            try:
+                result = await operation()
+            except Exception as e:
+                delay, stop_reason = self._next_delay(e, attempt, deadline, operation_name, retryable)
+                attempts.append(RetryAttempt(attempt, delay, e))
+                if stop_reason:
+                    self._finish(attempts, operation_name, stop_reason)
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            
+            attempts.append(RetryAttempt(attempt, 0.0))
+            self._finish(attempts, operation_name)
+            return result
+    
+    def _next_delay(self, exception: Exception, attempt: int,
+                    deadline: Optional[float], operation_name: str,
+                    retryable: Optional[Callable[[Exception], bool]] = None) -> Tuple[float, Optional[str]]:
+        """次の試行までの待機時間とリトライ停止理由（リトライする場合はNone）"""
+        if isinstance(exception, DeadlineExceededError):
+            stop_reason = "deadline"
+        elif attempt >= self.config.max_retries:
+            stop_reason = "max_retries"
+        elif not self.should_retry(exception, attempt) or (retryable is not None and not retryable(exception)):
+            stop_reason = "not_retryable"
+        else:
+            delay = self.calculate_delay(attempt)
+            if deadline is None or time.monotonic() + delay < deadline:
+                self.logger.warning(
+                    f"[{operation_name}] Attempt {attempt + 1} failed: {str(exception)}. "
+                    f"Retrying in {delay:.2f} seconds..."
+                )
+                return delay, None
+            stop_reason = "deadline"
+        
+        self.logger.error(
+            f"[{operation_name}] Operation failed permanently ({stop_reason}) "
+            f"after {attempt + 1} attempt(s): {str(exception)}"
+        )
+        return 0.0, stop_reason
+    
+    def _finish(self, attempts: List[RetryAttempt], operation_name: str,
+                stop_reason: Optional[str] = None) -> None:
+        """統計情報を更新し、失敗時は例外にリトライ情報を設定"""
         self.statistics.update(attempts, operation_name)
         
-        # 最終的に失敗した場合は例外を再発生
-        if last_exception and not attempts[-1].success:
-            # 元の例外にリトライ情報を追加
-            if isinstance(last_exception, PluginError):
-                last_exception.retry_info = {
-                    "total_attempts": len(attempts),
-                    "max_retries": self.config.max_retries,
-                    "total_delay": sum(attempt.delay for attempt in attempts),
-                    "attempts": [
-                        {
-                            "attempt": attempt.attempt_number + 1,
-                            "delay": attempt.delay,
-                            "error": str(attempt.exception) if attempt.exception else None,
-                            "timestamp": attempt.timestamp.isoformat()
-                        }
-                        for attempt in attempts
-                    ]
+        last = attempts[-1]
+        if last.success:
+            if len(attempts) > 1:
+                self.logger.info(f"[{operation_name}] Operation succeeded on attempt {len(attempts)}")
+        elif isinstance(last.exception, PluginError):
+            last.exception.retry_info = self.build_retry_info(attempts, stop_reason)
+    
+    def build_retry_info(self, attempts: List[RetryAttempt],
+                         stop_reason: Optional[str] = None) -> Dict[str, Any]:
+        """エラー応答の retry_info に設定するリトライ情報
+        
+        stop_reason: max_retries（回数上限）・not_retryable（リトライ対象外）・deadline（期限）
+        """
+        return {
+            "attempts": len(attempts),
+            "max_retries": self.config.max_retries,
+            "delays": [round(attempt.delay, 3) for attempt in attempts[:-1]],
+            "total_delay": round(sum(attempt.delay for attempt in attempts), 3),
+            "stop_reason": stop_reason,
+            "errors": [
+                {
+                    "attempt": attempt.attempt_number + 1,
+                    "error": str(attempt.exception),
+                    "timestamp": attempt.timestamp.isoformat()
                 }
-            raise last_exception
+                for attempt in attempts if attempt.exception is not None
+            ]
+        }
     
     def retry_operation(self, 
                        operation: Callable[[], Any], 
                        operation_name: str,
-                       context: Optional[Dict[str, Any]] = None) -> Any:
-        """操作をリトライ付きで実行
+                       context: Optional[Dict[str, Any]] = None,
+                       deadline: Optional[float] = None) -> Any:
+        """操作をリトライ付きで実行（失敗時にコンテキスト情報をログ出力）
         
         Args:
             operation: 実行する操作（関数）
             operation_name: 操作名
             context: 追加コンテキスト情報
+            deadline: 期限（time.monotonic() 基準）
         
         Returns:
             操作の実行結果
         """
-        with self.retry_context(operation_name) as attempt:
-            try:
-                result = operation()
-                
-                # 成功ログ
-                if context:
-                    self.logger.debug(f"[{operation_name}] Context: {context}")
-                
-                return result
-                
-            except Exception as e:
-                # エラーログ
-                if context:
-                    self.logger.error(f"[{operation_name}] Failed with context {context}: {str(e)}")
-                raise
+        try:
+            result = self.execute(operation, operation_name, deadline=deadline)
+        except Exception as e:
+            if context:
+                self.logger.error(f"[{operation_name}] Failed with context {context}: {str(e)}")
+            raise
+        
+        if context:
+            self.logger.debug(f"[{operation_name}] Context: {context}")
+        return result
     
     def get_statistics(self) -> Dict[str, Any]:
         """リトライ統計情報を取得"""
@@ -0,0 +1,194 @@
+"""
+IF-HUB プラグインシステム ローリングウィンドウキャッシュ
+
+addplot処理のように短い間隔で同じ遡及期間を繰り返し取得する処理向けに、
+前回取得したタグ時系列を logs/{equipment}/ に保持し、差分取得を可能にします。
+"""
+
+import os
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .timeseries import TagSeries
+
+
+class RollingWindowCache:
+    """設備別ローリングウィンドウキャッシュ
+    
+    キャッシュはタグ（カラム）ごとの時系列と、取得済みデータの最新時刻（タグ別のハイウォーターマーク）、
+    キャッシュが網羅している期間の開始時刻を保持します。
+    差分取得は「最も遅れているタグのハイウォーターマーク - overlap」以降を対象とし、その範囲の
+    キャッシュは新たに取得したデータで置き換えます（遅延到着データの取り込み）。
+    他のタグより遅れて到着するタグのデータも、最新のタグに合わせて読み飛ばすことはありません。
+    
+    設備ロック下で使用することを前提とし、ファイルの排他制御は行いません。
+    """
+    
+    CACHE_VERSION = 2
+    
+    def __init__(self, equipment_name: str, overlap_ns: int,
+                 cache_name: str = "addplot_cache",
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            equipment_name: 設備名
+            overlap_ns: 差分取得時にハイウォーターマークから遡る幅（ナノ秒）
+            cache_name: キャッシュファイル名（拡張子なし）
+            logger: ロガー
+        """
+        self.equipment_name = equipment_name
+        self.overlap_ns = int(overlap_ns)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        self.cache_dir = Path("logs") / equipment_name
+        self.cache_file = self.cache_dir / f"{cache_name}.npz"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        self.series: Dict[str, TagSeries] = {}
+        self.high_water_marks: Dict[str, int] = {}
+        self.covered_from: Optional[int] = None
+    
+    def load(self, signature: List[List[str]], window_start_ns: int) -> bool:
+        """キャッシュ読み込み
+        
+        Args:
+            signature: タグ構成（[タグ名, カラム名] のリスト）。前回と異なる場合はキャッシュを使用しない
+            window_start_ns: 今回の取得期間の開始時刻（エポックナノ秒）
+        
+        Returns:
+            差分取得に使用可能なキャッシュが読み込めた場合True
+        """
+        self._reset()
+        
+        if not self.cache_file.exists():
+            return False
+        
+        try:
+            with np.load(self.cache_file) as archive:
+                meta = json.loads(str(archive['meta']))
+                if meta.get('version') != self.CACHE_VERSION:
+                    self.logger.info("Rolling cache version mismatch, performing full fetch")
+                    return False
+                
+                columns = archive['columns'].tolist()
+                series = {
+                    column_name: TagSeries(archive[f'epochs_{i}'], archive[f'values_{i}'])
+                    for i, column_name in enumerate(columns)
+                }
+        except Exception as e:
+            self.logger.warning(f"Failed to load rolling cache {self.cache_file}: {e}")
+            return False
+        
+        if meta.get('signature') != signature:
+            self.logger.info("Tag configuration changed since last run, performing full fetch")
+            return False
+        
+        high_water_marks = meta.get('high_water_marks')
+        covered_from = meta.get('covered_from')
+        if not high_water_marks or covered_from is None:
+            return False
+        
+        if covered_from > window_start_ns or max(high_water_marks.values()) < window_start_ns:
+            # キャッシュが今回の期間の先頭を網羅していない、または期間外まで古い
+            self.logger.info("Rolling cache does not cover the requested window, performing full fetch")
+            return False
+        
+        self.series = series
+        self.high_water_marks = {column_name: int(mark) for column_name, mark in high_water_marks.items()}
+        self.covered_from = int(covered_from)
+        return True
+    
+    def fetch_start_ns(self) -> Optional[int]:
+        """差分取得の開始時刻（キャッシュ未使用時はNone）
+        
+        最も遅れているタグのハイウォーターマークを基準とします。
+        期間内にデータがないタグは基準に含めません。
+        """
+        if not self.high_water_marks:
+            return None
+        return max(min(self.high_water_marks.values()) - self.overlap_ns, self.covered_from)
+    
+    def merge(self, fetched: Dict[str, TagSeries], fetch_start_ns: int,
+              window_start_ns: int) -> Dict[str, TagSeries]:
+        """取得データをキャッシュに反映し、期間外の古いデータを破棄
+        
+        Args:
+            fetched: 今回取得したカラム名 -> 時系列（取得に失敗したカラムは含めない）
+            fetch_start_ns: 今回の取得開始時刻（この時刻以降のキャッシュは取得データで置き換え）
+            window_start_ns: 今回の取得期間の開始時刻（この時刻より前のデータを破棄）
+        
+        Returns:
+            期間内のカラム名 -> 時系列
+        """
+        merged: Dict[str, TagSeries] = {}
+        columns = list(self.series) + [c for c in fetched if c not in self.series]
+        
+        for column_name in columns:
+            cached = self.series.get(column_name, TagSeries.empty())
+            
+            if column_name in fetched:
+                keep = cached.epochs < fetch_start_ns
+                new = fetched[column_name]
+                epochs = np.concatenate([cached.epochs[keep], new.epochs])
+                values = np.concatenate([cached.values[keep], new.values])
+            else:
+                epochs, values = cached.epochs, cached.values
+            
+            in_window = epochs >= window_start_ns
+            merged[column_name] = TagSeries(epochs[in_window], values[in_window])
+        
+        self.series = merged
+        self.high_water_marks = {
+            column_name: int(tag_series.epochs.max())
+            for column_name, tag_series in merged.items() if len(tag_series)
+        }
+        self.covered_from = window_start_ns if self.covered_from is None else max(self.covered_from, window_start_ns)
+        return merged
+    
+    def save(self, signature: List[List[str]]) -> None:
+        """キャッシュ書き込み（一時ファイル経由で置き換え）"""
+        if not self.high_water_marks:
+            self.invalidate()
+            return
+        
+        columns = list(self.series)
+        arrays = {'columns': np.array(columns, dtype=str)}
+        for i, column_name in enumerate(columns):
+            arrays[f'epochs_{i}'] = self.series[column_name].epochs
+            arrays[f'values_{i}'] = self.series[column_name].values
+        arrays['meta'] = np.array(json.dumps({
+            'version': self.CACHE_VERSION,
+            'signature': signature,
+            'high_water_marks': self.high_water_marks,
+            'covered_from': self.covered_from
+        }))
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{self.cache_file.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.cache_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    def invalidate(self) -> None:
+        """キャッシュ破棄（次回は全期間を取得）"""
+        self._reset()
+        try:
+            self.cache_file.unlink()
+        except FileNotFoundError:
+            pass
+    
+    def _reset(self) -> None:
+        self.series = {}
+        self.high_water_marks = {}
+        self.covered_from = None
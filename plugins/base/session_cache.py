@@ -0,0 +1,161 @@
+"""
+IF-HUB プラグインシステム セッションキーキャッシュ
+
+toorPIA API のセッションキーを logs/session_cache/ にファイルとして保持し、
+同一ホスト上の複数プロセス（設備ごとのcron実行など）で共有します。
+ファイルは flock で排他制御し、認証中は他プロセスを待機させることで
+有効期限切れ時のログイン集中を防ぎます。
+"""
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Any, Generator, Optional
+
+
+class SessionKeyCache:
+    """(API URL, APIキー) 単位のセッションキーキャッシュ
+    
+    APIキーそのものは保存せず、キャッシュファイル名の導出にハッシュ値のみを使用します。
+    """
+    
+    def __init__(self, api_url: str, api_key: str, ttl_seconds: float,
+                 cache_dir: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            api_url: toorPIA API URL
+            api_key: APIキー
+            ttl_seconds: セッションキーの再利用期間（秒）
+            cache_dir: キャッシュディレクトリ（デフォルト: logs/session_cache）
+            logger: ロガー
+        """
+        self.api_url = api_url
+        self.ttl_seconds = float(ttl_seconds)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        key_hash = hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+        cache_key = hashlib.sha256(f"{api_url}\n{key_hash}".encode('utf-8')).hexdigest()[:24]
+        
+        self.cache_dir = Path(cache_dir or Path("logs") / "session_cache")
+        self.cache_file = self.cache_dir / f"{cache_key}.json"
+        self.lock_file = self.cache_dir / f"{cache_key}.lock"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def get_or_create(self, authenticate: Callable[[], str]) -> str:
+        """有効なセッションキーを返す（期限切れ・未取得の場合は認証して保存）
+        
+        Args:
+            authenticate: 認証を行いセッションキーを返す関数
+        """
+        with self._locked():
+            entry = self._read()
+            if entry is not None:
+                return entry['session_key']
+            return self._create(authenticate)
+    
+    def refresh(self, rejected_key: Optional[str], authenticate: Callable[[], str]) -> str:
+        """拒否されたセッションキーを置き換え
+        
+        他プロセスが既に新しいセッションキーを取得済みの場合は、再認証せずにそれを返します。
+        
+        Args:
+            rejected_key: APIに拒否されたセッションキー
+            authenticate: 認証を行いセッションキーを返す関数
+        """
+        with self._locked():
+            entry = self._read()
+            if entry is not None and entry['session_key'] != rejected_key:
+                return entry['session_key']
+            return self._create(authenticate)
+    
+    def get(self) -> Optional[str]:
+        """有効なセッションキー（期限切れ・未取得の場合はNone）
+        
+        ファイルは置き換えで更新されるため、flock を待たずに読み込みます
+        （他プロセスの認証中にイベントループを止めない非同期クライアント向け）。
+        認証後は put() で保存します。
+        """
+        entry = self._read()
+        return entry['session_key'] if entry is not None else None
+    
+    def put(self, session_key: str) -> None:
+        """認証で取得したセッションキーを保存"""
+        self._write({
+            'api_url': self.api_url,
+            'session_key': session_key,
+            'obtained_at': time.time()
+        })
+    
+    def invalidate(self) -> None:
+        """キャッシュ破棄"""
+        with self._locked():
+            self._remove()
+    
+    @contextmanager
+    def _locked(self) -> Generator[None, None, None]:
+        with open(self.lock_file, 'a') as lock_fd:
+            fcntl.flock(lock_fd.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fd.fileno(), fcntl.LOCK_UN)
+    
+    def _create(self, authenticate: Callable[[], str]) -> str:
+        session_key = authenticate()
+        try:
+            self._write({
+                'api_url': self.api_url,
+                'session_key': session_key,
+                'obtained_at': time.time()
+            })
+        except OSError as e:
+            # 保存に失敗しても取得したセッションキーはそのまま使用する
+            self.logger.warning(f"Failed to write session cache {self.cache_file}: {e}")
+        return session_key
+    
+    def _read(self) -> Optional[Dict[str, Any]]:
+        """有効期限内のエントリ読み込み（期限切れ・破損時はNone）"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read session cache {self.cache_file}: {e}")
+            return None
+        
+        if not isinstance(entry, dict) or not entry.get('session_key'):
+            return None
+        
+        age = time.time() - float(entry.get('obtained_at', 0))
+        if age < 0 or age >= self.ttl_seconds:
+            return None
+        
+        return entry
+    
+    def _write(self, entry: Dict[str, Any]) -> None:
+        """一時ファイル経由で置き換え（mkstemp により所有者のみ読み書き可能）"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{self.cache_file.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _remove(self) -> None:
+        try:
+            self.cache_file.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,347 @@
+"""
+IF-HUB プラグインシステム データ応答ストリーミングデコーダー
+
+/api/data/:tagName・/api/batch の応答本文を逐次読み込み、data 配列の {timestamp, value} を
+データポイントごとの辞書を生成せずにエポック・値の配列へ直接変換します。
+"""
+
+import re
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .timeseries import TagSeries, iso_to_epoch_ns, to_float_array
+
+
+# データポイント（キー順 timestamp, value のフラットなオブジェクト）
+_POINT_PATTERN = re.compile(
+    r'"timestamp"\s*:\s*"([^"]*)"\s*,\s*"value"\s*:\s*(null|true|false|"(?:[^"\\]|\\.)*"|[^,}\s]+)\s*\}'
+)
+# キー順が異なる等で上記に一致しない場合のオブジェクト単位の切り出し
+_OBJECT_PATTERN = re.compile(r'\{[^{}]*\}')
+
+_WHITESPACE = b' \t\r\n'
+
+
+class DataPointStreamDecoder:
+    """data 配列の逐次デコーダー
+    
+    使用例:
+        decoder = DataPointStreamDecoder()
+        for chunk in response.iter_content(chunk_size=262144):
+            decoder.feed(chunk)
+        series = decoder.close()
+    
+    データポイントはネストを含まないオブジェクトであることを前提とします
+    （IF-HUB のデータ応答は {"timestamp": "...", "value": 数値|null} の配列）。
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._state = 'prefix'  # prefix -> array -> done
+        self._scan_pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = -1
+        self._last_string = b''
+        self._data_missing = False
+        self._epochs: List[np.ndarray] = []
+        self._values: List[np.ndarray] = []
+        self.count = 0
+        # デコード終了後の未読部分（data 配列・オブジェクトの後続。/api/batch の後続タグを含む）
+        self.remainder = b''
+        self.object_closed = False
+    
+    def feed(self, chunk: bytes) -> None:
+        """応答本文の断片を投入"""
+        if self._state == 'done' or not chunk:
+            return
+        
+        self._buffer += chunk
+        
+        if self._state == 'prefix':
+            start = self._find_data_array()
+            if start is None:
+                return
+            del self._buffer[:start]
+            self._state = 'array'
+        
+        if self._state == 'array':
+            self._consume_points()
+    
+    @property
+    def done(self) -> bool:
+        """data 配列の終端（または data のないオブジェクトの終端）まで読み込んだか"""
+        return self._state == 'done'
+    
+    def close(self) -> TagSeries:
+        """デコード結果の取得
+        
+        Raises:
+            ValueError: data 配列が見つからない、または途中で終了している場合
+        """
+        if self._state == 'prefix':
+            raise ValueError("Response does not contain a data array")
+        if self._state == 'array':
+            raise ValueError("Response ended before the data array was closed")
+        
+        if not self._epochs:
+            return TagSeries.empty()
+        
+        return TagSeries(np.concatenate(self._epochs), np.concatenate(self._values))
+    
+    def _find_data_array(self) -> Optional[int]:
+        """トップレベルの "data" キーの配列開始位置（'[' の次）を探索
+        
+        data 配列より前のメタデータ部分のみを1文字ずつ走査します。
+        """
+        buffer = self._buffer
+        pos = self._scan_pos
+        length = len(buffer)
+        
+        while pos < length:
+            char = buffer[pos]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == 0x5C:  # '\\'
+                    self._escape = True
+                elif char == 0x22:  # '"'
+                    self._in_string = False
+                    self._last_string = bytes(buffer[self._key_start:pos])
+                pos += 1
+                continue
+            
+            if char == 0x22:
+                self._in_string = True
+                self._key_start = pos + 1
+            elif char in (0x7B, 0x5B):  # '{' '['
+                self._depth += 1
+            elif char in (0x7D, 0x5D):  # '}' ']'
+                self._depth -= 1
+                if self._depth == 0:
+                    # data キーのないオブジェクト
+                    self._data_missing = True
+                    self._state = 'done'
+                    self.remainder = bytes(buffer[pos + 1:])
+                    self.object_closed = True
+                    return None
+            elif char == 0x3A and self._depth == 1 and self._last_string == b'data':  # ':'
+                # 値の先頭まで読み進める
+                value_pos = pos + 1
+                while value_pos < length and buffer[value_pos] in _WHITESPACE:
+                    value_pos += 1
+                if value_pos >= length:
+                    break
+                if buffer[value_pos] == 0x5B:
+                    return value_pos + 1
+                # data が配列でない（null 等）
+                self._data_missing = True
+                self._state = 'done'
+                self.remainder = bytes(buffer[value_pos:])
+                return None
+            elif char not in _WHITESPACE:
+                self._last_string = b''
+            
+            pos += 1
+        
+        self._scan_pos = pos
+        return None
+    
+    def _consume_points(self) -> None:
+        """バッファ中の完結したデータポイントを配列に変換"""
+        buffer = self._buffer
+        array_end = self._find_array_end()
+        
+        end = buffer.rfind(b'}', 0, len(buffer) if array_end is None else array_end)
+        if end >= 0:
+            self._append_segment(buffer[:end + 1].decode('utf-8'))
+        
+        if array_end is not None:
+            # data 配列以降（他のキー）はデコードしない
+            self._state = 'done'
+            self.remainder = bytes(buffer[array_end + 1:])
+            self._buffer = bytearray()
+        elif end >= 0:
+            del buffer[:end + 1]
+    
+    def _find_array_end(self) -> Optional[int]:
+        """バッファ中の data 配列終端 ']' の位置（文字列内の ']' は除外）
+        
+        バッファは常にデータポイントの区切り位置から始まるため、
+        手前の引用符の数が偶数であれば文字列外と判定できます。
+        """
+        buffer = self._buffer
+        pos = buffer.find(b']')
+        while pos >= 0:
+            quotes = buffer.count(b'"', 0, pos) - buffer.count(b'\\"', 0, pos)
+            if quotes % 2 == 0:
+                return pos
+            pos = buffer.find(b']', pos + 1)
+        return None
+    
+    def _append_segment(self, segment: str) -> None:
+        matches = _POINT_PATTERN.findall(segment)
+        
+        if len(matches) == segment.count('{'):
+            timestamps = [match[0] for match in matches]
+            tokens = [match[1] for match in matches]
+            values = self._parse_values(tokens)
+        else:
+            # キー順が異なる等：オブジェクト単位でJSONとして解析
+            points = [json.loads(obj) for obj in _OBJECT_PATTERN.findall(segment)]
+            timestamps = [point['timestamp'] for point in points]
+            values = to_float_array([point['value'] for point in points])
+        
+        if not timestamps:
+            return
+        
+        self._epochs.append(iso_to_epoch_ns(timestamps))
+        self._values.append(values)
+        self.count += len(timestamps)
+    
+    @staticmethod
+    def _parse_values(tokens: List[str]) -> np.ndarray:
+        """値トークン（JSONリテラル）をfloat64配列に変換
+        
+        JSON解析後に to_float_array() を通した場合と同じ値になります。
+        """
+        try:
+            return np.array(
+                [_LITERALS.get(token, token) for token in tokens], dtype=str
+            ).astype(np.float64)
+        except ValueError:
+            return to_float_array([json.loads(token) for token in tokens])
+
+
+class BatchStreamDecoder:
+    """/api/batch 応答の逐次デコーダー
+    
+    {タグ名: {"metadata": {...}, "data": [...]}, ...} の各タグの data 配列を
+    DataPointStreamDecoder でデコードします。data 配列以外（タグ名・メタデータ）のみを
+    1文字ずつ走査します。
+    
+    使用例:
+        decoder = BatchStreamDecoder()
+        for chunk in response.iter_content(chunk_size=262144):
+            decoder.feed(chunk)
+        series_by_tag = decoder.close()
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = -1
+        self._last_string = b''
+        self._tag_name: Optional[str] = None
+        self._tag_decoder: Optional[DataPointStreamDecoder] = None
+        self._closed = False
+        self.series: Dict[str, TagSeries] = {}
+    
+    def feed(self, chunk: bytes) -> None:
+        """応答本文の断片を投入"""
+        if self._closed or not chunk:
+            return
+        
+        self._buffer += chunk
+        while self._buffer and not self._closed:
+            if self._tag_decoder is not None:
+                self._tag_decoder.feed(bytes(self._buffer))
+                self._buffer = bytearray()
+                if not self._tag_decoder.done:
+                    return
+                self._finish_tag()
+            elif not self._scan():
+                return
+    
+    def close(self) -> Dict[str, TagSeries]:
+        """デコード結果の取得（タグ名 -> 時系列）
+        
+        Raises:
+            ValueError: 応答がオブジェクトでない、または途中で終了している場合
+        """
+        if not self._closed:
+            raise ValueError("Response ended before the batch object was closed")
+        return self.series
+    
+    def _finish_tag(self) -> None:
+        """タグの data 配列のデコード完了（オブジェクトの残りは通常の走査に戻す）"""
+        decoder = self._tag_decoder
+        self.series[self._tag_name] = decoder.close()
+        self._buffer = bytearray(decoder.remainder)
+        self._depth = 1 if decoder.object_closed else 2
+        self._last_string = b''
+        self._tag_name = None
+        self._tag_decoder = None
+    
+    def _scan(self) -> bool:
+        """タグのオブジェクト開始位置まで走査
+        
+        Returns:
+            タグのデコードを開始した場合True（バッファを読み切った場合False）
+        """
+        buffer = self._buffer
+        pos = 0
+        length = len(buffer)
+        
+        while pos < length:
+            char = buffer[pos]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == 0x5C:  # '\\'
+                    self._escape = True
+                elif char == 0x22:  # '"'
+                    self._in_string = False
+                    self._last_string = bytes(buffer[self._key_start:pos])
+                pos += 1
+                continue
+            
+            if char == 0x22:
+                self._in_string = True
+                self._key_start = pos + 1
+            elif char in (0x7B, 0x5B):  # '{' '['
+                if self._depth == 0 and char != 0x7B:
+                    raise ValueError("Batch response is not an object")
+                self._depth += 1
+            elif char in (0x7D, 0x5D):  # '}' ']'
+                self._depth -= 1
+                if self._depth == 0:
+                    self._closed = True
+                    self._buffer = bytearray()
+                    return False
+            elif char == 0x3A and self._depth == 1 and self._last_string:  # ':'
+                # トップレベルのキー（タグ名）の値がオブジェクトであればタグ単位でデコード
+                value_pos = pos + 1
+                while value_pos < length and buffer[value_pos] in _WHITESPACE:
+                    value_pos += 1
+                if value_pos >= length:
+                    break
+                if buffer[value_pos] == 0x7B:
+                    self._tag_name = json.loads(b'"' + self._last_string + b'"')
+                    self._tag_decoder = DataPointStreamDecoder()
+                    self._buffer = bytearray(buffer[value_pos:])
+                    return True
+                self._last_string = b''
+            elif char not in _WHITESPACE:
+                self._last_string = b''
+            
+            pos += 1
+        
+        # 文字列の途中で終わった場合は引用符から走査し直す（キーの値の手前で終わった場合は ':' から）
+        if self._in_string:
+            self._in_string = False
+            self._escape = False
+            pos = self._key_start - 1
+        self._buffer = bytearray(buffer[pos:])
+        return False
+
+
+# JSONリテラルの数値表現（null は欠損）
+_LITERALS = {'null': 'nan', 'true': '1', 'false': '0'}
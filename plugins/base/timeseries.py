@@ -0,0 +1,205 @@
+"""
+IF-HUB プラグインシステム 時系列カラム処理
+
+タグごとの時系列を (int64エポック, float64値) の配列ペアとして扱い、
+複数タグの時刻整列・タイムスタンプ整形・CSV出力をベクトル化して行います。
+"""
+
+import warnings
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# JSONで整数として表現される値の上限（JavaScriptの Number#toString が指数表記に切り替わる境界）
+_INTEGER_REPR_LIMIT = 1e21
+
+
+class TagSeries:
+    """1タグ分の時系列（エポックナノ秒 + 値）"""
+    
+    def __init__(self, epochs: np.ndarray, values: np.ndarray):
+        """
+        Args:
+            epochs: UTCエポックナノ秒（int64）
+            values: 値（float64、欠損はNaN）
+        """
+        self.epochs = np.asarray(epochs, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+    
+    def __len__(self) -> int:
+        return len(self.epochs)
+    
+    @classmethod
+    def empty(cls) -> 'TagSeries':
+        """空の時系列"""
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    
+    @classmethod
+    def from_points(cls, points: List[Dict[str, Any]]) -> 'TagSeries':
+        """IF-HUB APIの {timestamp, value} リストから変換"""
+        if not points:
+            return cls.empty()
+        
+        epochs = iso_to_epoch_ns([point['timestamp'] for point in points])
+        values = to_float_array([point['value'] for point in points])
+        return cls(epochs, values)
+
+
+def to_float_array(values: List[Any]) -> np.ndarray:
+    """値リストをfloat64配列に変換（None・数値以外はNaN）"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def iso_to_epoch_ns(timestamps: List[str]) -> np.ndarray:
+    """ISO 8601文字列をUTCエポックナノ秒（int64）に一括変換
+    
+    タイムゾーン指定のない文字列はUTCとして扱います。
+    """
+    if len(timestamps) == 0:
+        return np.empty(0, dtype=np.int64)
+    
+    try:
+        # 高速パス：末尾の 'Z' を除いてNumPyで直接解析（オフセット付きはUTCに換算される）
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            parsed = np.array(
+                [ts[:-1] if ts.endswith('Z') else ts for ts in timestamps],
+                dtype='datetime64[ns]'
+            )
+        return parsed.view(np.int64)
+    except (TypeError, ValueError, AttributeError):
+        pass
+    
+    try:
+        parsed = pd.to_datetime(timestamps, utc=True, format='ISO8601')
+    except (TypeError, ValueError):
+        # pandas 1.x は format='ISO8601' 非対応のため推論に任せる
+        parsed = pd.to_datetime(timestamps, utc=True)
+    
+    return parsed.tz_convert(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def format_epochs(epochs: np.ndarray) -> np.ndarray:
+    """エポックナノ秒を "YYYY-MM-DD HH:MM:SS" 形式に一括変換（秒未満は切り捨て）"""
+    seconds = np.asarray(epochs, dtype=np.int64).view('datetime64[ns]').astype('datetime64[s]')
+    return np.char.replace(np.datetime_as_string(seconds, unit='s'), 'T', ' ')
+
+
+def epoch_ns_to_iso(epoch_ns: int) -> str:
+    """エポックナノ秒をIF-HUB APIの期間指定用UTC文字列に変換（ミリ秒未満は切り捨て）"""
+    return np.datetime_as_string(np.datetime64(int(epoch_ns), 'ns'), unit='ms') + 'Z'
+
+
+def align_series(series: Dict[str, TagSeries]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """複数タグの時系列を全時刻の和集合で外部結合
+    
+    Args:
+        series: カラム名 -> 時系列（挿入順がカラム順）
+    
+    Returns:
+        (昇順の時刻配列, カラム名 -> 時刻配列に整列した値配列)
+        値が存在しない時刻はNaNになります。
+    """
+    if not series:
+        return np.empty(0, dtype=np.int64), {}
+    
+    all_epochs = np.unique(np.concatenate([s.epochs for s in series.values()]))
+    
+    columns: Dict[str, np.ndarray] = {}
+    for column_name, tag_series in series.items():
+        aligned = np.full(len(all_epochs), np.nan, dtype=np.float64)
+        if len(tag_series):
+            # 同一時刻の重複は後勝ち（辞書への逐次代入と同じ挙動）
+            positions = np.searchsorted(all_epochs, tag_series.epochs)
+            aligned[positions] = tag_series.values
+        columns[column_name] = aligned
+    
+    return all_epochs, columns
+
+
+def build_frame(series: Dict[str, TagSeries]) -> pd.DataFrame:
+    """タグ時系列を整列し、timestamp列 + float64値列のDataFrameを構築
+    
+    CSV出力時の数値表現を従来（行辞書からのDataFrame生成）と揃えるため、
+    整数値を整数表記するカラムを frame.attrs['integer_columns'] に記録します。
+    欠損時刻を含むカラム（object型になっていたもの）と、欠損なしで全値が
+    整数のカラム（int64型になっていたもの）が該当します。
+    """
+    epochs, columns = align_series(series)
+    
+    integer_columns = []
+    for column_name, values in columns.items():
+        present = np.zeros(len(epochs), dtype=bool)
+        present[np.searchsorted(epochs, series[column_name].epochs)] = True
+        has_gap = not present.all()
+        all_integers = bool((np.isfinite(values) & (values == np.trunc(values))).all())
+        if has_gap or all_integers:
+            integer_columns.append(column_name)
+    
+    frame = pd.DataFrame(columns, index=pd.RangeIndex(len(epochs)))
+    frame.insert(0, 'timestamp', format_epochs(epochs).astype(object))
+    frame.attrs['integer_columns'] = integer_columns
+    return frame
+
+
+def format_values(values: np.ndarray, integers_as_int: bool = False) -> np.ndarray:
+    """float64配列をCSV用文字列に一括変換
+    
+    値は最短表現（repr相当）、欠損（NaN）は空文字になります。
+    integers_as_int がTrueの場合、IF-HUB APIのJSONで整数として返る値は "5" と表記します。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = values.astype(str).astype(object)
+    
+    finite = np.isfinite(values)
+    integral = finite & (np.abs(values) < _INTEGER_REPR_LIMIT) & (values == np.trunc(values))
+    if integers_as_int and integral.any():
+        # int64に収まる範囲はベクトル変換し、それを超える値のみ個別に変換
+        small = integral & (np.abs(values) < 2.0 ** 63)
+        result[small] = values[small].astype(np.int64).astype(str)
+        large = integral & ~small
+        if large.any():
+            result[large] = [str(int(v)) for v in values[large]]
+    
+    result[np.isnan(values)] = ''
+    return result
+
+
+def write_csv(frame: pd.DataFrame, path: str) -> None:
+    """build_frame() で構築したDataFrameをCSV出力"""
+    integer_columns = set(frame.attrs.get('integer_columns', []))
+    
+    formatted = {'timestamp': frame['timestamp']}
+    for column_name in frame.columns[1:]:
+        formatted[column_name] = format_values(
+            frame[column_name].to_numpy(), column_name in integer_columns
+        )
+    
+    pd.DataFrame(formatted, columns=frame.columns).to_csv(path, index=False)
+
+
+def save_npz(frame: pd.DataFrame, path: str) -> None:
+    """build_frame() で構築したDataFrameをnpz形式で保存（デバッグ用）"""
+    value_columns = list(frame.columns[1:])
+    np.savez(
+        path,
+        timestamp=frame['timestamp'].to_numpy(dtype=str),
+        columns=np.array(value_columns, dtype=str),
+        values=frame[value_columns].to_numpy(dtype=np.float64),
+        integer_columns=np.array(frame.attrs.get('integer_columns', []), dtype=str)
+    )
+
+
+def load_npz(path: str) -> pd.DataFrame:
+    """save_npz() で保存したデータをDataFrameとして読み込み"""
+    with np.load(path) as archive:
+        columns = archive['columns'].tolist()
+        frame = pd.DataFrame(archive['values'], columns=columns)
+        frame.insert(0, 'timestamp', archive['timestamp'].astype(object))
+        frame.attrs['integer_columns'] = archive['integer_columns'].tolist()
+    return frame
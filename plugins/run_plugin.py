@@ -6,9 +6,13 @@ IF-HUB 統一プラグイン実行システム
 import sys
 import os
 import argparse
+import atexit
+import re
 import importlib
+import importlib.util
 import json
-from typing import Dict, Any, Optional
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 # プラグインディレクトリをPythonパスに追加
@@ -46,10 +50,23 @@ def load_plugin(plugin_type: str, plugin_name: str):
     except ImportError as e:
         raise ImportError(f"Failed to load plugin {plugin_type}/{plugin_name}: {e}")
 
+# 読み込み済みメタデータ（パス -> ((mtime_ns, size), メタデータ)）
+_manifest_cache: Dict[str, Tuple[Tuple[int, int], Optional[Dict[str, Any]]]] = {}
+
+# 依存関係チェック結果（環境パス -> (検証キー, 不足・不一致の内容。問題なしはNone)）
+_dependency_cache: Dict[str, Tuple[Dict[str, Any], Optional[str]]] = {}
+
+# 仮想環境に保存する依存関係チェック結果のファイル名
+DEPENDENCY_CHECK_FILE = ".ifhub_dependency_check.json"
+
 def load_plugin_meta(plugin_type: str, plugin_name: str) -> Optional[Dict[str, Any]]:
     """
     プラグインメタデータ読み込み
     
+    plugin_meta.yaml の更新時刻・サイズが変わらない限り、プロセス内ではキャッシュを返し、
+    プロセス間では __pycache__/plugin_meta.json に保存した解析済みの内容を使用します
+    （YAMLの読み込み・解析を省略）。
+    
     Args:
         plugin_type: プラグインタイプ
         plugin_name: プラグイン名
@@ -60,18 +77,63 @@ def load_plugin_meta(plugin_type: str, plugin_name: str) -> Optional[Dict[str, A
     if plugin_type not in PLUGIN_TYPES:
         return None
     
-    meta_path = Path(f"plugins/{PLUGIN_TYPES[plugin_type]}/{plugin_name}/plugin_meta.yaml")
+    meta_path = Path(project_root) / "plugins" / PLUGIN_TYPES[plugin_type] / plugin_name / "plugin_meta.yaml"
     
-    if not meta_path.exists():
+    try:
+        stat = meta_path.stat()
+    except OSError:
         return None
     
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _manifest_cache.get(str(meta_path))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    compiled_path = meta_path.parent / "__pycache__" / "plugin_meta.json"
+    meta = _load_compiled_manifest(compiled_path, signature)
+    if meta is None:
+        try:
+            import yaml
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = yaml.safe_load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load plugin metadata: {e}")
+            return None
+        _save_compiled_manifest(compiled_path, signature, meta)
+    
+    _manifest_cache[str(meta_path)] = (signature, meta)
+    return meta
+
+def _load_compiled_manifest(compiled_path: Path, signature: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+    """解析済みメタデータ読み込み（元のYAMLと更新時刻・サイズが一致しない場合はNone）"""
     try:
-        import yaml
-        with open(meta_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    except Exception as e:
-        print(f"Warning: Failed to load plugin metadata: {e}")
+        with open(compiled_path, 'r', encoding='utf-8') as f:
+            compiled = json.load(f)
+    except (OSError, ValueError):
         return None
+    
+    if not isinstance(compiled, dict) or compiled.get('source') != list(signature):
+        return None
+    return compiled.get('meta')
+
+def _save_compiled_manifest(compiled_path: Path, signature: Tuple[int, int], meta: Any) -> None:
+    """解析済みメタデータ保存（書き込めない環境やJSONで表せない内容の場合は保存しない）"""
+    if not isinstance(meta, dict):
+        return
+    
+    try:
+        body = json.dumps({'source': list(signature), 'meta': meta}, ensure_ascii=False)
+        compiled_path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=compiled_path.parent, prefix='.plugin_meta.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(body)
+            os.replace(tmp_path, compiled_path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    except (OSError, TypeError, ValueError):
+        pass
 
 def validate_plugin_requirements(plugin_type: str, plugin_name: str) -> bool:
     """
@@ -84,7 +146,10 @@ def validate_plugin_requirements(plugin_type: str, plugin_name: str) -> bool:
     Returns:
         バリデーション結果
     """
-    meta = load_plugin_meta(plugin_type, plugin_name)
+    return _validate_requirements(load_plugin_meta(plugin_type, plugin_name))
+
+def _validate_requirements(meta: Optional[Dict[str, Any]]) -> bool:
+    """読み込み済みメタデータによる要件バリデーション"""
     if not meta:
         return True  # メタデータがない場合はスキップ
     
@@ -94,11 +159,9 @@ def validate_plugin_requirements(plugin_type: str, plugin_name: str) -> bool:
     if venv_info.get('offline_mode', False):
         # 仮想環境の存在確認のみ実施
         if 'venv_path' in venv_info:
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            venv_path = os.path.join(project_root, "plugins", venv_info["venv_path"])
-            python_exe = os.path.join(venv_path, "bin", "python")
+            venv_path = _get_venv_path(meta)
             
-            if os.path.isfile(python_exe) and os.access(python_exe, os.X_OK):
+            if _get_venv_python(meta):
                 return True  # 仮想環境があれば依存関係はOKとみなす
             else:
                 print(f"Virtual environment not found: {venv_path}")
@@ -126,17 +189,153 @@ def validate_plugin_requirements(plugin_type: str, plugin_name: str) -> bool:
                 print(f"Invalid version format: {required_version}")
                 return False
     
-    # 依存関係チェック（簡易実装）
-    dependencies = requirements.get('dependencies', [])
+    # 依存関係チェック（パッケージは読み込まず、インストール情報のみ確認）
+    problem = _check_dependencies_cached(meta, tuple(requirements.get('dependencies', [])))
+    if problem:
+        print(problem)
+        return False
+    
+    return True
+
+def _check_dependencies_cached(meta: Dict[str, Any], dependencies: Tuple[str, ...]) -> Optional[str]:
+    """依存関係チェック（結果を環境ごとに保存し、要件・インストール内容が変わるまで再利用）
+    
+    確認対象は実行中の環境（sys.prefix）です。仮想環境で動作している場合は、結果を仮想環境の
+    .ifhub_dependency_check.json に保存し、次の値が一致する間はプロセス間でも確認を省略します。
+    
+    - 環境のパス・依存関係の指定
+    - requirements_file の更新時刻・サイズ
+    - site-packages の更新時刻（パッケージの追加・削除・更新で変わる）
+    """
+    env_path = os.path.realpath(sys.prefix)
+    key = {
+        'environment': env_path,
+        'dependencies': list(dependencies),
+        'requirements_file': _file_signature(_get_requirements_file(meta)),
+        'site_packages': [_file_signature(path) for path in _site_packages_dirs(env_path)]
+    }
+    
+    cached = _dependency_cache.get(env_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    # システムのPythonの環境には書き込まない
+    check_path = Path(env_path) / DEPENDENCY_CHECK_FILE if sys.prefix != sys.base_prefix else None
+    entry = _load_dependency_check(check_path, key) if check_path else None
+    if entry is not None:
+        problem = entry.get('problem')
+    else:
+        problem = _check_dependencies(dependencies)
+        if check_path:
+            _save_dependency_check(check_path, {'key': key, 'problem': problem})
+    
+    _dependency_cache[env_path] = (key, problem)
+    return problem
+
+def _get_requirements_file(meta: Dict[str, Any]) -> Optional[str]:
+    """requirements_file のパス（plugins/venv_management からの相対パス）"""
+    requirements_file = meta.get('venv_requirements', {}).get('requirements_file')
+    if not requirements_file:
+        return None
+    return os.path.join(plugin_dir, "venv_management", requirements_file)
+
+def _site_packages_dirs(env_path: str) -> List[str]:
+    """環境内の site-packages ディレクトリ"""
+    return sorted({
+        path for path in sys.path
+        if os.path.basename(path) == 'site-packages' and os.path.realpath(path).startswith(env_path + os.sep)
+    })
+
+def _file_signature(path: Optional[str]) -> Optional[List[Any]]:
+    """更新時刻・サイズ（存在しない場合はNone）"""
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+def _load_dependency_check(check_path: Path, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """保存済みの依存関係チェック結果（検証キーが一致しない場合はNone）"""
+    try:
+        with open(check_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(entry, dict) or entry.get('key') != key:
+        return None
+    return entry
+
+def _save_dependency_check(check_path: Path, entry: Dict[str, Any]) -> None:
+    """依存関係チェック結果の保存（書き込めない環境では保存しない）"""
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=check_path.parent, prefix='.ifhub_dependency_check.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, check_path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    except OSError:
+        pass
+
+# 依存関係指定（例: "pandas>=1.3.0", "pyyaml"）
+_REQUIREMENT_PATTERN = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+def _check_dependencies(dependencies: Tuple[str, ...]) -> Optional[str]:
+    """現在の環境にインストールされた依存関係のバージョン確認（問題がなければNone）
+    
+    importlib.metadata でディストリビューションのバージョンを確認し、メタデータがない場合は
+    importlib.util.find_spec でモジュールの存在のみ確認します（いずれもパッケージは読み込まない）。
+    バージョン指定は packaging（PEP 440）で評価し、packaging がない環境では存在のみ確認します。
+    """
+    from importlib import metadata
+    try:
+        from packaging.requirements import InvalidRequirement, Requirement
+        from packaging.version import InvalidVersion, Version
+    except ImportError:
+        Requirement = None
+    
     for dep in dependencies:
-        package_name = dep.split('>=')[0].split('==')[0]
+        match = _REQUIREMENT_PATTERN.match(dep)
+        if not match:
+            return f"Invalid dependency specification: {dep}"
+        package_name, specifier = match.group(1), None
+        
+        if Requirement is not None:
+            try:
+                requirement = Requirement(dep)
+            except InvalidRequirement:
+                return f"Invalid dependency specification: {dep}"
+            if requirement.marker is not None and not requirement.marker.evaluate():
+                continue  # この環境では不要な依存関係
+            package_name, specifier = requirement.name, requirement.specifier
+        
+        try:
+            installed = metadata.version(package_name)
+        except metadata.PackageNotFoundError:
+            module_name = package_name.lower().replace('-', '_')
+            try:
+                found = importlib.util.find_spec(module_name) is not None
+            except (ImportError, ValueError):
+                found = False
+            if not found:
+                return f"Missing dependency: {package_name}"
+            continue  # バージョン不明のため存在のみで判定
+        
+        if not specifier:
+            continue
         try:
-            importlib.import_module(package_name)
-        except ImportError:
-            print(f"Missing dependency: {package_name}")
-            return False
+            installed_version = Version(installed)
+        except InvalidVersion:
+            continue  # PEP 440 形式でないバージョンは存在のみで判定
+        if not specifier.contains(installed_version, prereleases=True):
+            return f"Dependency version mismatch: {package_name} {installed} (required {specifier})"
     
-    return True
+    return None
 
 def get_python_executable(plugin_type: str, plugin_name: str) -> str:
     """
@@ -152,24 +351,65 @@ def get_python_executable(plugin_type: str, plugin_name: str) -> str:
     # プラグインメタデータから仮想環境情報取得
     meta = load_plugin_meta(plugin_type, plugin_name)
     
-    if meta and "venv_requirements" in meta:
-        venv_info = meta["venv_requirements"]
-        
-        # オフラインモードかつvenv_pathが指定されている場合
-        if venv_info.get("offline_mode", False) and "venv_path" in venv_info:
-            # プロジェクトルートからの相対パス
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            venv_path = os.path.join(project_root, "plugins", venv_info["venv_path"])
-            python_exe = os.path.join(venv_path, "bin", "python")
-            
-            # 仮想環境のPythonが存在するかチェック
-            if os.path.isfile(python_exe) and os.access(python_exe, os.X_OK):
-                return python_exe
-    
     # フォールバック: システムのpython3
-    return "python3"
+    return _get_venv_python(meta) or "python3"
+
+def _get_venv_path(meta: Optional[Dict[str, Any]]) -> Optional[str]:
+    """オフラインモードのプラグインの仮想環境パス（venv_pathはpluginsディレクトリからの相対パス）"""
+    venv_info = (meta or {}).get("venv_requirements", {})
+    if venv_info.get("offline_mode", False) and "venv_path" in venv_info:
+        return os.path.join(project_root, "plugins", venv_info["venv_path"])
+    return None
 
-def run_plugin(plugin_type: str, plugin_name: str, config_path: str, **kwargs) -> Dict[str, Any]:
+def _get_venv_python(meta: Optional[Dict[str, Any]]) -> Optional[str]:
+    """仮想環境のPython実行ファイル（存在しない場合はNone）"""
+    venv_path = _get_venv_path(meta)
+    if venv_path is None:
+        return None
+    
+    python_exe = os.path.join(venv_path, "bin", "python")
+    if os.path.isfile(python_exe) and os.access(python_exe, os.X_OK):
+        return python_exe
+    return None
+
+def _is_running_in_venv(venv_path: str) -> bool:
+    """現在のインタープリターが指定の仮想環境で動作しているか
+    
+    仮想環境のpythonはシステムのPythonへのシンボリックリンクのため、sys.prefix で判定します。
+    """
+    try:
+        return os.path.samefile(sys.prefix, venv_path)
+    except OSError:
+        return False
+
+# 仮想環境Python別の常駐ワーカー（run_plugin(persistent_worker=True) で使用）
+_venv_workers = {}
+
+def get_venv_worker(python_exe: str):
+    """
+    常駐ワーカー取得（プロセス内で初回呼び出し時に生成し、以降は再利用）
+    
+    Args:
+        python_exe: 仮想環境のPython実行ファイル
+    
+    Returns:
+        VenvWorker
+    """
+    if python_exe not in _venv_workers:
+        from plugins.venv_worker import VenvWorker
+        _venv_workers[python_exe] = VenvWorker(python_exe)
+    return _venv_workers[python_exe]
+
+def close_venv_workers() -> None:
+    """常駐ワーカーをすべて停止（プロセス終了時に呼び出し）"""
+    while _venv_workers:
+        _, worker = _venv_workers.popitem()
+        worker.close()
+
+atexit.register(close_venv_workers)
+
+def run_plugin(plugin_type: str, plugin_name: str, config_path: str,
+               persistent_worker: bool = False, **kwargs) -> Dict[str, Any]:
     """
     プラグイン実行（仮想環境自動選択対応）
     
@@ -177,14 +417,19 @@ def run_plugin(plugin_type: str, plugin_name: str, config_path: str, **kwargs) -
         plugin_type: プラグインタイプ
         plugin_name: プラグイン名
         config_path: 設定ファイルパス
+        persistent_worker: 仮想環境で実行する場合に常駐ワーカーを使用する
+            （False の場合は実行ごとにサブプロセスを起動し、プロセスを分離する）
         **kwargs: 追加オプション
     
     Returns:
         実行結果
     """
     try:
+        # メタデータは1回だけ読み込み、バリデーション・実行方法の判定で共用
+        meta = load_plugin_meta(plugin_type, plugin_name)
+        
         # プラグイン要件バリデーション
-        if not validate_plugin_requirements(plugin_type, plugin_name):
+        if not _validate_requirements(meta):
             return {
                 "status": "error",
                 "error": {
@@ -194,20 +439,25 @@ def run_plugin(plugin_type: str, plugin_name: str, config_path: str, **kwargs) -
             }
         
         # Python実行ファイル取得（仮想環境優先）
-        python_exe = get_python_executable(plugin_type, plugin_name)
+        python_exe = _get_venv_python(meta) or "python3"
         
         # オフライン環境での直接Python実行
-        meta = load_plugin_meta(plugin_type, plugin_name)
-        if meta and meta.get("venv_requirements", {}).get("offline_mode", False):
-            # 仮想環境でプラグインを直接実行
-            result = run_plugin_with_venv(plugin_type, plugin_name, config_path, python_exe, **kwargs)
+        venv_path = _get_venv_path(meta)
+        if meta and meta.get("venv_requirements", {}).get("offline_mode", False) and \
+                not (venv_path and _is_running_in_venv(venv_path)):
+            if persistent_worker:
+                # 仮想環境の常駐ワーカーで実行（インタープリター起動・ライブラリ読み込みを省略）
+                result = get_venv_worker(python_exe).run_job(plugin_type, plugin_name, config_path, kwargs)
+            else:
+                # 仮想環境でプラグインを直接実行
+                result = run_plugin_with_venv(plugin_type, plugin_name, config_path, python_exe, **kwargs)
         else:
-            # 通常のプラグイン読み込み実行
+            # 通常のプラグイン読み込み実行（既に仮想環境のPythonで動作している場合を含む）
             plugin_run = load_plugin(plugin_type, plugin_name)
             result = plugin_run(config_path, **kwargs)
         
         return result
-        
+    
     except Exception as e:
         return {
             "status": "error",
@@ -253,6 +503,8 @@ def run_plugin_with_venv(plugin_type: str, plugin_name: str, config_path: str, p
     # オプション追加
     if kwargs.get("mode"):
         cmd.extend(["--mode", kwargs["mode"]])
+    if kwargs.get("keep_artifacts"):
+        cmd.extend(["--keep-artifacts", kwargs["keep_artifacts"]])
     if kwargs.get("verbose"):
         cmd.append("--verbose")
     
@@ -271,6 +523,14 @@ def run_plugin_with_venv(plugin_type: str, plugin_name: str, config_path: str, p
                     "output": result.stdout
                 }
         else:
+            # プラグインがエラー結果をJSONで出力している場合はそのまま返す
+            try:
+                plugin_result = json.loads(result.stdout)
+                if isinstance(plugin_result, dict) and plugin_result.get("status"):
+                    return plugin_result
+            except json.JSONDecodeError:
+                pass
+            
             return {
                 "status": "error",
                 "error": {
@@ -298,6 +558,106 @@ def run_plugin_with_venv(plugin_type: str, plugin_name: str, config_path: str, p
             }
         }
 
+def _init_run_all_worker() -> None:
+    """run-all のワーカープロセス初期化
+    
+    プールのプロセスは atexit の処理を実行せずに終了するため、常駐ワーカーの停止を
+    multiprocessing の終了処理に登録します（プールの終了時にワーカープロセスごとに実行）。
+    """
+    from multiprocessing.util import Finalize
+    Finalize(None, close_venv_workers, exitpriority=10)
+
+def _run_all_worker(plugin_type: str, plugin_name: str, config_path: str,
+                    isolated: bool, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """run-all のワーカープロセスで1設備分を実行"""
+    import time
+    
+    start = time.time()
+    result = run_plugin(plugin_type, plugin_name, config_path, persistent_worker=not isolated, **kwargs)
+    return {
+        "status": result.get("status", "error"),
+        "config": config_path,
+        "elapsed_seconds": round(time.time() - start, 3),
+        "result": result
+    }
+
+def run_all_plugins(plugin_type: str, plugin_name: str, max_workers: int = 4,
+                    isolated: bool = False, **kwargs) -> Dict[str, Any]:
+    """
+    全設備に対してプラグインを実行（プロセスプールで並列実行）
+    
+    対象設定ファイルは schedule_plugin.py の PluginScheduleManager.find_config_files と
+    同じ方法で検索します。設備ロックが取得されている設備は実行せずスキップします。
+    仮想環境で実行するプラグインは、プールの各プロセスが常駐ワーカーを1つずつ保持して
+    設備間で再利用します。
+    
+    Args:
+        plugin_type: プラグインタイプ
+        plugin_name: プラグイン名
+        max_workers: 同時実行数の上限
+        isolated: 常駐ワーカーを使わず設備ごとにサブプロセスを起動する
+        **kwargs: 各設備の実行に渡す追加オプション
+    
+    Returns:
+        設備別の結果と所要時間を含む集約結果
+    """
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from plugins.schedule_plugin import PluginScheduleManager
+    from plugins.base.lock_manager import EquipmentLockManager
+    
+    start = time.time()
+    config_files = PluginScheduleManager(plugin_dir).find_config_files(plugin_type, plugin_name)
+    
+    results = {}
+    pending = {}
+    with ProcessPoolExecutor(max_workers=max(1, max_workers), initializer=_init_run_all_worker) as executor:
+        for config_path in sorted(config_files):
+            equipment_name = os.path.basename(os.path.dirname(config_path))
+            
+            # 同じモードを実行中の設備は待機せずスキップ（設備ロックはプラグイン側でも取得される）
+            if EquipmentLockManager(equipment_name).is_locked(kwargs.get("mode")):
+                results[equipment_name] = {
+                    "status": "skipped",
+                    "config": config_path,
+                    "elapsed_seconds": 0.0,
+                    "reason": "Equipment lock is held by another process"
+                }
+                continue
+            
+            future = executor.submit(_run_all_worker, plugin_type, plugin_name, config_path, isolated, kwargs)
+            pending[future] = (equipment_name, config_path)
+        
+        for future in as_completed(pending):
+            equipment_name, config_path = pending[future]
+            try:
+                results[equipment_name] = future.result()
+            except Exception as e:
+                results[equipment_name] = {
+                    "status": "error",
+                    "config": config_path,
+                    "elapsed_seconds": None,
+                    "result": {
+                        "status": "error",
+                        "error": {"code": "WORKER_FAILED", "message": str(e)}
+                    }
+                }
+    
+    summary = {"total": len(results), "success": 0, "error": 0, "skipped": 0}
+    for entry in results.values():
+        key = entry["status"] if entry["status"] in ("success", "skipped") else "error"
+        summary[key] += 1
+    
+    return {
+        "status": "success" if summary["error"] == 0 else "error",
+        "plugin": f"{plugin_type}/{plugin_name}",
+        "mode": kwargs.get("mode"),
+        "max_workers": max_workers,
+        "elapsed_seconds": round(time.time() - start, 3),
+        "summary": summary,
+        "equipments": {name: results[name] for name in sorted(results)}
+    }
+
 def list_available_plugins() -> Dict[str, Dict[str, Any]]:
     """
     利用可能プラグイン一覧取得
@@ -339,8 +699,22 @@ def main():
     run_parser.add_argument('--name', required=True, help='Plugin name')
     run_parser.add_argument('--config', required=True, help='Configuration file path')
     run_parser.add_argument('--mode', help='Execution mode')
+    run_parser.add_argument('--keep-artifacts', nargs='?', const='npz', choices=['npz', 'csv'],
+                           help='Keep fetched data as a debug artifact (npz by default, or csv)')
     run_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
+    # run-all サブコマンド
+    run_all_parser = subparsers.add_parser('run-all', help='Run plugin for all configured equipments')
+    run_all_parser.add_argument('--type', required=True, choices=list(PLUGIN_TYPES.keys()),
+                               help='Plugin type')
+    run_all_parser.add_argument('--name', required=True, help='Plugin name')
+    run_all_parser.add_argument('--mode', help='Execution mode')
+    run_all_parser.add_argument('--workers', type=int, default=4,
+                               help='Maximum concurrent equipments (default: 4)')
+    run_all_parser.add_argument('--isolated', action='store_true',
+                               help='Start a fresh plugin process per equipment instead of reusing workers')
+    run_all_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    
     # list サブコマンド
     list_parser = subparsers.add_parser('list', help='List available plugins')
     list_parser.add_argument('--type', choices=list(PLUGIN_TYPES.keys()),
@@ -364,11 +738,27 @@ def main():
         kwargs = {}
         if args.mode:
             kwargs['mode'] = args.mode
+        if args.keep_artifacts:
+            kwargs['keep_artifacts'] = args.keep_artifacts
         if args.verbose:
             kwargs['verbose'] = True
         
         result = run_plugin(args.type, args.name, args.config, **kwargs)
         
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        sys.exit(0 if result.get('status') in ('success', 'skipped') else 1)
+    
+    elif args.command == 'run-all':
+        # 全設備に対してプラグイン実行
+        kwargs = {}
+        if args.mode:
+            kwargs['mode'] = args.mode
+        if args.verbose:
+            kwargs['verbose'] = True
+        
+        result = run_all_plugins(args.type, args.name, max_workers=args.workers,
+                                 isolated=args.isolated, **kwargs)
+        
         print(json.dumps(result, indent=2, ensure_ascii=False))
         sys.exit(0 if result.get('status') == 'success' else 1)
     
@@ -425,6 +815,8 @@ def direct_run():
     parser.add_argument('--name', required=True, help='Plugin name')
     parser.add_argument('--config', required=True, help='Configuration file path')
     parser.add_argument('--mode', help='Execution mode')
+    parser.add_argument('--keep-artifacts', nargs='?', const='npz', choices=['npz', 'csv'],
+                       help='Keep fetched data as a debug artifact (npz by default, or csv)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
     args = parser.parse_args()
@@ -432,17 +824,19 @@ def direct_run():
     kwargs = {}
     if args.mode:
         kwargs['mode'] = args.mode
+    if args.keep_artifacts:
+        kwargs['keep_artifacts'] = args.keep_artifacts
     if args.verbose:
         kwargs['verbose'] = True
     
     result = run_plugin(args.type, args.name, args.config, **kwargs)
     
     print(json.dumps(result, indent=2, ensure_ascii=False))
-    sys.exit(0 if result.get('status') == 'success' else 1)
+    sys.exit(0 if result.get('status') in ('success', 'skipped') else 1)
 
 if __name__ == '__main__':
     # コマンドライン引数をチェックして適切な関数を呼び出し
-    if len(sys.argv) > 1 and sys.argv[1] in ['run', 'list', 'validate']:
+    if len(sys.argv) > 1 and sys.argv[1] in ['run', 'run-all', 'list', 'validate']:
         main()
     else:
         direct_run()
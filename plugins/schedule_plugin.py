@@ -151,6 +151,27 @@ class PluginScheduleManager:
             print(f"❌ Failed to get status: {e}")
             return False
     
+    def run_daemon(self, plugin_type: str, plugin_name: str, max_workers: int = 4) -> bool:
+        """常駐スケジューラー実行（cronの代わりにプロセス内でジョブを実行）"""
+        print(f"🕒 Starting scheduler daemon for {plugin_type}/{plugin_name}")
+        
+        scheduler = self.load_plugin_scheduler(plugin_type, plugin_name)
+        if not scheduler:
+            return False
+        
+        if not hasattr(scheduler, 'run_daemon'):
+            print(f"❌ {plugin_type}/{plugin_name} does not support daemon mode")
+            return False
+        
+        try:
+            return scheduler.run_daemon(
+                lambda: self.find_config_files(plugin_type, plugin_name),
+                max_workers=max_workers
+            )
+        except Exception as e:
+            print(f"❌ Daemon failed: {e}")
+            return False
+    
     def add_equipment(self, config_path: str) -> bool:
         """新規設備のスケジュール追加"""
         print(f"➕ Adding schedule for equipment: {config_path}")
@@ -267,6 +288,9 @@ Examples:
   # Add new equipment
   python3 schedule_plugin.py --add --config configs/equipments/new-eq/config.yaml
   
+  # Run jobs in a long-running process instead of cron
+  python3 schedule_plugin.py --daemon --type analyzer --name toorpia_backend
+  
   # List available plugins
   python3 schedule_plugin.py --list
         """
@@ -281,6 +305,8 @@ Examples:
     action_group.add_argument('--enable', action='store_true', help='Enable schedules')
     action_group.add_argument('--disable', action='store_true', help='Disable schedules')
     action_group.add_argument('--list', action='store_true', help='List available plugins')
+    action_group.add_argument('--daemon', action='store_true',
+                              help='Run schedules in-process (long-running, alternative to cron)')
     
     # プラグイン指定
     parser.add_argument('--type', choices=['analyzer', 'notifier', 'presenter'], 
@@ -288,6 +314,8 @@ Examples:
     parser.add_argument('--name', help='Plugin name')
     parser.add_argument('--config', help='Configuration file path (for --add)')
     parser.add_argument('--dry-run', action='store_true', help='Preview changes without applying')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Maximum concurrent jobs in daemon mode (default: 4)')
     
     args = parser.parse_args()
     
@@ -331,6 +359,8 @@ Examples:
             success = manager.enable_schedules(args.type, args.name)
         elif args.disable:
             success = manager.disable_schedules(args.type, args.name)
+        elif args.daemon:
+            success = manager.run_daemon(args.type, args.name, max_workers=args.workers)
     
     except KeyboardInterrupt:
         print("\n🛑 Operation cancelled by user")
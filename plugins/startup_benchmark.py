@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+IF-HUB プラグイン起動時間ベンチマーク
+
+プラグインのエントリーポイント（一覧・バリデーション・ステータス・スケジューラー）を
+モジュール読み込み時間の計測付き（-X importtime 相当）で実行し、読み込み時間の合計と
+重い依存（pandas・numpy・requests）の読み込み有無を記録します。
+
+以下の場合は終了コード1を返します:
+    - 重い依存を読み込んだエントリーポイントがある
+    - 基準値（--baseline）から許容範囲を超えて読み込み時間が増加した
+
+使用例:
+    python3 plugins/startup_benchmark.py --save          # 基準値を記録
+    python3 plugins/startup_benchmark.py                 # 基準値と比較
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import subprocess
+from typing import Dict, Any, List, Optional
+
+plugin_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(plugin_dir)
+
+# 起動時に読み込んではならないモジュール（データ取得・API呼び出し時のみ使用）
+HEAVY_MODULES = ('pandas', 'numpy', 'requests')
+
+DEFAULT_BASELINE = os.path.join("logs", "startup_benchmark.json")
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_SLACK_MS = 20.0
+
+
+def build_entry_points(plugin_type: str, plugin_name: str, config_path: str) -> Dict[str, List[str]]:
+    """計測対象のエントリーポイント（名前 -> コマンド）"""
+    sys.path.insert(0, project_root)
+    from plugins.run_plugin import PLUGIN_TYPES, get_python_executable
+    
+    plugin_python = get_python_executable(plugin_type, plugin_name)
+    plugin_run_script = os.path.join("plugins", PLUGIN_TYPES[plugin_type], plugin_name, "run.py")
+    
+    return {
+        "run_plugin_list": [sys.executable, "plugins/run_plugin.py", "list"],
+        "run_plugin_validate": [sys.executable, "plugins/run_plugin.py", "validate",
+                                "--type", plugin_type, "--name", plugin_name, "--config", config_path],
+        "plugin_status": [plugin_python, plugin_run_script, config_path,
+                          "--mode", "addplot_update", "--status"],
+        "schedule_list": [sys.executable, "plugins/schedule_plugin.py", "--list"],
+        "schedule_status": [sys.executable, "plugins/schedule_plugin.py", "--status",
+                            "--type", plugin_type, "--name", plugin_name]
+    }
+
+
+def parse_importtime(stderr: str) -> Dict[str, Any]:
+    """importtime の出力から読み込み時間の合計（ms）と重い依存を抽出
+    
+    子プロセス（仮想環境での run.py 実行等）の出力も含めて合計します。
+    """
+    total_us = 0
+    heavy = set()
+    
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 見出し行
+        
+        total_us += int(fields[0])
+        module = fields[2].strip()
+        top_level = module.split('.')[0]
+        if top_level in HEAVY_MODULES:
+            heavy.add(top_level)
+    
+    return {"import_ms": round(total_us / 1000, 1), "heavy_modules": sorted(heavy)}
+
+
+def measure(command: List[str], repeat: int) -> Dict[str, Any]:
+    """コマンドを repeat 回実行し、読み込み時間が最小の回を返す"""
+    env = dict(os.environ, PYTHONPROFILEIMPORTTIME='1')  # 子プロセスにも引き継がれる
+    
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(command, capture_output=True, text=True, env=env,
+                                cwd=project_root, timeout=120)
+        measured = parse_importtime(result.stderr)
+        measured["exit_code"] = result.returncode
+        if best is None or measured["import_ms"] < best["import_ms"]:
+            best = measured
+    
+    return best
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    try:
+        with open(os.path.join(project_root, path), 'r', encoding='utf-8') as f:
+            return json.load(f).get("entry_points", {})
+    except FileNotFoundError:
+        return {}
+
+
+def run_benchmark(plugin_type: str, plugin_name: str, config_path: str,
+                  baseline_path: str, tolerance: float, slack_ms: float,
+                  repeat: int = 3, save: bool = False) -> Dict[str, Any]:
+    """
+    ベンチマーク実行
+    
+    Args:
+        plugin_type: プラグインタイプ
+        plugin_name: プラグイン名
+        config_path: ステータス・バリデーションに使用する設備設定ファイル
+        baseline_path: 基準値ファイル
+        tolerance: 基準値からの許容増加率
+        slack_ms: 許容増加率とは別に許容する増加量（ms、短いコマンドの揺らぎ対策）
+        repeat: 各コマンドの実行回数（最小値を採用）
+        save: 計測結果を基準値として保存
+    
+    Returns:
+        エントリーポイント別の計測結果
+    """
+    baseline = {} if save else load_baseline(baseline_path)
+    results = {}
+    failed = False
+    
+    for name, command in build_entry_points(plugin_type, plugin_name, config_path).items():
+        measured = measure(command, repeat)
+        measured["command"] = ' '.join(command)
+        
+        problems = []
+        if measured["heavy_modules"]:
+            problems.append(f"imports {', '.join(measured['heavy_modules'])}")
+        
+        if name in baseline:
+            limit = baseline[name] * (1 + tolerance) + slack_ms
+            measured["baseline_ms"] = baseline[name]
+            measured["limit_ms"] = round(limit, 1)
+            if measured["import_ms"] > limit:
+                problems.append(f"import time {measured['import_ms']}ms exceeds {limit:.1f}ms")
+        
+        measured["status"] = "regression" if problems else "ok"
+        if problems:
+            measured["problems"] = problems
+            failed = True
+        results[name] = measured
+    
+    if save:
+        os.makedirs(os.path.dirname(os.path.join(project_root, baseline_path)) or '.', exist_ok=True)
+        with open(os.path.join(project_root, baseline_path), 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "entry_points": {name: entry["import_ms"] for name, entry in results.items()}
+            }, f, indent=2)
+    
+    return {
+        "status": "error" if failed else "success",
+        "baseline": None if save or not baseline else baseline_path,
+        "entry_points": results
+    }
+
+
+def find_default_config() -> Optional[str]:
+    """ベンチマークに使用する設備設定ファイル（最初に見つかったもの）"""
+    for path in sorted(glob.glob(os.path.join(project_root, "configs", "equipments", "*", "config.yaml"))):
+        return os.path.relpath(path, project_root)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IF-HUB Plugin Startup Benchmark')
+    parser.add_argument('--type', default='analyzer', help='Plugin type (default: analyzer)')
+    parser.add_argument('--name', default='toorpia_backend', help='Plugin name (default: toorpia_backend)')
+    parser.add_argument('--config', help='Equipment configuration file (default: first found)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help=f'Baseline file relative to the project root (default: {DEFAULT_BASELINE})')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed increase ratio over the baseline (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--slack-ms', type=float, default=DEFAULT_SLACK_MS,
+                        help=f'Allowed increase in ms on top of the ratio (default: {DEFAULT_SLACK_MS})')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per entry point (default: 3)')
+    parser.add_argument('--save', action='store_true', help='Record the results as the new baseline')
+    
+    args = parser.parse_args()
+    
+    config_path = args.config or find_default_config()
+    if not config_path:
+        print("No equipment configuration found; specify --config", file=sys.stderr)
+        sys.exit(1)
+    
+    result = run_benchmark(args.type, args.name, config_path, args.baseline,
+                           args.tolerance, args.slack_ms, repeat=max(1, args.repeat), save=args.save)
+    
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(0 if result["status"] == "success" else 1)
+
+
+if __name__ == '__main__':
+    main()
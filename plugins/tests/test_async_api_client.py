@@ -0,0 +1,241 @@
+"""
+非同期APIクライアント（aiohttp）のテスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from plugins.base.errors import APIConnectionError
+from plugins.base.retry_manager import RetryConfig
+from plugins.base.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, SharedBreakerState
+from plugins.base.async_api_client import AsyncIFHubAPIClient, AsyncToorPIAAPIClient
+from plugins.base.session_cache import SessionKeyCache
+
+# テストサーバーの1応答あたりの最大件数（IF-HUB の maxRecordsPerRequest 相当）
+MAX_RECORDS = 10
+
+
+class FakeServer:
+    """IF-HUB・toorPIA API の一部を模したサーバー"""
+    
+    def __init__(self):
+        self.hits = {}
+        self.statuses = {}
+        self.session_keys = 0
+        self.valid_session_key = None
+        self.app = web.Application()
+        self.app.router.add_get('/api/data/{tag}', self.tag_data)
+        self.app.router.add_post('/auth/login', self.auth_login)
+        self.app.router.add_post('/data/addplot', self.addplot)
+        self.runner = None
+        self.base_url = None
+    
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+    
+    async def stop(self):
+        await self.runner.cleanup()
+    
+    def _hit(self, path: str) -> int:
+        self.hits[path] = self.hits.get(path, 0) + 1
+        return self.hits[path]
+    
+    async def tag_data(self, request):
+        tag = request.match_info['tag']
+        hit = self._hit(request.path)
+        statuses = self.statuses.get(tag, [200])
+        status = statuses[min(hit, len(statuses)) - 1]
+        if status != 200:
+            return web.json_response({"error": "unavailable"}, status=status)
+        
+        # 1分間隔のデータを開始時刻から上限件数まで返す
+        start = datetime.fromisoformat(request.query['start'].replace('Z', '+00:00'))
+        end = datetime.fromisoformat(request.query['end'].replace('Z', '+00:00'))
+        timestamp = start.replace(second=0, microsecond=0)
+        if timestamp < start:
+            timestamp += timedelta(minutes=1)
+        points = []
+        while timestamp <= end and len(points) < MAX_RECORDS:
+            points.append({"timestamp": timestamp.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                           "value": timestamp.minute})
+            timestamp += timedelta(minutes=1)
+        return web.json_response({"tagId": tag, "metadata": {}, "data": points})
+    
+    async def auth_login(self, request):
+        self._hit(request.path)
+        self.session_keys += 1
+        self.valid_session_key = f"sk-{self.session_keys}"
+        return web.json_response({"sessionKey": self.valid_session_key})
+    
+    async def addplot(self, request):
+        self._hit(request.path)
+        if request.headers.get('session-key') != self.valid_session_key:
+            return web.json_response({"error": "invalid session key"}, status=401)
+        return web.json_response({"message": "ok", "resdata": {"addPlotNo": 1}})
+
+
+def run_with_server(test):
+    """テストサーバーを起動してテスト本体（コルーチン関数）を実行"""
+    async def main():
+        server = FakeServer()
+        await server.start()
+        try:
+            return await test(server)
+        finally:
+            await server.stop()
+    return asyncio.run(main())
+
+
+def fast_retry(client):
+    client.retry_manager.config = RetryConfig(max_retries=3, base_delay=0.01, jitter=False)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    # 共有回路ブレーカーの状態ファイル（logs/circuit_breakers/）を一時ディレクトリに作成
+    monkeypatch.chdir(tmp_path)
+
+
+def test_async_client_retries_server_errors():
+    async def test(server):
+        server.statuses['Flaky'] = [503, 503, 200]
+        client = fast_retry(AsyncIFHubAPIClient(server.base_url))
+        try:
+            points = await client.get_tag_data('Flaky', "2025-01-01T00:00:00.000Z", "2025-01-01T00:05:00.000Z")
+        finally:
+            await client.close()
+        
+        assert len(points) == 6
+        assert server.hits['/api/data/Flaky'] == 3
+        assert client.get_health_status()["retry"]["total_retries"] == 2
+    
+    run_with_server(test)
+
+
+def test_async_client_does_not_retry_rejected_request():
+    async def test(server):
+        server.statuses['Missing'] = [404]
+        client = fast_retry(AsyncIFHubAPIClient(server.base_url))
+        try:
+            with pytest.raises(APIConnectionError) as excinfo:
+                await client.get_tag_data('Missing', "2025-01-01T00:00:00.000Z", "2025-01-01T00:05:00.000Z")
+        finally:
+            await client.close()
+        
+        assert excinfo.value.details["status_code"] == 404
+        assert server.hits['/api/data/Missing'] == 1
+    
+    run_with_server(test)
+
+
+def test_async_toorpia_client_reauthenticates_on_401():
+    async def test(server):
+        client = fast_retry(AsyncToorPIAAPIClient(server.base_url))
+        try:
+            assert await client.login("api-key") == "sk-1"
+            
+            # サーバー側でセッションキーが失効
+            server.valid_session_key = "expired"
+            result = await client.addplot({"columns": ["timestamp"], "data": [], "mapNo": 1})
+        finally:
+            await client.close()
+        
+        assert result["message"] == "ok"
+        assert client.session_key == "sk-2"
+        assert server.hits['/auth/login'] == 2
+        assert server.hits['/data/addplot'] == 2
+    
+    run_with_server(test)
+
+
+def test_async_toorpia_client_revalidates_session_key_after_cache_ttl(tmp_path):
+    async def test(server):
+        session_cache = SessionKeyCache(server.base_url, "api-key", ttl_seconds=0.1,
+                                        cache_dir=str(tmp_path / "session_cache"))
+        client = AsyncToorPIAAPIClient(server.base_url, session_cache=session_cache)
+        try:
+            assert await client.login("api-key") == "sk-1"
+            assert await client.login("api-key") == "sk-1"
+            
+            # 再利用期間を過ぎた取得済みのセッションキーは使わず、キャッシュから取得し直す
+            await asyncio.sleep(0.15)
+            assert await client.login("api-key") == "sk-2"
+        finally:
+            await client.close()
+        
+        assert server.hits['/auth/login'] == 2
+    
+    run_with_server(test)
+
+
+def test_async_client_completes_truncated_response():
+    async def test(server):
+        client = AsyncIFHubAPIClient(server.base_url, max_records_per_request=MAX_RECORDS)
+        try:
+            points = await client.get_tag_data('Big', "2025-01-01T00:00:00.000Z", "2025-01-01T01:00:00.000Z")
+        finally:
+            await client.close()
+        
+        timestamps = [point["timestamp"] for point in points]
+        assert len(timestamps) == 61
+        assert timestamps == sorted(set(timestamps))
+        assert timestamps[-1] == "2025-01-01T01:00:00.000Z"
+        assert server.hits['/api/data/Big'] > 1
+    
+    run_with_server(test)
+
+
+def test_call_async_does_not_block_event_loop_on_shared_state_lock(tmp_path):
+    shared_state = SharedBreakerState("test", state_dir=str(tmp_path / "circuit_breakers"))
+    breaker = CircuitBreaker(CircuitBreakerConfig(name="test"), shared_state=shared_state)
+    locked = threading.Event()
+    
+    def hold_lock():
+        with shared_state.locked():
+            locked.set()
+            time.sleep(0.3)
+    
+    async def operation():
+        return "ok"
+    
+    async def main():
+        ticks = []
+        
+        async def ticker():
+            while len(ticks) < 5:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+        
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait()
+        start = time.monotonic()
+        result, _ = await asyncio.gather(breaker.call_async(operation), ticker())
+        holder.join()
+        
+        # 他プロセスのロック保持中もイベントループは他のタスクを実行できる
+        assert result == "ok"
+        assert time.monotonic() - start >= 0.2
+        assert ticks[-1] - start < 0.2
+    
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""
+IFHubAPIClient の並列取得・/api/batch 応答デコードのテスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from plugins.base.api_client import IFHubAPIClient
+from plugins.base.metrics import PrometheusTextfileExporter
+from plugins.base.timeseries import TagSeries
+from plugins.base.stream_decoder import BatchStreamDecoder
+
+START = "2025-01-01T00:00:00.000Z"
+END = "2025-01-02T00:00:00.000Z"
+
+
+class InFlightCountingClient(IFHubAPIClient):
+    """同時リクエスト数を記録し、期間全体の要求は上限件数で切り詰めて返すクライアント"""
+    
+    def __init__(self, max_concurrency: int):
+        super().__init__("http://127.0.0.1:1", max_concurrency=max_concurrency, max_records_per_request=10)
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+    
+    def _request_tag_series(self, tag_name: str, start_time: str, end_time: str) -> TagSeries:
+        with self._counter_lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.02)
+        with self._counter_lock:
+            self.in_flight -= 1
+        
+        start_ns = self._to_epoch_ms(start_time) * 1_000_000
+        end_ns = self._to_epoch_ms(end_time) * 1_000_000
+        if start_time == START:
+            # 先頭1/10の期間で上限件数に達した（残り期間は複数の時間窓で補完される）
+            count = self.max_records_per_request
+            span = (end_ns - start_ns) // 10
+        else:
+            count = 2
+            span = end_ns - start_ns
+        epochs = start_ns + np.arange(count, dtype=np.int64) * (span // count)
+        return TagSeries(epochs, np.ones(count))
+
+
+def test_truncated_tags_do_not_exceed_max_concurrency():
+    client = InFlightCountingClient(max_concurrency=4)
+    tag_names = [f"Tag{i}" for i in range(8)]
+    
+    results, errors = client.get_tags_series_concurrent(tag_names, START, END)
+    
+    assert not errors
+    assert sorted(results) == tag_names
+    # 全タグが時間窓の補完取得を行っても、同時リクエスト数は max_concurrency 以内
+    assert client.requests > len(tag_names) * 2
+    assert client.peak <= 4
+
+
+def test_single_truncated_tag_fetches_windows_concurrently():
+    client = InFlightCountingClient(max_concurrency=4)
+    
+    results, errors = client.get_tags_series_concurrent(["Tag0"], START, END)
+    
+    assert not errors
+    assert 1 < client.peak <= 4
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_batch_stream_decoder_matches_parsed_response(chunk_size):
+    points = [{"timestamp": f"2025-01-01T00:00:{i:02d}.000Z", "value": i * 1.5 if i % 5 else None}
+              for i in range(40)]
+    response = {
+        "Pump01.Flow": {"metadata": {"name": "a\"]}{", "data": "x"}, "data": points},
+        "Pump01.Temp": {"data": [{"value": 2, "timestamp": points[0]["timestamp"]}], "metadata": {"unit": "°C"}},
+        "NoData": {"metadata": {}},
+        "NullData": {"data": None},
+        "error": "tag not found"
+    }
+    body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+    
+    decoder = BatchStreamDecoder()
+    for offset in range(0, len(body), chunk_size):
+        decoder.feed(body[offset:offset + chunk_size])
+    series = decoder.close()
+    
+    assert sorted(series) == ["NoData", "NullData", "Pump01.Flow", "Pump01.Temp"]
+    for tag_name in ("Pump01.Flow", "Pump01.Temp"):
+        expected = TagSeries.from_points(response[tag_name]["data"])
+        np.testing.assert_array_equal(series[tag_name].epochs, expected.epochs)
+        np.testing.assert_array_equal(series[tag_name].values, expected.values)
+    assert len(series["NoData"]) == 0 and len(series["NullData"]) == 0
+
+
+def test_batch_stream_decoder_rejects_incomplete_response():
+    decoder = BatchStreamDecoder()
+    decoder.feed(b'{"Pump01.Flow": {"data": [{"timestamp": "2025-01-01T00:00:00.000Z", "value": 1}]}')
+    
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+class SlowStreamHandler(BaseHTTPRequestHandler):
+    """Content-Length なしで応答本文を分割して送信するハンドラー"""
+    
+    def do_GET(self):
+        points = [{"timestamp": f"2025-01-01T00:00:{i:02d}.000Z", "value": i} for i in range(3)]
+        body = json.dumps({"tagId": "Slow", "metadata": {}, "data": points}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        for offset in range(0, len(body), len(body) // 3):
+            self.wfile.write(body[offset:offset + len(body) // 3])
+            self.wfile.flush()
+            time.sleep(0.1)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def test_streamed_response_metrics_include_body_read(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowStreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = IFHubAPIClient(f"http://127.0.0.1:{server.server_address[1]}")
+        series = client.get_tag_series('Slow', START, END, concurrent=False)
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    assert len(series) == 3
+    exporter = PrometheusTextfileExporter(directory=str(tmp_path))
+    exporter.export([client.collect_metrics()])
+    with open(exporter.state_file, encoding='utf-8') as f:
+        state = json.load(f)
+    
+    # 応答時間はヘッダー受信時点ではなく本文を読み終えた時点まで（0.1秒間隔で3回に分けて送信）
+    [duration] = [entry for entry in state["histograms"].values()
+                  if entry["name"] == IFHubAPIClient.REQUEST_DURATION_METRIC]
+    assert duration["sum"] >= 0.2
+    # Content-Length がなくても受信量を記録
+    [received] = [entry for entry in state["counters"].values()
+                  if entry["name"] == "ifhub_plugin_api_response_bytes_total"]
+    assert received["value"] > 0
+    assert "_quantile" not in exporter.prom_file.read_text(encoding='utf-8')
@@ -0,0 +1,120 @@
+"""
+設備別排他制御（EquipmentLockManager）のテスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from plugins.base.lock_manager import EquipmentLockManager
+
+# ロックを保持し、標準入力から1行読み込んだ時点で解放して終了する別プロセス
+HOLDER_SCRIPT = """
+import fcntl, sys
+with open(sys.argv[1], 'a+') as f:
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    print("locked", flush=True)
+    sys.stdin.readline()
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+"""
+
+
+class LockHolder:
+    """別プロセスが保持するロック"""
+    
+    def __init__(self, lock_file):
+        self.process = subprocess.Popen([sys.executable, "-c", HOLDER_SCRIPT, str(lock_file)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        assert self.process.stdout.readline().strip() == "locked"
+    
+    def release(self):
+        if self.process.poll() is None:
+            self.process.stdin.write("\n")
+            self.process.stdin.flush()
+            self.process.wait(timeout=5)
+
+
+@contextmanager
+def held_by_other_process(lock_file):
+    holder = LockHolder(lock_file)
+    try:
+        yield holder
+    finally:
+        holder.release()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # ロックファイル（logs/{設備名}/）を一時ディレクトリに作成
+    monkeypatch.chdir(tmp_path)
+    return EquipmentLockManager("Pump01")
+
+
+def test_release_wakes_waiter_promptly(manager):
+    with held_by_other_process(manager.get_lock_file("basemap_update")) as holder:
+        timer = threading.Timer(0.3, holder.release)
+        timer.start()
+        start = time.monotonic()
+        with manager.acquire_lock(timeout=10, mode="basemap_update") as acquired:
+            waited = time.monotonic() - start
+        timer.join()
+    
+    # 解放後、ポーリング間隔の上限以内に取得
+    assert acquired is True
+    assert 0.3 <= waited < 0.3 + EquipmentLockManager.LOCK_POLL_MAX_INTERVAL + 0.1
+
+
+def test_timeout_leaves_no_waiter_behind(manager):
+    threads_before = threading.active_count()
+    lock_file = manager.get_lock_file("basemap_update")
+    with held_by_other_process(lock_file) as holder:
+        with pytest.raises(TimeoutError):
+            with manager.acquire_lock(timeout=0.2, mode="basemap_update"):
+                pass
+        holder.release()
+    
+    # 期限切れ後に待機が残らず、解放されたロックを横取りしない
+    assert threading.active_count() == threads_before
+    assert not manager.is_locked("basemap_update")
+    with manager.acquire_lock(timeout=0, mode="basemap_update") as acquired:
+        assert acquired is True
+
+
+def test_busy_addplot_is_skipped_without_waiting(manager):
+    with held_by_other_process(manager.get_lock_file("addplot")):
+        start = time.monotonic()
+        with manager.acquire_lock(timeout=10, mode="addplot", skip_if_busy=True) as acquired:
+            assert acquired is False
+        assert time.monotonic() - start < 0.5
+        assert manager.is_locked("addplot")
+    
+    with manager.acquire_lock(mode="addplot", skip_if_busy=True) as acquired:
+        assert acquired is True
+
+
+def test_modes_do_not_block_each_other(manager):
+    with held_by_other_process(manager.get_lock_file("basemap_update")):
+        # basemap更新の実行中もaddplotは待機せずに取得できる
+        with manager.acquire_lock(timeout=0, mode="addplot") as acquired:
+            assert acquired is True
+            assert manager.is_locked("addplot")
+        
+        assert manager.is_locked("basemap_update")
+        assert not manager.is_locked("addplot")
+        assert manager.is_locked()
+        
+        with pytest.raises(TimeoutError):
+            with manager.acquire_lock(timeout=0, mode="basemap_update"):
+                pass
+    
+    assert not manager.is_locked()
@@ -0,0 +1,436 @@
+"""
+RetryManager・EnhancedAPIClient のリトライ動作テスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from plugins.base.errors import APIConnectionError, DeadlineExceededError, RequestQueueTimeoutError
+from plugins.base.retry_manager import RetryConfig, RetryManager
+from plugins.base.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitBreakerState
+from plugins.base.api_client import APIClientConfig, EnhancedAPIClient, ToorPIAAPIClient
+from plugins.base.rate_limiter import ToorPIARequestLimiter
+from plugins.base.session_cache import SessionKeyCache
+
+
+def make_manager(max_retries=3, base_delay=0.01):
+    return RetryManager(RetryConfig(max_retries=max_retries, base_delay=base_delay, jitter=False))
+
+
+class FailingOperation:
+    """指定回数失敗した後に成功する操作"""
+    
+    def __init__(self, failures, error_factory=lambda: APIConnectionError("HTTP 503", status_code=503)):
+        self.failures = failures
+        self.error_factory = error_factory
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error_factory()
+        return "ok"
+
+
+def test_execute_retries_until_success():
+    manager = make_manager(max_retries=3)
+    operation = FailingOperation(failures=2)
+    
+    assert manager.execute(operation, "op") == "ok"
+    assert operation.calls == 3
+    assert manager.get_statistics()["total_retries"] == 2
+
+
+def test_execute_stops_after_max_retries_with_retry_info():
+    manager = make_manager(max_retries=2)
+    operation = FailingOperation(failures=10)
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        manager.execute(operation, "op")
+    
+    assert operation.calls == 3
+    retry_info = excinfo.value.retry_info
+    assert retry_info["attempts"] == 3
+    assert retry_info["stop_reason"] == "max_retries"
+    assert retry_info["delays"] == [0.01, 0.02]
+    assert len(retry_info["errors"]) == 3
+    assert excinfo.value.to_dict()["retry_info"] == retry_info
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404, 422])
+def test_client_errors_are_not_retried(status_code):
+    manager = make_manager(max_retries=3)
+    operation = FailingOperation(
+        failures=10, error_factory=lambda: APIConnectionError("rejected", status_code=status_code)
+    )
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        manager.execute(operation, "op")
+    
+    assert operation.calls == 1
+    assert excinfo.value.retry_info["stop_reason"] == "not_retryable"
+
+
+@pytest.mark.parametrize("status_code", [408, 429, 500, 503])
+def test_transient_statuses_are_retried(status_code):
+    manager = make_manager(max_retries=2)
+    operation = FailingOperation(
+        failures=1, error_factory=lambda: APIConnectionError("busy", status_code=status_code)
+    )
+    
+    assert manager.execute(operation, "op") == "ok"
+    assert operation.calls == 2
+
+
+def test_non_retryable_exception_type_is_raised_immediately():
+    manager = make_manager(max_retries=3)
+    operation = FailingOperation(failures=10, error_factory=lambda: ValueError("bug"))
+    
+    with pytest.raises(ValueError):
+        manager.execute(operation, "op")
+    assert operation.calls == 1
+
+
+def test_deadline_stops_retrying_before_sleeping_past_it():
+    manager = make_manager(max_retries=5, base_delay=0.2)
+    operation = FailingOperation(failures=10)
+    
+    start = time.monotonic()
+    with pytest.raises(APIConnectionError) as excinfo:
+        manager.execute(operation, "op", deadline=start + 0.5)
+    elapsed = time.monotonic() - start
+    
+    # 0.2s・0.4s と待つと期限を超えるため、1回目の待機後の試行で打ち切る
+    assert operation.calls == 2
+    assert elapsed < 0.5
+    assert excinfo.value.retry_info["stop_reason"] == "deadline"
+
+
+def test_execute_async_retries_without_blocking():
+    manager = make_manager(max_retries=3)
+    calls = []
+    
+    async def operation():
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise APIConnectionError("HTTP 502", status_code=502)
+        return "ok"
+    
+    async def main():
+        ticks = []
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.005)
+        
+        result, _ = await asyncio.gather(manager.execute_async(operation, "op"), ticker())
+        return result, ticks
+    
+    result, ticks = asyncio.run(main())
+    assert result == "ok"
+    assert len(calls) == 3
+    # バックオフ中も他のタスクが実行されている
+    assert any(calls[0] < tick < calls[-1] for tick in ticks)
+
+
+def test_statistics_are_not_lost_under_concurrent_execution():
+    manager = make_manager(max_retries=1, base_delay=0)
+    # スレッド切り替えを頻繁にして更新の競合を起こしやすくする
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    
+    def worker():
+        for _ in range(200):
+            manager.execute(FailingOperation(1), "op")
+    
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    
+    stats = manager.get_statistics()
+    assert stats["total_operations"] == 1600
+    assert stats["successful_operations"] == 1600
+    assert stats["total_retries"] == 1600
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """パスごとに設定された応答を順に返すHTTPハンドラー"""
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            responses = server.responses.get(self.path, [(200, 0)])
+            status, delay = responses[min(server.hits[self.path], len(responses)) - 1]
+        
+        time.sleep(delay)
+        body = json.dumps({"hits": server.hits[self.path]}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.do_GET()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    server.lock = threading.Lock()
+    server.hits = {}
+    server.responses = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, timeout=5.0):
+    config = APIClientConfig(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        timeout=timeout,
+        enable_circuit_breaker=False
+    )
+    client = EnhancedAPIClient(config, "test_client")
+    client.retry_manager.config = RetryConfig(max_retries=3, base_delay=0.01, jitter=False)
+    return client
+
+
+def test_client_retries_server_errors(flaky_server):
+    flaky_server.responses['/flaky'] = [(503, 0), (503, 0), (200, 0)]
+    client = make_client(flaky_server)
+    
+    response = client.get('/flaky')
+    
+    assert response.status_code == 200
+    assert flaky_server.hits['/flaky'] == 3
+    assert client.get_health_status()["retry"]["total_retries"] == 2
+
+
+def test_client_does_not_retry_rejected_request(flaky_server):
+    flaky_server.responses['/missing'] = [(404, 0)]
+    client = make_client(flaky_server)
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        client.get('/missing')
+    
+    assert flaky_server.hits['/missing'] == 1
+    assert excinfo.value.details["status_code"] == 404
+    assert excinfo.value.retry_info["attempts"] == 1
+
+
+def test_client_caps_request_timeout_to_deadline(flaky_server):
+    flaky_server.responses['/slow'] = [(200, 2.0)]
+    client = make_client(flaky_server, timeout=30.0)
+    
+    start = time.monotonic()
+    with pytest.raises(APIConnectionError) as excinfo:
+        client.get('/slow', deadline=start + 0.3)
+    elapsed = time.monotonic() - start
+    
+    assert elapsed < 1.5
+    assert excinfo.value.retry_info["stop_reason"] == "deadline"
+
+
+def test_client_level_deadline_applies_to_all_requests(flaky_server):
+    flaky_server.responses['/down'] = [(503, 0)]
+    client = make_client(flaky_server)
+    client.set_deadline(time.monotonic() - 1)
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        client.get('/down')
+    
+    assert flaky_server.hits.get('/down', 0) == 0
+    assert excinfo.value.retry_info["stop_reason"] == "deadline"
+
+
+def test_post_is_not_resent_after_read_timeout(flaky_server):
+    flaky_server.responses['/data/addplot'] = [(200, 1.0)]
+    client = make_client(flaky_server, timeout=0.3)
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        client.post('/data/addplot', json={"data": [1]})
+    time.sleep(1.0)  # 応答待ちのリクエストの処理完了を待つ
+    
+    # サーバーが処理中の可能性があるため再送しない
+    assert flaky_server.hits['/data/addplot'] == 1
+    assert excinfo.value.retry_info["stop_reason"] == "not_retryable"
+
+
+@pytest.mark.parametrize("status_code", [500, 502])
+def test_post_is_not_resent_after_server_error(flaky_server, status_code):
+    flaky_server.responses['/data/fit_transform'] = [(status_code, 0), (200, 0)]
+    client = make_client(flaky_server)
+    
+    with pytest.raises(APIConnectionError):
+        client.post('/data/fit_transform', json={"data": [1]})
+    
+    assert flaky_server.hits['/data/fit_transform'] == 1
+
+
+@pytest.mark.parametrize("status_code", [408, 429, 503])
+def test_post_is_resent_when_server_did_not_process_it(flaky_server, status_code):
+    flaky_server.responses['/data/addplot'] = [(status_code, 0), (200, 0)]
+    client = make_client(flaky_server)
+    
+    response = client.post('/data/addplot', json={"data": [1]})
+    
+    assert response.status_code == 200
+    assert flaky_server.hits['/data/addplot'] == 2
+
+
+def test_post_is_resent_when_connection_is_refused():
+    config = APIClientConfig(base_url="http://127.0.0.1:1", timeout=1.0, enable_circuit_breaker=False)
+    client = EnhancedAPIClient(config, "test_client")
+    client.retry_manager.config = RetryConfig(max_retries=2, base_delay=0.01, jitter=False)
+    
+    with pytest.raises(APIConnectionError) as excinfo:
+        client.post('/data/addplot', json={"data": [1]})
+    
+    assert excinfo.value.details["connect_failed"] is True
+    assert excinfo.value.retry_info["attempts"] == 3
+
+
+def test_idempotent_post_is_retried_like_get(flaky_server):
+    flaky_server.responses['/auth/login'] = [(500, 0), (200, 0)]
+    client = make_client(flaky_server)
+    
+    response = client.post('/auth/login', json={"apiKey": "x"}, idempotent=True)
+    
+    assert response.status_code == 200
+    assert flaky_server.hits['/auth/login'] == 2
+
+
+def make_breaker_client(server, timeout=5.0):
+    client = make_client(server, timeout=timeout)
+    client.circuit_breaker = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1, name="test"))
+    return client
+
+
+def test_deadline_cut_does_not_trip_circuit_breaker(flaky_server):
+    flaky_server.responses['/slow'] = [(200, 1.0)]
+    client = make_breaker_client(flaky_server, timeout=30.0)
+    
+    with pytest.raises(DeadlineExceededError) as excinfo:
+        client.get('/slow', deadline=time.monotonic() + 0.3)
+    
+    assert excinfo.value.retry_info["stop_reason"] == "deadline"
+    assert client.circuit_breaker.get_state() == CircuitBreakerState.CLOSED
+    assert client.circuit_breaker.failure_count == 0
+
+
+def test_expired_deadline_is_raised_before_circuit_breaker(flaky_server):
+    client = make_breaker_client(flaky_server)
+    client.circuit_breaker.force_open()
+    
+    with pytest.raises(DeadlineExceededError):
+        client.get('/down', deadline=time.monotonic() - 1)
+    
+    # 開放中でも期限切れとして報告し、拒否の記録も残さない
+    assert client.circuit_breaker.metrics.to_dict()["rejected_calls"] == 0
+
+
+def test_deadline_cut_releases_half_open_probe(flaky_server):
+    flaky_server.responses['/slow'] = [(200, 1.0)]
+    client = make_breaker_client(flaky_server, timeout=30.0)
+    client.circuit_breaker.config.recovery_timeout = 0.0
+    client.circuit_breaker.force_open()
+    
+    with pytest.raises(DeadlineExceededError):
+        client.get('/slow', deadline=time.monotonic() + 0.3)
+    
+    # 試行呼び出しの結果が出ていないため、次の呼び出しが試行できる
+    assert client.circuit_breaker.get_state() == CircuitBreakerState.HALF_OPEN
+    assert client.circuit_breaker.probe_started is None
+    assert client.get('/ok').status_code == 200
+    assert client.circuit_breaker.get_state() == CircuitBreakerState.CLOSED
+
+
+def make_limited_client(server, tmp_path, timeout=0.3):
+    api_url = f"http://127.0.0.1:{server.server_address[1]}"
+    limiter = ToorPIARequestLimiter(api_url, {"addplot": 1}, state_dir=str(tmp_path / "rate_limits"))
+    client = ToorPIAAPIClient(api_url, session_key="key", timeout=timeout, rate_limiter=limiter)
+    client.circuit_breaker = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1, name="test"))
+    client.retry_manager.config = RetryConfig(max_retries=3, base_delay=0.01, jitter=False)
+    return client, limiter
+
+
+def test_queue_timeout_is_not_retried_or_counted_by_breaker(flaky_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client, limiter = make_limited_client(flaky_server, tmp_path)
+    
+    with limiter.acquire("addplot", 1.0):
+        with pytest.raises(RequestQueueTimeoutError) as excinfo:
+            client.post('/data/addplot', json={"data": [1]})
+    
+    assert flaky_server.hits.get('/data/addplot', 0) == 0
+    assert excinfo.value.retry_info["attempts"] == 1
+    assert client.circuit_breaker.failure_count == 0
+    assert client.circuit_breaker.metrics.to_dict()["total_calls"] == 0
+    assert limiter.get_status()["queue_timeouts"] == {"addplot": 1}
+
+
+def test_slot_is_released_while_waiting_to_retry(flaky_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    flaky_server.responses['/data/addplot'] = [(503, 0), (200, 0)]
+    client, limiter = make_limited_client(flaky_server, tmp_path, timeout=5.0)
+    client.circuit_breaker.config.failure_threshold = 5
+    
+    slots_in_use = []
+    calculate_delay = client.retry_manager.calculate_delay
+    
+    def observe_backoff(attempt):
+        slots_in_use.append(limiter.slots["addplot"].in_use())
+        return calculate_delay(attempt)
+    
+    monkeypatch.setattr(client.retry_manager, 'calculate_delay', observe_backoff)
+    response = client.post('/data/addplot', json={"data": [1]})
+    
+    assert response.status_code == 200
+    assert slots_in_use == [0]
+
+
+def test_login_revalidates_session_key_after_cache_ttl(tmp_path):
+    session_cache = SessionKeyCache("http://127.0.0.1:1", "api-key", ttl_seconds=0.1,
+                                    cache_dir=str(tmp_path / "session_cache"))
+    client = ToorPIAAPIClient("http://127.0.0.1:1", session_cache=session_cache)
+    issued = []
+    
+    def authenticate(api_key):
+        issued.append(f"sk-{len(issued) + 1}")
+        client.update_session_key(issued[-1])
+        return issued[-1]
+    
+    client.authenticate = authenticate
+    assert client.login("api-key") == "sk-1"
+    assert client.login("api-key") == "sk-1"
+    
+    # 再利用期間を過ぎた取得済みのセッションキーは使わず、キャッシュから取得し直す
+    time.sleep(0.15)
+    assert client.login("api-key") == "sk-2"
+    assert issued == ["sk-1", "sk-2"]
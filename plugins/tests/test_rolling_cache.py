@@ -0,0 +1,62 @@
+"""
+addplot用ローリングウィンドウキャッシュのテスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from plugins.base.rolling_cache import RollingWindowCache
+from plugins.base.timeseries import TagSeries
+
+MINUTE_NS = 60 * 1_000_000_000
+SIGNATURE = [["Pump01.Flow", "Flow"], ["Pump01.Temp", "Temp"]]
+
+
+def minutes(start: int, end: int) -> TagSeries:
+    """start分〜end分（両端含む）の1分間隔の時系列"""
+    epochs = np.arange(start, end + 1, dtype=np.int64) * MINUTE_NS
+    return TagSeries(epochs, epochs.astype(np.float64))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # キャッシュファイル（logs/{設備名}/）を一時ディレクトリに作成
+    monkeypatch.chdir(tmp_path)
+
+
+def test_lagging_tag_is_fetched_from_its_own_high_water_mark():
+    cache = RollingWindowCache("Pump01", overlap_ns=2 * MINUTE_NS)
+    assert not cache.load(SIGNATURE, 0)
+    # Temp は Flow より遅れて到着する（前回の取得時点では50分までしか届いていない）
+    cache.merge({"Flow": minutes(0, 60), "Temp": minutes(0, 50)}, 0, 0)
+    cache.save(SIGNATURE)
+    
+    cache = RollingWindowCache("Pump01", overlap_ns=2 * MINUTE_NS)
+    assert cache.load(SIGNATURE, 5 * MINUTE_NS)
+    # 最も遅れている Temp のハイウォーターマーク（50分）から overlap 分遡って取得
+    fetch_start_ns = cache.fetch_start_ns()
+    assert fetch_start_ns == 48 * MINUTE_NS
+    
+    series = cache.merge({"Flow": minutes(48, 65), "Temp": minutes(48, 65)}, fetch_start_ns, 5 * MINUTE_NS)
+    
+    for column_name in ("Flow", "Temp"):
+        np.testing.assert_array_equal(series[column_name].epochs, minutes(5, 65).epochs)
+    assert cache.high_water_marks == {"Flow": 65 * MINUTE_NS, "Temp": 65 * MINUTE_NS}
+
+
+def test_tag_without_data_does_not_hold_back_fetch_start():
+    cache = RollingWindowCache("Pump01", overlap_ns=2 * MINUTE_NS)
+    cache.merge({"Flow": minutes(0, 60), "Temp": TagSeries.empty()}, 0, 0)
+    cache.save(SIGNATURE)
+    
+    cache = RollingWindowCache("Pump01", overlap_ns=2 * MINUTE_NS)
+    assert cache.load(SIGNATURE, 0)
+    assert cache.fetch_start_ns() == 58 * MINUTE_NS
@@ -0,0 +1,84 @@
+"""
+統一プラグイン実行システム（run_plugin.py）の依存関係チェックのテスト
+
+実行方法（プロジェクトルートで）:
+    python -m pytest -q plugins/tests
+"""
+
+import os
+import sys
+from importlib import metadata
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+pytest.importorskip("packaging")
+
+from plugins import run_plugin
+
+
+@pytest.fixture
+def installed_version(monkeypatch):
+    """インストール済みバージョン（パッケージ名 -> バージョン）を差し替える"""
+    versions = {}
+    
+    def version(name):
+        if name not in versions:
+            raise metadata.PackageNotFoundError(name)
+        return versions[name]
+    
+    monkeypatch.setattr(metadata, "version", version)
+    return versions
+
+
+@pytest.mark.parametrize("installed, specifier, satisfied", [
+    ("2.0.0rc1", ">=2.0", False),
+    ("2.0.0", ">=2.0", True),
+    ("1.2.3+local", "==1.2.3", True),
+    ("1.9", "~=1.4", True),
+    ("2.0", "~=1.4", False),
+    ("1.4.5", "~=1.4.2", True),
+    ("1.5.0", "~=1.4.2", False),
+    ("1.2.3", "===1.2.3", True),
+    ("1.2.3", "==1.2.*", True),
+])
+def test_version_specifiers_follow_pep_440(installed_version, installed, specifier, satisfied):
+    installed_version["example"] = installed
+    
+    problem = run_plugin._check_dependencies((f"example{specifier}",))
+    
+    assert (problem is None) == satisfied
+
+
+def test_marker_excludes_dependency_for_other_environments(installed_version):
+    assert run_plugin._check_dependencies(("example>=1.0; python_version < '3'",)) is None
+    assert run_plugin._check_dependencies(("example>=1.0",)) == "Missing dependency: example"
+
+
+def test_dependency_check_is_persisted_per_venv(tmp_path, monkeypatch):
+    venv_path = tmp_path / "venv"
+    venv_path.mkdir()
+    requirements_file = tmp_path / "requirements.txt"
+    requirements_file.write_text("example>=1.0\n")
+    meta = {"venv_requirements": {"requirements_file": str(requirements_file)}}
+    
+    monkeypatch.setattr(sys, "prefix", str(venv_path))
+    monkeypatch.setattr(sys, "base_prefix", str(tmp_path / "system"))
+    monkeypatch.setattr(run_plugin, "_dependency_cache", {})
+    checks = []
+    monkeypatch.setattr(run_plugin, "_check_dependencies", lambda dependencies: checks.append(dependencies))
+    
+    assert run_plugin._check_dependencies_cached(meta, ("example>=1.0",)) is None
+    assert (venv_path / run_plugin.DEPENDENCY_CHECK_FILE).exists()
+    
+    # 別プロセス（プロセス内キャッシュなし）でも保存済みの結果を使用
+    run_plugin._dependency_cache.clear()
+    assert run_plugin._check_dependencies_cached(meta, ("example>=1.0",)) is None
+    assert len(checks) == 1
+    
+    # requirements_file が変わった場合は確認し直す
+    requirements_file.write_text("example>=2.0\n")
+    run_plugin._dependency_cache.clear()
+    run_plugin._check_dependencies_cached(meta, ("example>=1.0",))
+    assert len(checks) == 2
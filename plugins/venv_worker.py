@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+IF-HUB プラグイン常駐ワーカー
+
+仮想環境のPythonで常駐し、プラグインモジュールを読み込んだまま
+標準入出力経由のジョブ要求を順に実行します。
+run_plugin_with_venv() のように実行のたびにインタープリター起動と
+pandas等の読み込みを行う必要がなくなります。
+
+フレーム形式: 4バイト（ビッグエンディアン）の長さ + UTF-8 JSON本文
+
+    要求: {"id": 1, "type": "analyzer", "name": "toorpia_backend",
+           "config": "configs/equipments/.../config.yaml", "options": {"mode": "addplot_update"}}
+    応答: {"id": 1, "result": {...}, "rss_mb": 123.4}
+    終了: {"command": "shutdown"}（または標準入力のクローズ）
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import select
+import importlib
+import subprocess
+from typing import Dict, Any, Optional
+
+_HEADER = struct.Struct('>I')
+
+# 既定の再起動条件
+DEFAULT_MAX_JOBS = 50
+DEFAULT_MAX_RSS_MB = 1024
+DEFAULT_JOB_TIMEOUT = 300
+
+PLUGIN_TYPES = {
+    'analyzer': 'analyzers',
+    'notifier': 'notifiers',
+    'presenter': 'presenters'
+}
+
+
+def write_frame(stream, message: Dict[str, Any]) -> None:
+    """メッセージを1フレームとして書き込み"""
+    body = json.dumps(message, ensure_ascii=False, default=str).encode('utf-8')
+    stream.write(_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def read_frame(stream) -> Optional[Dict[str, Any]]:
+    """1フレーム読み込み（入力が閉じられた場合はNone）"""
+    header = _read_exact(stream, _HEADER.size)
+    if header is None:
+        return None
+    body = _read_exact(stream, _HEADER.unpack(header)[0])
+    if body is None:
+        return None
+    return json.loads(body.decode('utf-8'))
+
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def current_rss_mb() -> float:
+    """現在の常駐メモリサイズ（MB）"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # /proc がない環境ではピーク値で代用
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def serve() -> int:
+    """ワーカーのメインループ（仮想環境のPythonで実行）"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+    
+    # 標準出力はフレーム専用とし、プラグインの print 等は標準エラー出力へ回す
+    frame_out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    frame_in = sys.stdin.buffer
+    sys.stdout = sys.stderr
+    
+    plugins = {}
+    while True:
+        request = read_frame(frame_in)
+        if request is None or request.get('command') == 'shutdown':
+            break
+        
+        try:
+            key = (request['type'], request['name'])
+            if key not in plugins:
+                module = importlib.import_module(
+                    f"plugins.{PLUGIN_TYPES[request['type']]}.{request['name']}.run"
+                )
+                plugins[key] = module.run
+            result = plugins[key](request['config'], **request.get('options', {}))
+        except Exception as e:
+            result = {
+                "status": "error",
+                "error": {
+                    "code": "PLUGIN_EXECUTION_FAILED",
+                    "message": str(e)
+                }
+            }
+        
+        write_frame(frame_out, {"id": request.get('id'), "result": result, "rss_mb": current_rss_mb()})
+    
+    return 0
+
+
+class VenvWorker:
+    """常駐ワーカーのクライアント
+    
+    ワーカーは最初のジョブで起動し、max_jobs 件実行した場合・常駐メモリが max_rss_mb を
+    超えた場合・異常終了した場合に停止して、次のジョブで起動し直します。
+    """
+    
+    def __init__(self, python_exe: str,
+                 max_jobs: int = DEFAULT_MAX_JOBS,
+                 max_rss_mb: float = DEFAULT_MAX_RSS_MB,
+                 job_timeout: float = DEFAULT_JOB_TIMEOUT):
+        """
+        Args:
+            python_exe: ワーカーを実行するPython（プラグインの仮想環境）
+            max_jobs: 再起動までの最大ジョブ数
+            max_rss_mb: 再起動する常駐メモリサイズ（MB）
+            job_timeout: 1ジョブのタイムアウト（秒）。超過時はワーカーを強制終了
+        """
+        self.python_exe = python_exe
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.job_timeout = job_timeout
+        
+        self.process: Optional[subprocess.Popen] = None
+        self.jobs_done = 0
+        self.starts = 0
+        self._next_id = 0
+    
+    def run_job(self, plugin_type: str, plugin_name: str, config_path: str,
+                options: Dict[str, Any]) -> Dict[str, Any]:
+        """ジョブ実行"""
+        if self.process is None or self.process.poll() is not None:
+            self._start()
+        
+        self._next_id += 1
+        request = {
+            "id": self._next_id,
+            "type": plugin_type,
+            "name": plugin_name,
+            "config": config_path,
+            "options": options
+        }
+        
+        try:
+            write_frame(self.process.stdin, request)
+            response = self._read_response(time.time() + self.job_timeout)
+        except TimeoutError:
+            self._kill()
+            return {
+                "status": "error",
+                "error": {
+                    "code": "PLUGIN_TIMEOUT",
+                    "message": f"Plugin execution timed out ({self.job_timeout:.0f}s)"
+                }
+            }
+        except (OSError, ValueError) as e:
+            exit_code = self._kill()
+            return {
+                "status": "error",
+                "error": {
+                    "code": "WORKER_CRASHED",
+                    "message": f"Plugin worker terminated unexpectedly (exit code: {exit_code}): {e}"
+                }
+            }
+        
+        self.jobs_done += 1
+        if self.jobs_done >= self.max_jobs or response.get('rss_mb', 0) > self.max_rss_mb:
+            self.close()
+        
+        return response.get('result', {})
+    
+    def close(self) -> None:
+        """ワーカー停止（実行中のジョブはない前提）"""
+        if self.process is None:
+            return
+        
+        try:
+            write_frame(self.process.stdin, {"command": "shutdown"})
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self._kill()
+        self.process = None
+    
+    def _start(self) -> None:
+        if self.process is not None:
+            self._kill()
+        
+        self.process = subprocess.Popen(
+            [self.python_exe, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0
+        )
+        self.jobs_done = 0
+        self.starts += 1
+    
+    def _read_response(self, deadline: float) -> Dict[str, Any]:
+        """応答フレームを期限まで待って読み込み"""
+        fd = self.process.stdout.fileno()
+        
+        def read_exact(size: int) -> bytes:
+            data = b''
+            while len(data) < size:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    raise TimeoutError()
+                chunk = os.read(fd, size - len(data))
+                if not chunk:
+                    raise EOFError()
+                data += chunk
+            return data
+        
+        try:
+            size = _HEADER.unpack(read_exact(_HEADER.size))[0]
+            return json.loads(read_exact(size).decode('utf-8'))
+        except EOFError:
+            raise OSError("worker closed its output")
+    
+    def _kill(self) -> Optional[int]:
+        """ワーカー強制終了（終了コードを返す）"""
+        if self.process is None:
+            return None
+        
+        process = self.process
+        self.process = None
+        if process.poll() is None:
+            process.kill()
+        try:
+            return process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            return None
+
+
+if __name__ == '__main__':
+    sys.exit(serve())